@@ -6,9 +6,13 @@ import time
 import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
 from IPython.display import Image
 
 ###
@@ -117,13 +121,14 @@ def _parse_bsr_case_info(result_list:list) -> list:
 
     return cases
 
-def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:str, path_to_save="") -> dict:
+def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:str, path_to_save="", browser_pool=None) -> dict:
     '''
     path_to_driver: str, path to Chrome driver;
     keywords: list, keywords (words and phrases) to search for in cases texts, for example, ["ключевое слово", "ещё одно слово"];
     start_date: str, format 'YYYY-MM-DD', for example, '2023-01-30';
     end_date: str, format 'YYYY-MM-DD', for example, '2023-12-31';
     path_to_save: str, directory where to save files and logs, default is "";
+    browser_pool: sudrfparser.BrowserPool, Chrome drivers to reuse, default None (a driver is started and quit afterwards);
     Saves a json file (dict) with keywords as keys and a list of links to cases as values
     Returns a dict: {"keyword":["link_to_case"]}
     Used in get_cases_by_keywords
@@ -131,7 +136,8 @@ def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:
 
     results = {}
 
-    browser = sudrfparser._set_browser(path_to_driver)
+    pool = browser_pool if browser_pool != None else sudrfparser.BrowserPool(path_to_driver, max_idle=1)
+    browser = pool.acquire()
 
     # generating a request ID based on local time
     timestamp = time.localtime()
@@ -148,15 +154,13 @@ def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:
         # encoding the request link
         request_link_encoded = urllib.parse.quote(request_link,safe='/:#,=&')
 
-        browser.get(request_link_encoded)
-        # additional wait
-        time.sleep(3)
-        # checking if the content is loaded and visible
-        check_content = sudrfparser._explicit_wait(browser,"CLASS_NAME","resultsList", 30)
+        # checking if the content is loaded and visible; requests to bsr are paced by sudrfparser.RATE_LIMITER
+        # always loaded, since the next pages need the search session; the page is still kept in sudrfparser.PAGE_CACHE for re-parsing
+        page_source, check_content = sudrfparser._load_page(browser,request_link_encoded,"CLASS_NAME","resultsList", 30, from_cache=False)
 
         if check_content == True:
 
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+            soup = BeautifulSoup(page_source, 'html.parser')
 
             # check if results are found
             result_list = soup.find("ul",{"id":"resultsList"}).find_all("li")
@@ -195,13 +199,10 @@ def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:
                         # encoding the request link
                         pagination_encoded = urllib.parse.quote(pagination,safe='/:#,=&')
 
-                        browser.get(pagination_encoded)
                         # checking if the content is loaded and visible
-                        check_content = sudrfparser._explicit_wait(browser,"CLASS_NAME","resultsList",30)
-                        # additional wait to avoid captcha
-                        time.sleep(3)
+                        page_source, check_content = sudrfparser._load_page(browser,pagination_encoded,"CLASS_NAME","resultsList",30,from_cache=False)
 
-                        soup = BeautifulSoup(browser.page_source, 'html.parser')
+                        soup = BeautifulSoup(page_source, 'html.parser')
 
                         # adding cases info to all_cases_per_keyword
                         result_list = soup.find("ul",{"id":"resultsList"}).find_all("li")
@@ -211,10 +212,6 @@ def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:
                         browser.close()
                         browser.switch_to.window(browser.window_handles[0])
 
-                        # additional wait for every 10th page (200 cases) to avoid captcha
-                        if i % 200 == 0:
-                            time.sleep(5)
-
         else:
             results_per_keyword = "request_failed"
 
@@ -226,31 +223,98 @@ def get_cases_links(path_to_driver:str, keywords:list, start_date:str, end_date:
     with open(results_file_name, 'w') as jf:
         json.dump(results, jf, ensure_ascii=False)
 
-    browser.close()
+    pool.release(browser)
+    if browser_pool == None:
+        pool.close()
 
     return f"Results are saved in {path_to_save}"
 
+def _parse_cached_links_page(file_path:str):
+    '''
+    Parsing a page of bsr search results kept by sudrfparser.PageCache; runs in worker processes of "reparse_cases_links"
+    Returns a tuple (keyword, start_date, end_date, N of the first case on the page, N cases found, list of cases); None if the file is not a page of bsr search results
+    '''
+
+    url, page_source = sudrfparser._read_cached_page(file_path)
+
+    if url == None or "bsr.sudrf.ru" not in url or "multiqueryRequest" not in url:
+        return None
+
+    # the search request is in the url fragment (see "get_cases_links")
+    request = json.loads(urllib.parse.unquote(urllib.parse.urlsplit(url).fragment))
+    query_requests = request["multiqueryRequest"]["queryRequests"]
+    keyword = json.loads(query_requests[0]["request"])["query"]
+    date_range = json.loads(query_requests[1]["request"])["typeRequests"][0]["fieldRequests"][0]
+    start_date = date_range["query"].split("T")[0]
+    end_date = date_range["sQuery"].split("T")[0]
+
+    soup = BeautifulSoup(page_source, 'html.parser')
+    result_list = soup.find("ul",{"id":"resultsList"}).find_all("li")
+
+    if result_list[0].text == "Ничего не найдено":
+        return keyword, start_date, end_date, 0, 0, []
+
+    n_cases = int(soup.find("div",{"id":"resultCount"})["data-total"])
+
+    return keyword, start_date, end_date, request.get("start", 0), n_cases, _parse_bsr_case_info(result_list)
+
+def reparse_cases_links(cache_path=sudrfparser.PAGE_CACHE_PATH, path_to_save="", n_workers=None) -> str:
+    '''
+    Parsing cases links again from the pages of bsr search results kept by the page cache (see sudrfparser.configure_page_cache), without loading them
+    cache_path: str, directory of the page cache, default sudrfparser.PAGE_CACHE_PATH;
+    path_to_save: str, directory where to save files, default is "";
+    n_workers: int, N of worker processes, default None (N of CPU cores);
+    Saves a json file (dict) per date range in the cache, the same as "get_cases_links": 'cases_links_reparsed_{start_date}_{end_date}.json'
+    Returns str, status
+    '''
+
+    cache = sudrfparser.PageCache(cache_path, ttl_days=None)
+    file_paths = [file_path for url, file_path in cache.urls() if "bsr.sudrf.ru" in url]
+
+    # {(start_date, end_date): {keyword: {start: (n_cases, cases)}}}
+    pages = {}
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for page in executor.map(_parse_cached_links_page, file_paths, chunksize=50):
+            if page != None:
+                keyword, start_date, end_date, start, n_cases, cases = page
+                pages.setdefault((start_date, end_date), {}).setdefault(keyword, {})[start] = (n_cases, cases)
+
+    files = []
+    for (start_date, end_date), pages_by_keyword in sorted(pages.items()):
+        results = {}
+        for keyword, pages_by_start in pages_by_keyword.items():
+            # pages in the order of the search results
+            results[keyword] = {"n_cases": pages_by_start[min(pages_by_start)][0], "cases": []}
+            for start in sorted(pages_by_start):
+                results[keyword]["cases"].extend(pages_by_start[start][1])
+
+        results_file_name = os.path.join(path_to_save, f"cases_links_reparsed_{start_date}_{end_date}.json")
+        with open(results_file_name, 'w') as jf:
+            json.dump(results, jf, ensure_ascii=False)
+        files.append(results_file_name)
+
+    return f"{len(file_paths)} cached pages were re-parsed, results are saved in {files}"
+
 def _get_court_website(court_name:str) -> dict:
     '''
     Getting court's website address and server numbers by its name
-    Sends a request to the GitHub file sudrf_websites.json
-    court_name: 'str', the name of the court (the names should be = to the neames in sudrf_websites.json)
-    Returns dict, for example ({"court_website":"http://aleysky.alt.sudrf.ru","srv":["1"],"court_id":"22RS0001"})
+    Looks up the court in the bundled courts info (see sudrfparser.CourtRegistry)
+    court_name: 'str', the name of the court (the names should be = to the neames in sudrf_websites.json; double spaces, punctuation and the region in brackets are tolerated)
+    Returns dict, for example ({"court_website":"http://aleysky.alt.sudrf.ru","srv":["1"],"court_id":"22RS0001"}); empty dict if the court is not found or the name belongs to courts of several regions
     '''
 
-    court_name = court_name.replace('  ',' ') # remove extra space in some court names
-
     info_to_return = {}
-    
-    court_codes_url = "https://github.com/dataout-org/sudrfparser/raw/main/courts_info/sudrf_websites.json"
-    r = requests.get(court_codes_url)
-    court_codes = r.json()
-
-    for region_code, courts_info in court_codes.items():
-        for court in courts_info:
-            if court_name in court["court_name"]:
-                info_to_return = {"court_website":court["court_website"],"srv":court["srv"],"court_id":court["court_id"]}
-                
+
+    try:
+        court = sudrfparser.get_court_registry().find_by_name(court_name)
+    # not taking a court of another region
+    except ValueError:
+        court = None
+
+    if court != None:
+        info_to_return = {"court_website":court["court_website"],"srv":court["srv"],"court_id":court["court_id"]}
+
     return info_to_return
 
 def _get_captcha_from_soup_f1(soup_captcha) -> str:
@@ -342,11 +406,10 @@ def _get_case_by_id_f1(browser, court_website:str, court_srv:list, id_text:str,
             captcha_addition = _get_captcha_from_soup_f1(soup_captcha)
             link_to_search_case += captcha_addition
 
-        browser.get(link_to_search_case)
         # explicitly waiting for the results table
-        el_found = sudrfparser._explicit_wait(browser,"ID","tablcont",6)
-        time.sleep(3)
-        soup = BeautifulSoup(browser.page_source, 'html.parser')
+        # not cached: the link has a captcha that is valid once
+        page_source, el_found = sudrfparser._load_page(browser,link_to_search_case,"ID","tablcont",from_cache=False,to_cache=False)
+        soup = BeautifulSoup(page_source, 'html.parser')
 
         # case found
         if soup.find("table", {"id": "tablcont"}) != None:
@@ -359,8 +422,8 @@ def _get_case_by_id_f1(browser, court_website:str, court_srv:list, id_text:str,
         
             # get case info
 
-            browser.get(case_link)
-            soup_case = BeautifulSoup(browser.page_source, 'html.parser')
+            page_source, tabs_found = sudrfparser._load_page(browser,case_link,"CLASS_NAME","contentt")
+            soup_case = BeautifulSoup(page_source, 'html.parser')
 
             # single case page / getting case data
             content = soup_case.find('div', {'class': 'contentt'})
@@ -442,11 +505,10 @@ def _get_case_by_id_f2(browser, court_website:str, court_srv:list, court_id:str,
             captcha_addition = _get_captcha_from_soup_f2(soup_captcha)
             link_to_search_case += captcha_addition
 
-        browser.get(link_to_search_case)
         # explicitly waiting for the results table
-        el_found = sudrfparser._explicit_wait(browser,"ID","resultTable",6)
-        time.sleep(3)
-        soup = BeautifulSoup(browser.page_source, 'html.parser')
+        # not cached: the link has a captcha that is valid once
+        page_source, el_found = sudrfparser._load_page(browser,link_to_search_case,"ID","resultTable",from_cache=False,to_cache=False)
+        soup = BeautifulSoup(page_source, 'html.parser')
 
         # case found
         if soup.find("table", {"class": "law-case-table"}) != None:
@@ -466,10 +528,9 @@ def _get_case_by_id_f2(browser, court_website:str, court_srv:list, court_id:str,
             print(f"Case uid is parsed:{case_id_uid}")
         
             # get case info
-            browser.get(case_link)
-            # explicitly waiting for the results table
-            el_found = sudrfparser._explicit_wait(browser,"ID","case_bookmarks",6)
-            soup_case = BeautifulSoup(browser.page_source, 'html.parser')
+            # explicitly waiting for the case tabs
+            page_source, el_found = sudrfparser._load_page(browser,case_link,"ID","case_bookmarks")
+            soup_case = BeautifulSoup(page_source, 'html.parser')
 
             # single case page / getting case data
             content = soup_case.find('div', {'id': 'search_results'})
@@ -535,28 +596,25 @@ def _get_case_by_id_f2(browser, court_website:str, court_srv:list, court_id:str,
     return results
 
 
-def _find_one_case_by_id(browser, court_website:str, court_srv:list, court_id:str, id_text:str, adm_date:str) -> dict:
+def _find_one_case_by_id(browser, court_website:str, court_srv:list, court_id:str, id_text:str, adm_date:str, site_profiles_path=sudrfparser.SITE_PROFILES_PATH, profile_ttl_days=30) -> dict:
     '''
     '''
 
     results = {}
 
-    # trying the first server
-    link_to_site = court_website + f"/modules.php?name=sud_delo&srv_num={court_srv[0]}&name_op=sf&delo_id=1540005"
-
     try:
-        browser.get(link_to_site)
-        content_found = sudrfparser._explicit_wait(browser,"ID","modSdpContent",6)
-        # additional time if explicit wait fails
-        time.sleep(3)
+        # the form type and captcha are known from the previous calls (see sudrfparser.get_cases)
+        profile = sudrfparser._cached_site_profile(court_website, site_profiles_path, profile_ttl_days)
+        soup = None
 
-        if content_found == True:
+        # trying the first server; the search form page is needed to check the website or to get captcha
+        if profile == None or profile["captcha"] == "True":
+            profile, soup = sudrfparser._probe_site_profile(browser, court_website, court_srv[0], site_profiles_path)
 
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+        if profile != None:
 
-            form_and_captcha = sudrfparser._check_form_and_captcha(soup)
-            form_type = form_and_captcha["form_type"]
-            captcha = form_and_captcha["captcha"]
+            form_type = profile["form_type"]
+            captcha = profile["captcha"]
 
             # parser for form1
             if form_type == "form1" and captcha == "False":
@@ -596,12 +654,8 @@ def _get_case_from_bsr(browser, case_link:str) -> dict:
     browser.execute_script("window.open('');")
     browser.switch_to.window(browser.window_handles[1])
 
-    # opening case link
-    browser.get(link)
-
-    check_content = sudrfparser._explicit_wait(browser,"CLASS_NAME","documentInner",30)
-    # additional wait
-    time.sleep(3)
+    # opening case link; case data is read from the opened page, so it is not taken from the cache
+    page_source, check_content = sudrfparser._load_page(browser,link,"CLASS_NAME","documentInner",30,from_cache=False)
 
     # if case data is present
     if check_content == True:
@@ -616,13 +670,15 @@ def _get_case_from_bsr(browser, case_link:str) -> dict:
 
 # the master function
 
-def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to_ignore=[]) -> str:
+def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to_ignore=[], browser_pool=None, sink=None) -> str:
     '''
     Takes a dict as an input with cases metadata and serches for cases on court webstes;
     cases_info: dict, taken from the results file generated with "get_cases_links";
     path_to_driver: str, path to Chrome driver;
     path_to_save: str, directory where to save files and logs, default is "";
     cases_ids_to_ignore: list, cases ID (case_id_bsr), which won't be saved (for example, when results for these cases were already saved before), default is [];
+    browser_pool: sudrfparser.BrowserPool, Chrome drivers to reuse, default None (a driver is started and quit afterwards);
+    sink: sudrfparser.SqliteSink, a database where cases are added too (with source "bsr" and case_id_bsr as the key), default None; cases already in it are not requested;
     Saves separate json files with results for each case; saves a json file with logs of failed requests (if any);
     Returns a status string
     '''
@@ -633,10 +689,14 @@ def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to
         for case in info["cases"]:
             all_cases_ids.append(case["case_id_bsr"])
 
-    unique_to_request = [c for c in set(all_cases_ids) if c not in cases_ids_to_ignore]
+    # cases saved to the database before are ignored too
+    stored_ids = sink.case_keys(source="bsr") if sink != None else set()
+
+    unique_to_request = [c for c in set(all_cases_ids) if c not in cases_ids_to_ignore and c not in stored_ids]
     print(f"{len(unique_to_request)} cases to request")
 
-    browser = sudrfparser._set_browser(path_to_driver)
+    pool = browser_pool if browser_pool != None else sudrfparser.BrowserPool(path_to_driver, max_idle=1)
+    browser = pool.acquire()
 
     # generating an ID based on local time
     timestamp = time.localtime()
@@ -649,6 +709,7 @@ def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to
     requested = []
     # cases to ignore are also stored here
     requested.extend(cases_ids_to_ignore)
+    requested.extend(stored_ids)
 
     for keyword, cases_by_keyword in cases_info.items():
 
@@ -694,6 +755,8 @@ def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to
 
                         with open(file_name, 'w') as jf:
                             json.dump(result_one_case, jf, ensure_ascii=False)
+                        if sink != None:
+                            sink.add(one_case_data, court_website_info.get("court_website", ""), court_website_info.get("srv", [""])[0], year=adm_date.split('.')[-1], source="bsr", case_key=case_id_bsr, court=court_name, keyword=keyword)
 
                         print(f"Case {case_id_bsr} saved")
                         requested.append(case_id_bsr)
@@ -715,6 +778,8 @@ def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to
 
                     with open(file_name, 'w') as jf:
                         json.dump(result_one_case, jf, ensure_ascii=False)
+                    if sink != None:
+                        sink.add(one_case_data, court_website_info.get("court_website", ""), court_website_info.get("srv", [""])[0], year=adm_date.split('.')[-1], source="bsr", case_key=case_id_bsr, court=court_name, keyword=keyword)
 
                     print(f"Case {case_id_bsr} saved")
                     requested.append(case_id_bsr)
@@ -727,44 +792,53 @@ def get_cases(cases_info:dict, path_to_driver:str, path_to_save="", cases_ids_to
         with open(file_name_logs, 'w') as jf:
             json.dump(logs_failed_cases, jf)
 
-    browser.quit()
+    pool.release(browser)
+    if browser_pool == None:
+        pool.close()
+    if sink != None:
+        sink.flush()
 
     return f"Job is finished. Results are saved in {path_to_save}"
 
 # Function to parse cases from the bsr portal directly
-def get_cases_by_keywords(path_to_driver:str, cases_links:dict, cases_ids_to_ignore=[], path_to_save="") -> str:
+def get_cases_by_keywords(path_to_driver:str, cases_links:dict, cases_ids_to_ignore=[], path_to_save="", browser_pool=None, sink=None) -> str:
     '''
     path_to_driver: str, path to Chrome driver;
     cases_links: dict, links to cases (results from get_cases_links)
     cases_ids_to_ignore: list, cases ID, which won't be saved (for example, when results for these cases were already saved before), default is [];
     path_to_save: str, directory where to save files and logs, default is "";
+    browser_pool: sudrfparser.BrowserPool, Chrome drivers to reuse, default None (a driver is started and quit afterwards);
+    sink: sudrfparser.SqliteSink, a database where cases are added too (with source "bsr"), default None; cases already in it are not requested;
     Saves 3 files: (1) json with parsed cases, (2) txt with cased ids that were requested (so that they can be ignored during the next requests, pass this list to "cases_ids_to_ignore"), (3) txt with logs;
     Returns status str
     '''
 
-    browser = sudrfparser._set_browser(path_to_driver)
+    pool = browser_pool if browser_pool != None else sudrfparser.BrowserPool(path_to_driver, max_idle=1)
+    browser = pool.acquire()
 
     results = {}
     logs = []
     # generating a request ID based on local time
     timestamp = time.localtime()
     request_id = f"{timestamp[3]}-{timestamp[4]}-{timestamp[5]}-{timestamp[2]}-{timestamp[1]}-{timestamp[0]}"
+    # cases saved to the database before
+    stored_ids = sink.case_keys(source="bsr") if sink != None else set()
 
     for keyword, cases_by_keyword in cases_links.items():
         for case in cases_by_keyword["cases"]:
             case_id = case["case_id_uid"]
 
-            if case_id not in cases_ids_to_ignore:
+            if case_id not in cases_ids_to_ignore and case_id not in stored_ids:
+                # the court of the case, for the database
+                court_name = case["metadata"].get("court_name", "")
+                court_website_info = _get_court_website(court_name) if sink != None else {}
+
                 # encoding case url
                 link = urllib.parse.quote(case["case_url"],safe='/:#,=&')
                 # opening each case in a new tab, so they load properly
                 browser.execute_script("window.open('');")
                 browser.switch_to.window(browser.window_handles[1])
-                browser.get(link)
-
-                check_content = sudrfparser._explicit_wait(browser,"CLASS_NAME","documentInner",20)
-                # additional wait
-                time.sleep(3)
+                page_source, check_content = sudrfparser._load_page(browser,link,"CLASS_NAME","documentInner",20,from_cache=False)
 
                 if check_content == True:
 
@@ -776,17 +850,20 @@ def get_cases_by_keywords(path_to_driver:str, cases_links:dict, cases_ids_to_ign
                         browser.find_element(By.XPATH, '//*[@id="capchaDialog"]/input').send_keys(1)
                         # clicking on the send button
                         browser.find_element(By.CLASS_NAME, 'ui-button-text').click()
-                        # additional wait
-                        time.sleep(5)
+                        # waiting for the captcha dialog to close
+                        try:
+                            WebDriverWait(browser,20).until(EC.invisibility_of_element_located((By.ID, "modalWindow_capchaDialog")))
+                        except TimeoutException:
+                            pass
                         check_content = sudrfparser._explicit_wait(browser,"CLASS_NAME","documentInner", 20)
-                        # additional wait
-                        time.sleep(3)
                         # saving the case
                         # subfunction to collect case text and metadata
                         case_data = _get_case_text_and_metadata(browser)
                         # writing results
                         results[case_id] = case_data
                         cases_ids_to_ignore.append(case_id)
+                        if sink != None:
+                            sink.add(case_data, court_website_info.get("court_website", ""), court_website_info.get("srv", [""])[0], source="bsr", case_key=case_id, court=court_name, keyword=keyword)
 
                     # no captcha    
                     else:
@@ -795,6 +872,8 @@ def get_cases_by_keywords(path_to_driver:str, cases_links:dict, cases_ids_to_ign
                         # writing results
                         results[case_id] = case_data
                         cases_ids_to_ignore.append(case_id)
+                        if sink != None:
+                            sink.add(case_data, court_website_info.get("court_website", ""), court_website_info.get("srv", [""])[0], source="bsr", case_key=case_id, court=court_name, keyword=keyword)
 
                 else:
                 # a case is not loaded
@@ -807,7 +886,11 @@ def get_cases_by_keywords(path_to_driver:str, cases_links:dict, cases_ids_to_ign
             else:
                 logs.append(f"Case {case_id} was already saved")
 
-    browser.close()
+    pool.release(browser)
+    if browser_pool == None:
+        pool.close()
+    if sink != None:
+        sink.flush()
 
     # saving files
 
@@ -15,8 +15,51 @@ import time
 import os
 from os import listdir
 from os.path import isfile, join
-from collections import Counter
 import gzip
+import threading
+import urllib.parse
+import functools
+import tracemalloc
+import datetime
+import shutil
+import queue
+import hashlib
+import io
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+try:
+    import psutil
+except ImportError:
+    # optional, used to restart drivers by memory in 'BrowserPool'
+    psutil = None
+try:
+    import lxml.html
+except ImportError:
+    # optional, a faster page parser backend (see 'set_parser_backend')
+    lxml = None
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    # optional, a faster page parser backend (see 'set_parser_backend')
+    LexborHTMLParser = None
+try:
+    import zstandard
+except ImportError:
+    # optional, the zstd codec of region-year archives (see 'compress_by_region_year')
+    zstandard = None
+try:
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.parquet
+except ImportError:
+    # optional, Parquet export (see 'export_parquet')
+    pyarrow = None
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows; websites' profiles are then guarded only within one process (see '_save_site_profile')
+    fcntl = None
 
 ###
 # Functions to parse criminal cases of the first instance from websites of federal courts of general jurisdiction hosted on sudrf.ru
@@ -25,6 +68,25 @@ import gzip
 # CC-BY-SA 4.0
 ###
 
+# HTTP engine settings
+HTTP_TIMEOUT = 30
+HTTP_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+# errors after which a page is considered not loaded by any of the engines
+_FETCH_ERRORS = (WebDriverException, requests.exceptions.RequestException)
+
+# bundled courts info (courts' websites, ids and servers; region codes)
+COURTS_INFO_DIR = join(os.path.dirname(os.path.abspath(__file__)), "courts_info")
+
+# websites' form types, captcha and servers, checked once in 30 days by default (see '_probe_site_profile')
+SITE_PROFILES_PATH = join(os.path.expanduser("~"), ".sudrfparser", "site_profiles.json")
+
+# raw pages kept by 'configure_page_cache'
+PAGE_CACHE_PATH = join(os.path.expanduser("~"), ".sudrfparser", "page_cache")
+
+# guards shared json files written from several threads (for example, by 'crawl_region'); processes also lock a '.lock' file next to them
+_FILE_LOCK = threading.Lock()
+
 
 def _set_browser(path_to_driver:str,imagesOff=False,javaScriptOff=False):
     '''
@@ -79,10 +141,641 @@ def _explicit_wait(browser,by:str,element:str,sec:int) -> bool:
         
     return element_found
 
+def _set_session(pool_size=10):
+    '''
+    Setting up a requests session for the browser-free HTTP engine; keeps connections to a website alive between requests;
+    pool_size: int, max N of kept-alive connections per host, default 10;
+    Returns requests.Session, which can be used instead of a browser in '_load_page'
+    '''
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({"User-Agent": HTTP_USER_AGENT})
+
+    return session
+
+def _decode_page(r) -> str:
+    '''
+    Decoding a response of the HTTP engine; court websites mostly use windows-1251 and don't always declare it in headers
+    r: requests.Response
+    Returns str, page source
+    '''
+
+    if 'charset' not in r.headers.get('Content-Type','').lower():
+        charset = re.search(rb'charset=["\']?([\w-]+)', r.content[:2048])
+        if charset != None:
+            r.encoding = charset[1].decode()
+        else:
+            r.encoding = 'windows-1251'
+
+    return r.text
+
+def _element_in_source(page_source:str, by:str, element:str) -> bool:
+    '''
+    Checking if an element is present in a page source without parsing it; the HTTP counterpart of '_explicit_wait'
+    page_source: str, page html;
+    by: str, "ID" or "CLASS_NAME";
+    element: str, ID or CLASS_NAME of an element to look for;
+    Returns True if the element is found, False otherwise
+    '''
+
+    if by == 'ID':
+        pattern = f'id\\s*=\\s*["\']?{re.escape(element)}(?![\\w-])'
+    else:
+        pattern = f'class\\s*=\\s*["\'][^"\']*(?<![\\w-]){re.escape(element)}(?![\\w-])'
+
+    return re.search(pattern, page_source) != None
+
+class RateLimiter:
+    '''
+    Limiting the rate of requests per host (website domain) with token buckets; all pages loaded with '_load_page' go through 'RATE_LIMITER';
+    rate: float, N of requests per second per host, default 2;
+    burst: int, N of requests that can be sent at once after a pause, default 4;
+    per_host: dict, rate and burst for particular hosts {host: (rate, burst)}, for example {"bsr.sudrf.ru": (0.3, 1)}, default {};
+    adaptive: bool, True to halve the rate of a host after a failed request and restore it gradually after successful ones, default True;
+    min_rate: float, the lowest rate the adaptive slow-down goes to, default 0.1;
+    Limits are per process: each worker of 'crawl_courts_parallel' has its own limiter
+    '''
+
+    def __init__(self, rate=2.0, burst=4, per_host={}, adaptive=True, min_rate=0.1):
+        self.rate = rate
+        self.burst = burst
+        self.per_host = dict(per_host)
+        self.adaptive = adaptive
+        self.min_rate = min_rate
+        # host: {"rate": current rate, "tokens": N, "updated": time}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host:str) -> dict:
+        if host not in self._buckets:
+            rate, burst = self.per_host.get(host, (self.rate, self.burst))
+            self._buckets[host] = {"base_rate": rate, "rate": rate, "burst": burst, "tokens": burst, "updated": time.monotonic()}
+        return self._buckets[host]
+
+    def acquire(self, url:str):
+        '''
+        Waiting until a request to the host of 'url' is allowed
+        '''
+        host = urllib.parse.urlsplit(url).netloc
+
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket["tokens"] = min(bucket["burst"], bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+            bucket["updated"] = now
+            # taking a token in advance, the wait pays for it
+            bucket["tokens"] -= 1
+            wait = -bucket["tokens"] / bucket["rate"] if bucket["tokens"] < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def report_error(self, url:str):
+        '''
+        Slowing down requests to the host of 'url' after a failed request (adaptive mode)
+        '''
+        if self.adaptive:
+            with self._lock:
+                bucket = self._bucket(urllib.parse.urlsplit(url).netloc)
+                bucket["rate"] = max(self.min_rate, bucket["rate"] / 2)
+
+    def report_success(self, url:str):
+        '''
+        Speeding up requests to the host of 'url' back to its rate after a successful request (adaptive mode)
+        '''
+        if self.adaptive:
+            with self._lock:
+                bucket = self._bucket(urllib.parse.urlsplit(url).netloc)
+                bucket["rate"] = min(bucket["base_rate"], bucket["rate"] * 1.1)
+
+# the limiter used by '_load_page'; bsr.sudrf.ru shows captcha on frequent requests
+RATE_LIMITER = RateLimiter(per_host={"bsr.sudrf.ru": (0.3, 1)})
+
+def configure_rate_limits(rate=2.0, burst=4, per_host={}, adaptive=True, min_rate=0.1) -> RateLimiter:
+    '''
+    Setting rate limits for all requests of the current process (see 'RateLimiter' for the parameters)
+    For example, configure_rate_limits(rate=5, per_host={"mos-gorsud.ru": (1, 2)})
+    Returns the new RateLimiter
+    '''
+
+    global RATE_LIMITER
+
+    hosts = {"bsr.sudrf.ru": (0.3, 1)}
+    hosts.update(per_host)
+    RATE_LIMITER = RateLimiter(rate, burst, hosts, adaptive, min_rate)
+
+    return RATE_LIMITER
+
+# query parameters that change between requests of the same page
+_VOLATILE_URL_PARAMS = {"captcha", "captchaid"}
+
+def _normalize_url(url:str) -> str:
+    '''
+    A cache key of a page address: the scheme and host in lower case, query parameters sorted, captcha parameters removed;
+    the fragment is kept, since bsr.sudrf.ru puts the search request there
+    '''
+
+    parts = urllib.parse.urlsplit(url)
+    params = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in _VOLATILE_URL_PARAMS]
+    query = urllib.parse.urlencode(sorted(params))
+
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, parts.fragment))
+
+class PageCache:
+    '''
+    An on-disk cache of raw html of loaded pages (case pages and bsr search results), so that reruns and re-parsing don't load them again; search results of court websites are always loaded, so that new cases are seen;
+    pages are kept in '{path}/{2 first symbols of the key}/{sha1 of the normalized url}.html.gz'; the first line of a file is the url of the page
+    path: str, directory of the cache, default PAGE_CACHE_PATH ('~/.sudrfparser/page_cache');
+    ttl_days: float, N of days after which a page is loaded again, default 30; None to keep pages until they are evicted;
+    max_size_mb: float, max size of the compressed pages; the least recently used pages are removed above it, default 1024;
+    compresslevel: int, gzip level, default 6;
+    Only pages where the expected element is found are kept (not errors and captcha pages)
+    '''
+
+    def __init__(self, path=PAGE_CACHE_PATH, ttl_days=30, max_size_mb=1024, compresslevel=6):
+        self.path = path
+        self.ttl_days = ttl_days
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.compresslevel = compresslevel
+        self.hits = 0
+        self.misses = 0
+        # N of bytes in the cache, counted at the first write
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _file_path(self, url:str) -> str:
+        key = hashlib.sha1(_normalize_url(url).encode("utf-8")).hexdigest()
+        return join(self.path, key[:2], key + ".html.gz")
+
+    def _files(self):
+        # (path, size, last access)
+        for dir_path, dirs, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".html.gz"):
+                    file_path = join(dir_path, name)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    yield file_path, stat.st_size, stat.st_atime
+
+    def get(self, url:str):
+        '''
+        Returns str, html of the page; None if the page is not cached or expired
+        '''
+
+        file_path = self._file_path(url)
+
+        try:
+            stat = os.stat(file_path)
+            # mtime is the time the page was loaded, atime the time it was used last
+            if self.ttl_days != None and time.time() - stat.st_mtime > self.ttl_days * 86400:
+                self.misses += 1
+                return None
+            with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                f.readline()
+                page_source = f.read()
+            os.utime(file_path, (time.time(), stat.st_mtime))
+        except (OSError, EOFError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return page_source
+
+    def put(self, url:str, page_source:str):
+        '''
+        Keeping html of the page; the least recently used pages are removed if the cache is larger than max_size_mb
+        '''
+
+        file_path = self._file_path(url)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        data = gzip.compress((url.replace("\n", "") + "\n" + page_source).encode("utf-8"), self.compresslevel)
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            if self._size == None:
+                self._size = sum(size for _, size, _ in self._files())
+            try:
+                self._size -= os.path.getsize(file_path)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, file_path)
+            self._size += len(data)
+
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        # removing the least recently used pages down to 90% of max_size
+        for file_path, size, _ in sorted(self._files(), key=lambda f: f[2]):
+            if self._size <= self.max_size * 0.9:
+                break
+            try:
+                os.remove(file_path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def urls(self):
+        '''
+        Iterating over cached pages
+        Yields tuples (url, path to the file)
+        '''
+        for file_path, _, _ in self._files():
+            try:
+                with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                    yield f.readline().rstrip("\n"), file_path
+            except (OSError, EOFError):
+                continue
+
+    def clear(self):
+        '''
+        Removing all cached pages
+        '''
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._size = 0
+
+# the cache used by '_load_page'; None to load every page from the website
+PAGE_CACHE = None
+
+def configure_page_cache(path=PAGE_CACHE_PATH, ttl_days=30, max_size_mb=1024, enabled=True):
+    '''
+    Keeping raw html of pages loaded by the current process in an on-disk cache (see 'PageCache' for the parameters)
+    For example, configure_page_cache(ttl_days=90, max_size_mb=20000) before 'get_cases', so that cases can be parsed again without loading them
+    enabled: bool, False to stop caching, default True;
+    Returns the new PageCache (None if disabled)
+    '''
+
+    global PAGE_CACHE
+
+    PAGE_CACHE = PageCache(path, ttl_days, max_size_mb) if enabled == True else None
+
+    return PAGE_CACHE
+
+def _load_page(browser, url:str, by:str, element:str, sec=6, from_cache=True, to_cache=True) -> tuple:
+    '''
+    Loading a page with a browser or with a requests session (HTTP engine); requests are limited by 'RATE_LIMITER'
+    browser: selenium.webdriver.chrome.webdriver.WebDriver (the output of '_set_browser') or requests.Session (the output of '_set_session');
+    url: str, page address;
+    by: str, "ID" or "CLASS_NAME";
+    element: str, ID or CLASS_NAME of an element to wait for (browser) or to look for in the page source (HTTP);
+    sec: int, max waiting time in sec for the browser; the HTTP engine uses HTTP_TIMEOUT;
+    from_cache: bool, taking the page from 'PAGE_CACHE' if it is there; False if the caller uses the page opened in the browser, not only its html; default True;
+    to_cache: bool, keeping the page in 'PAGE_CACHE'; False for pages that are valid once (captcha); default True;
+    Raises WebDriverException or requests.RequestException if a page cannot be loaded (see _FETCH_ERRORS)
+    Returns a tuple (page_source, element_found), for example ('<html>...</html>', True)
+    '''
+
+    cache = PAGE_CACHE
+
+    if cache != None and from_cache == True:
+        page_source = cache.get(url)
+        if page_source != None:
+            return page_source, True
+
+    RATE_LIMITER.acquire(url)
+
+    try:
+        if isinstance(browser, requests.Session):
+            r = browser.get(url, timeout=HTTP_TIMEOUT)
+            # overloaded servers
+            if r.status_code in (429, 502, 503, 504):
+                RATE_LIMITER.report_error(url)
+            page_source = _decode_page(r)
+            element_found = _element_in_source(page_source, by, element)
+        else:
+            browser.get(url)
+            element_found = _explicit_wait(browser, by, element, sec)
+            page_source = browser.page_source
+            # used by 'BrowserPool' to restart drivers after N pages
+            browser.n_pages_loaded = getattr(browser, "n_pages_loaded", 0) + 1
+
+    except _FETCH_ERRORS:
+        RATE_LIMITER.report_error(url)
+        raise
+
+    if element_found == True:
+        RATE_LIMITER.report_success(url)
+        if cache != None and to_cache == True:
+            cache.put(url, page_source)
+
+    return page_source, element_found
+
+def _is_alive(browser) -> bool:
+    '''
+    Checking if a Chrome driver session still responds
+    Returns True if the driver can be used, False otherwise
+    '''
+    try:
+        browser.current_url
+        return True
+    except WebDriverException:
+        return False
+
+def _quit_browser(browser):
+    '''
+    Quitting a Chrome driver, ignoring errors of already crashed sessions
+    '''
+    try:
+        browser.quit()
+    except WebDriverException:
+        pass
+
+class BrowserPool:
+    '''
+    A pool of Chrome drivers, which are kept running between websites instead of starting Chrome for every website;
+    Shared by the parsing functions of 'sudrfparser' and 'bsr_parser' (pass it as 'browser_pool'), can be used from several threads;
+    path_to_driver: str, path to Chrome driver;
+    max_pages: int, N of loaded pages after which a driver is restarted, default 500;
+    max_memory_mb: int, memory (MB) used by a driver and its Chrome processes after which the driver is restarted, default 1500; checked only if 'psutil' is installed;
+    max_idle: int, max N of running drivers waiting in the pool, default 2 (one driver per images/JavaScript profile);
+    Usage:
+        pool = BrowserPool(path_to_driver)
+        browser = pool.acquire(imagesOff=True, javaScriptOff=True)
+        try:
+            ...
+        finally:
+            pool.release(browser)
+        pool.close()
+    '''
+
+    def __init__(self, path_to_driver:str, max_pages=500, max_memory_mb=1500, max_idle=2):
+        self.path_to_driver = path_to_driver
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.max_idle = max_idle
+        # (imagesOff, javaScriptOff): drivers waiting to be acquired
+        self._idle = {}
+        # id(driver): (imagesOff, javaScriptOff) for all running drivers
+        self._profiles = {}
+        self._drivers = {}
+        # id(crashed driver): its replacement, so that stale references can be released
+        self._replacements = {}
+        self._lock = threading.Lock()
+
+    def _start(self, profile:tuple):
+        browser = _set_browser(self.path_to_driver, imagesOff=profile[0], javaScriptOff=profile[1])
+        with self._lock:
+            self._profiles[id(browser)] = profile
+            self._drivers[id(browser)] = browser
+        return browser
+
+    def _discard(self, browser):
+        with self._lock:
+            self._profiles.pop(id(browser), None)
+            self._drivers.pop(id(browser), None)
+        _quit_browser(browser)
+
+    def _memory_mb(self, browser) -> float:
+        if psutil == None:
+            return 0
+        try:
+            process = psutil.Process(browser.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / 1024 / 1024
+        except (psutil.Error, AttributeError):
+            return 0
+
+    def _needs_recycling(self, browser) -> bool:
+        if getattr(browser, "n_pages_loaded", 0) >= self.max_pages:
+            return True
+        return self._memory_mb(browser) >= self.max_memory_mb
+
+    def acquire(self, imagesOff=False, javaScriptOff=False):
+        '''
+        Getting a running driver with the indicated images/JavaScript profile (see '_set_browser'); starts a new one if there are no idle drivers
+        Returns selenium.webdriver.chrome.webdriver.WebDriver
+        '''
+        profile = (imagesOff, javaScriptOff)
+        to_quit = []
+
+        with self._lock:
+            idle = self._idle.get(profile, [])
+            browser = idle.pop() if len(idle) > 0 else None
+
+            # freeing a place for a driver with another profile
+            if browser == None:
+                n_idle = sum(len(drivers) for drivers in self._idle.values())
+                for drivers in self._idle.values():
+                    while len(drivers) > 0 and n_idle >= self.max_idle:
+                        to_quit.append(drivers.pop(0))
+                        n_idle -= 1
+
+        for idle_browser in to_quit:
+            self._discard(idle_browser)
+
+        # the driver crashed while waiting in the pool
+        if browser != None and _is_alive(browser) == False:
+            self._discard(browser)
+            browser = None
+
+        if browser == None:
+            browser = self._start(profile)
+
+        return browser
+
+    def release(self, browser):
+        '''
+        Returning a driver to the pool; crashed drivers and drivers that reached 'max_pages' or 'max_memory_mb' are quit
+        '''
+        with self._lock:
+            while id(browser) in self._replacements:
+                browser = self._replacements.pop(id(browser))
+            profile = self._profiles.get(id(browser))
+
+        if profile == None:
+            _quit_browser(browser)
+            return
+
+        if _is_alive(browser) == False or self._needs_recycling(browser):
+            self._discard(browser)
+            return
+
+        # closing tabs left open, keeping one
+        if len(browser.window_handles) > 1:
+            for handle in browser.window_handles[1:]:
+                browser.switch_to.window(handle)
+                browser.close()
+            browser.switch_to.window(browser.window_handles[0])
+
+        with self._lock:
+            self._idle.setdefault(profile, []).append(browser)
+            n_idle = sum(len(drivers) for drivers in self._idle.values())
+            to_quit = None
+            # quitting the longest waiting driver, drivers of other profiles first
+            if n_idle > self.max_idle:
+                for idle_profile, drivers in sorted(self._idle.items(), key=lambda item: item[0] == profile):
+                    if len(drivers) > 0:
+                        to_quit = drivers.pop(0)
+                        break
+
+        if to_quit != None:
+            self._discard(to_quit)
+
+    def revive(self, browser):
+        '''
+        Replacing a crashed driver with a new one with the same profile; used after WebDriverException
+        Returns the same driver if it still responds, a new driver otherwise
+        '''
+        if _is_alive(browser):
+            return browser
+
+        with self._lock:
+            profile = self._profiles.get(id(browser), (False, False))
+
+        self._discard(browser)
+        new_browser = self._start(profile)
+
+        with self._lock:
+            self._replacements[id(browser)] = new_browser
+
+        return new_browser
+
+    def close(self):
+        '''
+        Quitting all drivers started by the pool
+        '''
+        with self._lock:
+            browsers = list(self._drivers.values())
+            self._drivers = {}
+            self._profiles = {}
+            self._idle = {}
+            self._replacements = {}
+
+        for browser in browsers:
+            _quit_browser(browser)
+
+### Courts info ###
+
+def _normalise_court_name(court_name:str) -> str:
+    '''
+    Normalising a court name for matching: lower case, 'ё' as 'е', no punctuation and extra spaces
+    For example, 'Алейский  городской суд (Алтайский край)' -> 'алейский городской суд алтайский край'
+    '''
+
+    court_name = court_name.lower().replace('ё','е')
+    court_name = re.sub('[^\\w\\s]', ' ', court_name)
+
+    return ' '.join(court_name.split())
+
+def _normalise_website(website:str) -> str:
+    '''
+    Normalising a website address for matching: lower case, no scheme, 'www.' and trailing slash
+    '''
+
+    website = website.strip().lower().rstrip('/')
+    website = re.sub('^https?://', '', website)
+
+    return re.sub('^www\\.', '', website)
+
+class CourtRegistry:
+    '''
+    Courts info from the bundled files 'courts_info/sudrf_websites.json' and 'courts_info/rf_region_codes.json' with lookups by court id, website, region and name;
+    Use 'get_court_registry' to get the registry loaded once per process;
+    courts_info_dir: str, path to the directory with the courts info files, default COURTS_INFO_DIR;
+    Courts are dicts as in 'sudrf_websites.json' with the additional key 'region_code':
+    {"court_id": "22RS0001", "court_name": "Алейский городской суд (Алтайский край)", "court_website": "http://aleysky.alt.sudrf.ru", "srv": ["1"], "region_code": "22"}
+    '''
+
+    def __init__(self, courts_info_dir=COURTS_INFO_DIR):
+
+        with open(join(courts_info_dir, "sudrf_websites.json"), 'r') as jf:
+            self.courts_info = json.load(jf)
+
+        with open(join(courts_info_dir, "rf_region_codes.json"), 'r') as jf:
+            self.region_names = json.load(jf)
+
+        self._by_court_id = {}
+        self._by_website = {}
+        self._by_region = {}
+        self._by_name = {}
+        # names without the region in brackets, one name can belong to courts of several regions
+        self._by_short_name = {}
+
+        for region_code, courts in self.courts_info.items():
+            for court_info in courts:
+                court = dict(court_info, region_code=region_code)
+
+                self._by_court_id[court["court_id"]] = court
+                self._by_website[_normalise_website(court["court_website"])] = court
+                self._by_region.setdefault(region_code, []).append(court)
+                self._by_name.setdefault(_normalise_court_name(court["court_name"]), court)
+
+                short_name = _normalise_court_name(re.sub('\\([^()]*\\)\\s*$', '', court["court_name"]))
+                self._by_short_name.setdefault(short_name, []).append(court)
+
+    def by_court_id(self, court_id:str):
+        '''
+        Returns a court dict or None
+        '''
+        return self._by_court_id.get(court_id)
+
+    def by_website(self, website:str):
+        '''
+        Returns a court dict or None; the website address can be with or without 'http://' and a trailing slash
+        '''
+        return self._by_website.get(_normalise_website(website))
+
+    def by_region(self, region_code:str) -> list:
+        '''
+        Returns a list of court dicts of one region ([] for unknown codes)
+        '''
+        return self._by_region.get(region_code, [])
+
+    def find_all_by_name(self, court_name:str, region_code=None) -> list:
+        '''
+        Finding courts by their name as used on sudrf.ru and bsr.sudrf.ru, with or without the region in brackets;
+        Tolerates double spaces, punctuation, letter case and 'ё';
+        region_code: str, only courts of this region, default None;
+        Returns a list of court dicts, several if the name without the region belongs to courts of several regions ([] if none)
+        '''
+        name = _normalise_court_name(court_name)
+
+        if name in self._by_name:
+            candidates = [self._by_name[name]]
+        else:
+            candidates = self._by_short_name.get(name, [])
+
+        if region_code != None:
+            candidates = [court for court in candidates if court["region_code"] == region_code]
+
+        return candidates
+
+    def find_by_name(self, court_name:str, region_code=None):
+        '''
+        Finding one court by its name (see 'find_all_by_name');
+        Raises ValueError if the name belongs to courts of several regions (pass 'region_code' or the name with the region in brackets)
+        Returns a court dict or None
+        '''
+        candidates = self.find_all_by_name(court_name, region_code)
+
+        if len(candidates) > 1:
+            raise ValueError(f"{court_name} is the name of {len(candidates)} courts: {', '.join(court['court_website'] for court in candidates)}")
+
+        return candidates[0] if len(candidates) == 1 else None
+
+@functools.lru_cache(maxsize=None)
+def get_court_registry() -> CourtRegistry:
+    '''
+    Getting the registry of courts from the bundled courts info; the files are read once per process
+    Returns CourtRegistry
+    '''
+
+    return CourtRegistry()
+
 def get_courts_list(path_to_driver:str) -> dict:
     '''
     Getting all courts websites from 'https://sudrf.ru/index.php?id=300'
-    Using the static file with region codes "rf_region_codes.json" on Dataout GitHub
+    Using the bundled file with region codes "courts_info/rf_region_codes.json"
     path_to_driver: str, path to Chrome driver
     Returns dict {"region_code": [
                     {"court_id": "",
@@ -91,9 +784,7 @@ def get_courts_list(path_to_driver:str) -> dict:
     '''
 
     # reading region codes
-    region_codes_url = "https://raw.githubusercontent.com/dataout-org/sudrfparser/main/courts_info/rf_region_codes.json"
-    r = requests.get(region_codes_url)
-    region_codes = r.json()
+    region_codes = get_court_registry().region_names
         
     browser = _set_browser(path_to_driver)
 
@@ -105,12 +796,10 @@ def get_courts_list(path_to_driver:str) -> dict:
     for code in region_codes.keys():
         #updating url
         url = f'{bsr_courts}&court_subj={code}'
-        #opening a page
-        browser.get(url)
-        #wait for search results to load
-        el = _explicit_wait(browser,"CLASS_NAME","search-results",6)
+        #opening a page and waiting for search results to load
+        page_source, el = _load_page(browser,url,"CLASS_NAME","search-results")
         #converting a page to soup
-        soup = BeautifulSoup(browser.page_source, 'html.parser')
+        soup = BeautifulSoup(page_source, 'html.parser')
 
         list_of_courts = []
 
@@ -180,6 +869,408 @@ def _check_form_and_captcha(soup) -> dict:
 
     return dict_per_site
 
+### Websites' profiles ###
+
+def _read_site_profiles(site_profiles_path:str) -> dict:
+    '''
+    Reading saved websites' profiles (see '_probe_site_profile')
+    site_profiles_path: str, path to the json file with profiles;
+    Returns a dict {website: profile}; {} if there are no saved profiles
+    '''
+
+    if site_profiles_path == "" or os.path.isfile(site_profiles_path) == False:
+        return {}
+
+    try:
+        with open(site_profiles_path, 'r') as jf:
+            return json.load(jf)
+    except ValueError:
+        return {}
+
+def _save_site_profile(website:str, profile:dict, site_profiles_path:str):
+    '''
+    Saving a website's profile; the file is replaced at once, so that it is never left half-written
+    Threads and processes (for example, the workers of 'crawl_courts_parallel') save profiles one at a time, so that no profile is lost
+    site_profiles_path: str, path to the json file with profiles; '' to keep profiles only for the current call
+    '''
+
+    if site_profiles_path == "":
+        return
+
+    if os.path.dirname(site_profiles_path) != "":
+        os.makedirs(os.path.dirname(site_profiles_path), exist_ok=True)
+
+    with _FILE_LOCK, open(f"{site_profiles_path}.lock", 'a') as lock_file:
+        if fcntl != None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        profiles = _read_site_profiles(site_profiles_path)
+        profiles[website] = profile
+
+        tmp_path = f"{site_profiles_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as jf:
+            json.dump(profiles, jf, ensure_ascii=False)
+        os.replace(tmp_path, site_profiles_path)
+
+        # the lock is also released when the file is closed
+        if fcntl != None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _cached_site_profile(website:str, site_profiles_path=SITE_PROFILES_PATH, ttl_days=30):
+    '''
+    Getting a saved website's profile if it was checked less than 'ttl_days' ago
+    Returns a profile dict or None if the website has to be checked again
+    '''
+
+    profile = _read_site_profiles(site_profiles_path).get(website)
+
+    if profile == None or "form_type" not in profile:
+        return None
+
+    if time.time() - profile.get("checked_at", 0) > ttl_days * 24 * 3600:
+        return None
+
+    return profile
+
+def _needs_browser(profile:dict, ttl_days=30) -> bool:
+    '''
+    Checking if a form2 website was found to render search results with JavaScript less than 'ttl_days' ago
+    '''
+
+    return profile.get("needs_browser") == True and time.time() - profile.get("needs_browser_at", 0) <= ttl_days * 24 * 3600
+
+def _probe_site_profile(browser, website:str, srv="1", site_profiles_path=SITE_PROFILES_PATH) -> tuple:
+    '''
+    Checking the search form of a website (form type and captcha) and saving it as the website's profile;
+    browser: WebDriver or requests.Session;
+    srv: str, server of the search form page, default "1";
+    site_profiles_path: str, path to the json file with profiles, default SITE_PROFILES_PATH;
+    A profile: {"form_type": "form1", "captcha": "False", "needs_browser": False, "needs_browser_at": 0, "srv_with_cases": ["1"], "checked_at": 1700000000}
+    ("needs_browser": a form2 website cannot be parsed with the HTTP engine, found at "needs_browser_at", reset when the website is checked again; "srv_with_cases": servers that had cases in the last crawl)
+    Raises WebDriverException or requests.RequestException if the page cannot be loaded
+    Returns a tuple (profile, soup of the search form page); (None, None) if the search form is not loaded
+    '''
+
+    link_to_site = website + f"/modules.php?name=sud_delo&srv_num={srv}&name_op=sf&delo_id=1540005"
+
+    # not cached: the page has the current captcha, and the profile is checked on the live website
+    page_source, content_found = _load_page(browser,link_to_site,"ID","modSdpContent",from_cache=False,to_cache=False)
+
+    if content_found == False:
+        return None, None
+
+    soup = BeautifulSoup(page_source, 'html.parser')
+    form_and_captcha = _check_form_and_captcha(soup)
+
+    # keeping what is known from the previous crawls
+    profile = _read_site_profiles(site_profiles_path).get(website, {})
+    profile["form_type"] = form_and_captcha["form_type"]
+    profile["captcha"] = form_and_captcha.get("captcha", "False")
+    profile["checked_at"] = int(time.time())
+    # the HTTP engine is tried again, the website could have changed
+    profile["needs_browser"] = False
+    profile["needs_browser_at"] = 0
+    profile.setdefault("srv_with_cases", [])
+
+    _save_site_profile(website, profile, site_profiles_path)
+
+    return profile, soup
+
+
+### Page parser backends ###
+
+# backend of '_parse_html': 'bs4' (BeautifulSoup with html.parser), 'lxml' or 'selectolax'
+PARSER_BACKEND = "bs4"
+
+# whitespace-only strings are collapsed by BeautifulSoup everywhere except these tags
+_WHITESPACE_PRESERVING_TAGS = {"pre", "textarea"}
+# the text of these tags is not a part of the '.text' of BeautifulSoup tags
+_TEXTLESS_TAGS = {"script", "style", "template"}
+
+def _collapse_whitespace(string:str, preserve:bool) -> str:
+    '''
+    Collapsing a whitespace-only string as BeautifulSoup does: to '\\n' if it has a line break, otherwise to ' '
+    '''
+
+    if preserve or string.strip(" \n\t\x0c\r") != "":
+        return string
+
+    return "\n" if "\n" in string else " "
+
+def _class_matches(value, expected:str) -> bool:
+    '''
+    Checking a 'class' attribute as BeautifulSoup does: by one of the classes or by the whole attribute value
+    '''
+
+    return value != None and (value == expected or expected in value.split())
+
+class _ParsedNode(ABC):
+    '''
+    A minimal BeautifulSoup-like view of an element parsed with 'lxml' or 'selectolax'
+    Supports what the page parsers use: 'find', 'find_all', 'text', 'attrs' and getting attributes by key, for example node["href"]
+    Results are identical to BeautifulSoup with html.parser for well-formed pages
+    '''
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    # implemented by the backends: descendant elements with a tag name, an attribute of an element, all attributes of this element
+    @abstractmethod
+    def _descendants(self, name:str):
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def _get_from(node, key:str):
+        pass
+
+    @abstractmethod
+    def _attributes(self) -> dict:
+        pass
+
+    def _matches(self, node, attrs:dict) -> bool:
+        for key, expected in attrs.items():
+            value = self._get_from(node, key)
+            if key == "class":
+                if _class_matches(value, expected) == False:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def find_all(self, name:str, attrs={}, class_=None, id=None) -> list:
+        attrs = dict(attrs)
+        if class_ != None:
+            attrs["class"] = class_
+        if id != None:
+            attrs["id"] = id
+
+        return [type(self)(node) for node in self._descendants(name) if self._matches(node, attrs)]
+
+    def find(self, name:str, attrs={}, class_=None, id=None):
+        attrs = dict(attrs)
+        if class_ != None:
+            attrs["class"] = class_
+        if id != None:
+            attrs["id"] = id
+
+        for node in self._descendants(name):
+            if self._matches(node, attrs):
+                return type(self)(node)
+
+        return None
+
+    @property
+    def attrs(self) -> dict:
+        attrs = self._attributes()
+        if "class" in attrs:
+            attrs["class"] = attrs["class"].split()
+        return attrs
+
+    def __getitem__(self, key:str):
+        return self.attrs[key]
+
+    def get(self, key:str, default=None):
+        return self.attrs.get(key, default)
+
+class _LxmlNode(_ParsedNode):
+    '''
+    '_ParsedNode' over an lxml element
+    '''
+
+    __slots__ = ()
+
+    def _descendants(self, name:str):
+        return self.node.iterdescendants(name)
+
+    @staticmethod
+    def _get_from(node, key:str):
+        return node.get(key)
+
+    def _attributes(self) -> dict:
+        return dict(self.node.attrib)
+
+    @property
+    def text(self) -> str:
+        parts = []
+        # (element or tail string, preserve whitespace)
+        stack = [(self.node, self.node.tag in _WHITESPACE_PRESERVING_TAGS)]
+
+        while stack:
+            item, preserve = stack.pop()
+            # tails are pushed as str to keep the document order
+            if isinstance(item, str):
+                parts.append(_collapse_whitespace(item, preserve))
+                continue
+            # comments and processing instructions have no str tag
+            if isinstance(item.tag, str) and item.tag not in _TEXTLESS_TAGS:
+                if item.text:
+                    parts.append(_collapse_whitespace(item.text, preserve))
+                for child in reversed(item):
+                    if child.tail:
+                        stack.append((child.tail, preserve))
+                    stack.append((child, preserve or child.tag in _WHITESPACE_PRESERVING_TAGS))
+
+        return "".join(parts)
+
+class _LexborNode(_ParsedNode):
+    '''
+    '_ParsedNode' over a selectolax (lexbor) node
+    '''
+
+    __slots__ = ()
+
+    def _descendants(self, name:str):
+        # 'css' also matches the node itself
+        return (node for node in self.node.css(name) if node.mem_id != self.node.mem_id)
+
+    @staticmethod
+    def _get_from(node, key:str):
+        return node.attributes.get(key)
+
+    def _attributes(self) -> dict:
+        return dict(self.node.attributes)
+
+    @property
+    def text(self) -> str:
+        parts = []
+        stack = [(self.node, self.node.tag in _WHITESPACE_PRESERVING_TAGS)]
+
+        while stack:
+            node, preserve = stack.pop()
+            if node.tag == "-text":
+                parts.append(_collapse_whitespace(node.text_content, preserve))
+            elif node.tag not in _TEXTLESS_TAGS and node.tag != "-comment":
+                children = list(node.iter(include_text=True))
+                for child in reversed(children):
+                    stack.append((child, preserve or child.tag in _WHITESPACE_PRESERVING_TAGS))
+
+        return "".join(parts)
+
+def _parse_html_bs4(page_source:str):
+    return BeautifulSoup(page_source, 'html.parser')
+
+def _parse_html_lxml(page_source:str):
+    return _LxmlNode(lxml.html.document_fromstring(page_source))
+
+def _parse_html_selectolax(page_source:str):
+    return _LexborNode(LexborHTMLParser(page_source).root)
+
+_PARSERS = {"bs4": _parse_html_bs4,
+            "lxml": _parse_html_lxml,
+            "selectolax": _parse_html_selectolax}
+
+def set_parser_backend(backend:str):
+    '''
+    Choosing how search results and case pages are parsed in the current process
+    backend: str, 'bs4' (BeautifulSoup with html.parser, default), 'lxml' or 'selectolax'; the last two need the packages installed and are several times faster
+    Raises ValueError for an unknown backend, ImportError if the backend's package is not installed
+    '''
+
+    global PARSER_BACKEND
+
+    if backend not in _PARSERS:
+        raise ValueError(f"Unknown parser backend '{backend}', use one of {list(_PARSERS)}")
+    if backend == "lxml" and lxml == None:
+        raise ImportError("The 'lxml' parser backend requires the lxml package")
+    if backend == "selectolax" and LexborHTMLParser == None:
+        raise ImportError("The 'selectolax' parser backend requires the selectolax package")
+
+    PARSER_BACKEND = backend
+
+# comments, scripts and styles, whose content is not html (unclosed ones last until the end of the page)
+_SKIPPED_HTML = r'(?P<skip><!--.*?(?:-->|\Z)|<(?P<raw_tag>script|style)\b[^>]*>.*?(?:</(?P=raw_tag)\s*>|\Z))'
+
+@functools.lru_cache(maxsize=None)
+def _tag_patterns(tag:str) -> tuple:
+    '''
+    Compiled patterns of the opening tags and of the opening and closing tags of one tag name;
+    both also match comments, scripts and styles as a whole (the 'skip' group), so that tags inside them are not taken
+    '''
+
+    return (re.compile(rf'{_SKIPPED_HTML}|<{tag}\b[^>]*>', re.IGNORECASE | re.DOTALL),
+            re.compile(rf'{_SKIPPED_HTML}|<(?P<closing>/?){tag}\b[^>]*>', re.IGNORECASE | re.DOTALL))
+
+_ATTRIBUTE_PATTERN = re.compile(r'''([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''')
+
+def _find_region(page_source:str, tag:str, attr:str, value:str):
+    '''
+    Finding the first element <tag attr="value"> in the raw html; 'class' is matched by one of the classes as in BeautifulSoup;
+    tags inside comments, scripts and styles are not counted
+    Returns a tuple (start, end) of the element's position in 'page_source' or None if it is not found
+    '''
+
+    opening_pattern, tags_pattern = _tag_patterns(tag)
+
+    for opening_tag in opening_pattern.finditer(page_source):
+        # a cheap check before parsing the attributes
+        if opening_tag.group("skip") != None or value not in opening_tag.group(0):
+            continue
+
+        attributes = {m.group(1).lower(): next(v for v in m.group(2,3,4) if v != None) for m in _ATTRIBUTE_PATTERN.finditer(opening_tag.group(0))}
+        found_value = attributes.get(attr)
+        if found_value == None or (found_value != value if attr != "class" else _class_matches(found_value, value) == False):
+            continue
+
+        # looking for the matching closing tag
+        depth = 1
+        for m in tags_pattern.finditer(page_source, opening_tag.end()):
+            if m.group("skip") != None:
+                continue
+            depth += -1 if m.group("closing") == "/" else 1
+            if depth == 0:
+                return opening_tag.start(), m.end()
+
+        # the element is not closed
+        return opening_tag.start(), len(page_source)
+
+    return None
+
+def _slice_regions(page_source:str, regions:list):
+    '''
+    Cutting the elements the page parsers need out of the raw html, so that only they are parsed
+    regions: list of tuples (tag, attribute, value), for example [("div", "class", "contentt")];
+    Returns str, the elements in the document order inside <html><body>; None if any of them is not found
+    '''
+
+    spans = []
+    for tag, attr, value in regions:
+        span = _find_region(page_source, tag, attr, value)
+        if span == None:
+            return None
+        spans.append(span)
+
+    # nested regions are taken once as a part of the outer region
+    slices = []
+    last_end = -1
+    for start, end in sorted(spans):
+        if start >= last_end:
+            slices.append(page_source[start:end])
+            last_end = end
+        elif end > last_end:
+            # overlapping, only in broken html
+            slices[-1] += page_source[last_end:end]
+            last_end = end
+
+    return "<html><body>" + "".join(slices) + "</body></html>"
+
+def _parse_html(page_source:str, regions=None, backend=None):
+    '''
+    Parsing a page with the backend set by 'set_parser_backend'
+    regions: list of tuples (tag, attribute, value), elements the page parsers need, for example _FORMS["form1"]["case_regions"];
+    only these elements are parsed, which is several times faster on large pages; the whole page is parsed if any of them is not found, default None (the whole page)
+    backend: str, overrides the set backend (for worker processes, which do not share the setting), default None
+    Returns a BeautifulSoup object or a BeautifulSoup-like '_ParsedNode', both can be passed to the page parsers ('_get_one_case_text_f1', etc.)
+    '''
+
+    if regions != None:
+        page_source = _slice_regions(page_source, regions) or page_source
+
+    return _PARSERS[backend or PARSER_BACKEND](page_source)
+
+
 ### Form1 functionality ###
 
 def _num_cases_pages_f1(soup) -> tuple:
@@ -315,7 +1406,7 @@ def _get_autocaptcha(apikey:str,base64Image:str) -> str:
 def _get_captcha_f1(browser,website:str,autocaptcha="") -> str:
     '''
     Getting captcha code of form1 and displaying it; requires user's input;
-    browser: selenium.webdriver.chrome.webdriver.WebDriver (the output of '_set_browser');
+    browser: selenium.webdriver.chrome.webdriver.WebDriver (the output of '_set_browser') or requests.Session (the output of '_set_session');
     website: str, website address;
     autocaptcha: str, API key from https://ocr.space/OCRAPI to guess captcha automatically, default '';
     Returns str, an addition to the link with captcha code;
@@ -326,14 +1417,13 @@ def _get_captcha_f1(browser,website:str,autocaptcha="") -> str:
 
     while tries <= 3:
 
-        browser.get(page_with_code)
         # checking if the search form is present
-        check_content = _explicit_wait(browser,"ID","content",6)
+        page_source, check_content = _load_page(browser,page_with_code,"ID","content",from_cache=False,to_cache=False)
 
         # form is present, getting captcha code
         if check_content == True:
 
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+            soup = BeautifulSoup(page_source, 'html.parser')
             # finding the first table in the form
             content = soup.find("div", {"id": "content"}).find("table")
             # getting captcha ID
@@ -376,7 +1466,7 @@ def _get_captcha_f1(browser,website:str,autocaptcha="") -> str:
             
     return captcha_addition
 
-def _get_cases_texts_f1(website:str, region:str, start_date:str, end_date:str, path_to_driver:str, srv_num=['1'], path_to_save='', captcha=False, autocaptcha="") -> dict:
+def _get_cases_texts_f1(website:str, region:str, start_date:str, end_date:str, path_to_driver:str, srv_num=['1'], path_to_save='', captcha=False, autocaptcha="", engine="browser", browser_pool=None, output_format="json", checkpoint=True, incremental=False, page_workers=1, parse_workers=0, sink=None) -> dict:
     '''
     Getting all court cases on one website in the indicated date range
     website: str, website address;
@@ -390,217 +1480,54 @@ def _get_cases_texts_f1(website:str, region:str, start_date:str, end_date:str, p
     path_to_save: str, path where to save the results, default '' (the same directory of the script execution);
     captcha: bool, if a website has captcha protection, default False; automatically checks if captcha is present, and if it's present: (1) a user will be asked to solve it or (2) if a user has API key from https://ocr.space/OCRAPI to guess captcha automatically, the captcha will be autorecognised;
     autocaptcha: str, API key from https://ocr.space/OCRAPI to guess captcha automatically, default ''; 
+    engine: str, "browser" to load pages with Chrome or "http" to load them with a kept-alive requests session (form1 pages are static, so no browser is needed), default "browser";
+    browser_pool: BrowserPool, drivers to reuse for the "browser" engine, default None (a driver is started for the website and quit afterwards);
+    output_format: str, "json" or "jsonl", see 'get_cases'; default "json";
+    checkpoint: bool, resuming an interrupted crawl, see 'get_cases'; default True;
+    incremental: bool, loading only new cases, see 'get_cases'; default False;
+    page_workers: int, N of pages loaded at the same time with the "http" engine, see 'get_cases'; default 1;
+    parse_workers: int, N of processes parsing case pages, see 'get_cases'; default 0;
+    sink: SqliteSink, a database to add cases to, see 'get_cases'; default None;
     Saves json files with all parsed cases per website's server (for example, if there are 2 servers on one website, there will be 2 json files); Logs errors and pages that were not parsed;
     Returns a dict with info about N cases found per server
     '''
 
-    # turn off JavaScript and images for form1
-    browser = _set_browser(path_to_driver,imagesOff=True,javaScriptOff=True)
-
-    year = start_date.split('.')[-1]
-    return_dict = {website:{"year":year,"n_cases_by_server":{}}}
+    if engine == "http":
+        browser = _set_session(max(10, page_workers))
 
-    # Iterating over servers
-    for server in srv_num:
+        return_dict = _get_cases_texts("form1", browser, website, region, "", start_date, end_date, srv_num, path_to_save, captcha, autocaptcha, engine, output_format=output_format, checkpoint=checkpoint, incremental=incremental, page_workers=page_workers, parse_workers=parse_workers, sink=sink)
 
-        results_per_site = {}
-        results_per_site[website] = {}
-        num_cases = 0
-        list_of_cases = []
-        logs = {}
+        browser.close()
 
-        module_form1 = f'/modules.php?name=sud_delo&srv_num={server}&name_op=r&delo_id=1540006&case_type=0&new=0&u1_case__ENTRY_DATE1D={start_date}&u1_case__ENTRY_DATE2D={end_date}&delo_table=u1_case&U1_PARTS__PARTS_TYPE='
+    else:
+        pool = browser_pool if browser_pool != None else BrowserPool(path_to_driver)
+        # turn off JavaScript and images for form1
+        browser = pool.acquire(imagesOff=True,javaScriptOff=True)
 
-        link_to_site = website + module_form1
+        try:
+            return_dict = _get_cases_texts("form1", browser, website, region, "", start_date, end_date, srv_num, path_to_save, captcha, autocaptcha, engine, pool, output_format, checkpoint, incremental, page_workers, parse_workers, sink)
+        finally:
+            pool.release(browser)
+            if browser_pool == None:
+                pool.close()
 
-        # checking captcha
-        if captcha == True:
-            captcha_addition = _get_captcha_f1(browser,website,autocaptcha)
-            link_to_site += captcha_addition
+    return return_dict
 
-        # try to load the website content 3 times
-        tries = 0
 
-        while tries <= 3:
-            try:
-                browser.get(link_to_site)
-                # explicitly waiting for the results table
-                el_found = _explicit_wait(browser,"ID","tablcont",6)
+### Form2 functionality ###
 
-                # if there is a table with results
-                if el_found == True:
-
-                    soup = BeautifulSoup(browser.page_source, 'html.parser')
-
-                    stats = _num_cases_pages_f1(soup)
-                    num_cases = stats[0]
-                    num_pages = stats[1]
-
-                    logs["cases_found"] = "True"
-                    logs["driver_error"] = "False"
-                    logs["pagination_error"] = []
-                    results_per_site[website]["num_cases"] = num_cases
-
-                    # getting cases on the first page
-                    # this will be all the cases for 1 page results
-                    # first, getting all the cases ids on the page
-                    cases_ids_on_page = _get_cases_ids_per_page_f1(soup)
-
-                    # iterating over cases and colecting texts
-                    for case_id in cases_ids_on_page:
-
-                        case_page = f"{website}/modules.php?name=sud_delo&srv_num={server}&name_op=case&{case_id}&delo_id=1540006"
-
-                        # trying to retrieve case content
-                        tries_case = 0
-                        while tries_case <= 3:
-
-                            browser.get(case_page)
-                            tabs_content = _explicit_wait(browser,"CLASS_NAME","contentt",6)
-                            soup_case = BeautifulSoup(browser.page_source, 'html.parser')
-                            content = soup_case.find('div', {'class': 'contentt'})
-
-                            if content == None:
-
-                                results_per_case = {"case_text": "", "case_found": "False"}
-                                # failed, try again
-                                tries_case += 1
-                                continue
-
-                            else:
-                                # getting case data
-                                results_per_case = _get_one_case_text_f1(soup_case)
-                                # success
-                                break
-
-                        results_per_case["case_id_uid"] = case_id
-                        list_of_cases.append(results_per_case)
-
-                    if num_pages > 1:
-
-                        for i in range(2,num_pages+1):
-                            page_addition = f'&page={i}'
-                            link_with_page = link_to_site + page_addition
-
-                            # adding Exception in case of the driver error
-                            try:
-                                browser.get(link_with_page)
-                                soup = BeautifulSoup(browser.page_source, 'html.parser')
-
-                                # checking if session is expired when captcha is True
-                                if captcha == True and soup.find("div", {"id": "error"}):
-                                    # getting new captcha
-                                    captcha_addition = _get_captcha_f1(browser,website,autocaptcha)
-                                    link_to_site = website + module_form1 + captcha_addition
-                                    link_with_page = link_to_site + page_addition
-                                    browser.get(link_with_page)
-                                    soup = BeautifulSoup(browser.page_source, 'html.parser')
-
-                                # if there's no table content found
-                                if soup.find("table", {"id": "tablcont"}) == None:
-                                    logs['pagination_error'].append(i)
-
-                                # if everything's ok
-                                if soup.find("table", {"id": "tablcont"}):
-
-                                    cases_ids_on_page = _get_cases_ids_per_page_f1(soup)
-
-                                    for case_id in cases_ids_on_page:
-                                        case_page = f"{website}/modules.php?name=sud_delo&srv_num={server}&name_op=case&{case_id}&delo_id=1540006"
-
-                                        # trying to retrieve case content
-                                        tries_case = 0
-                                        while tries_case <= 3:
-
-                                            browser.get(case_page)
-                                            tabs_content = _explicit_wait(browser,"CLASS_NAME","contentt",6)
-                                            soup_case = BeautifulSoup(browser.page_source, 'html.parser')
-                                            content = soup_case.find('div', {'class': 'contentt'})
-
-                                            if content == None:
-
-                                                results_per_case = {"case_text": "", "case_found": "False"}
-                                                # failed, try again
-                                                tries_case += 1
-                                                continue
-
-                                            else:
-                                                # getting case data
-                                                results_per_case = _get_one_case_text_f1(soup_case)
-                                                # success
-                                                break
-
-                                        results_per_case["case_id_uid"] = case_id
-                                        list_of_cases.append(results_per_case)
-
-                            except WebDriverException:
-                                # recording the N of page that couldn't be loaded
-                                logs["driver_error"] = "True"
-                                logs["pagination_error"].append(i)
-                                # continue to the next page
-                                continue
-
-                    # saving data                
-                    results_per_site[website]["cases"] = list_of_cases
-                    results_per_site[website]["logs"] = logs
-
-                    # results are saved, stop trying, break the while loop
-                    break
-
-                # no cases found (no results or error)
-                else:
-                    tries += 1
-
-                    logs["cases_found"] = "False"
-                    logs["driver_error"] = "False"
-                    logs["pagination_error"] = []
-                    results_per_site[website]["num_cases"] = num_cases
-                    results_per_site[website]["cases"] = list_of_cases
-                    results_per_site[website]["logs"] = logs
-                    
-                    #try again
-                    continue
-
-
-            except WebDriverException:
-                tries += 1
-
-                logs["cases_found"] = "False"
-                logs["driver_error"] = "True"
-                logs["pagination_error"] = []
-                results_per_site[website]["num_cases"] = num_cases
-                results_per_site[website]["cases"] = list_of_cases
-                results_per_site[website]["logs"] = logs
-
-                #try again
-                continue
-
-        file_name = f"{path_to_save}{region}_{website.replace('http://','').replace('.sudrf.ru','').replace('.','_').replace('/','')}_{server}_{year}.json"
-
-        with open(file_name, 'w') as jf:
-            json.dump(results_per_site, jf, ensure_ascii=False)
-
-        return_dict[website]["n_cases_by_server"][server] = num_cases
-
-    browser.close()
-
-    return return_dict
-
-
-### Form2 functionality ###
-
-def _num_cases_pages_f2(soup) -> tuple:
-    """
-    Takes a soup of a page with search results
-    Getting N of the found cases and pages on one website with 'form2'
-    Returns a tuple with int (for example, (247,10)), where the first value is N cases, the second is N pages
-    """
-    # number of cases
-    num_cases_str = soup.find("div", {"class": "lawcase-count"}).text
-    num_cases = int(re.search('найдено - \d*',num_cases_str)[0].split('- ')[1])
-    
-    # in form2, there can be different N of cases per page
-    pages_range = int(re.search('с \d по \d*',num_cases_str)[0].split(' ')[-1])
+def _num_cases_pages_f2(soup) -> tuple:
+    """
+    Takes a soup of a page with search results
+    Getting N of the found cases and pages on one website with 'form2'
+    Returns a tuple with int (for example, (247,10)), where the first value is N cases, the second is N pages
+    """
+    # number of cases
+    num_cases_str = soup.find("div", {"class": "lawcase-count"}).text
+    num_cases = int(re.search('найдено - \d*',num_cases_str)[0].split('- ')[1])
+    
+    # in form2, there can be different N of cases per page
+    pages_range = int(re.search('с \d по \d*',num_cases_str)[0].split(' ')[-1])
 
     # number of pages
     if num_cases % pages_range > 0:
@@ -717,7 +1644,7 @@ def _get_one_case_text_f2(soup) -> dict:
 def _get_captcha_f2(browser,website:str,autocaptcha="") -> str:
     '''
     Getting captcha code of form2 and displaying it; requires user's input;
-    browser: selenium.webdriver.chrome.webdriver.WebDriver (the output of '_set_browser');
+    browser: selenium.webdriver.chrome.webdriver.WebDriver (the output of '_set_browser') or requests.Session (the output of '_set_session');
     website: str, website address;
     autocaptcha: str, API key from https://ocr.space/OCRAPI to guess captcha automatically, default ''; 
     Returns str, an addition to the link with captcha code;
@@ -728,14 +1655,13 @@ def _get_captcha_f2(browser,website:str,autocaptcha="") -> str:
 
     while tries <=3:
 
-        browser.get(page_with_code)
         # checking if the search form is present
-        check_content = _explicit_wait(browser,"ID","search-form",6)
+        page_source, check_content = _load_page(browser,page_with_code,"ID","search-form",from_cache=False,to_cache=False)
 
         # form is present, getting captcha code
         if check_content == True:
 
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+            soup = BeautifulSoup(page_source, 'html.parser')
             content = soup.find("form", {"class":"form-container"})
             # getting captcha ID
             captcha_id = content.find("input", {"name": "captchaid"})["value"]
@@ -781,10 +1707,10 @@ def _get_captcha_f2(browser,website:str,autocaptcha="") -> str:
     return captcha_addition
 
 
-def _get_cases_texts_f2(browser, website:str, region:str, court_code:str, start_date:str, end_date:str, path_to_driver:str, srv_num=['1'], path_to_save='', captcha=False, autocaptcha="") -> dict:
+def _get_cases_texts_f2(browser, website:str, region:str, court_code:str, start_date:str, end_date:str, path_to_driver:str, srv_num=['1'], path_to_save='', captcha=False, autocaptcha="", engine="browser", browser_pool=None, output_format="json", checkpoint=True, incremental=False, page_workers=1, parse_workers=0, sink=None):
     '''
     Getting all court cases on one website in the indicated date range
-    browser: reusing browser for form2, because it has JavaScript and images on
+    browser: reusing browser for form2, because it has JavaScript and images on; requests.Session (the output of '_set_session') for the HTTP engine
     website: str, website address;
     region: str, region code; 
     court_code: str, required for form2 websites; to retrieve the codes, use 'https://raw.githubusercontent.com/dataout-org/sudrfparser/main/courts_info/sudrf_websites.json';
@@ -797,565 +1723,2923 @@ def _get_cases_texts_f2(browser, website:str, region:str, court_code:str, start_
     path_to_save: str, path where to save the results, default '' (the same directory of the script execution);
     captcha: bool, if a website has captcha protection, default False; automatically checks if captcha is present, and if it's present: (1) a user will be asked to solve it or (2) if a user has API key from https://ocr.space/OCRAPI to guess captcha automatically, the captcha will be autorecognised;
     autocaptcha: str, API key from https://ocr.space/OCRAPI to guess captcha automatically, default ''; 
+    engine: str, "browser" or "http", the engine 'browser' belongs to, default "browser";
+    browser_pool: BrowserPool, the pool 'browser' was acquired from; crashed drivers are replaced from it, default None;
+    output_format: str, "json" or "jsonl", see 'get_cases'; default "json";
+    checkpoint: bool, resuming an interrupted crawl, see 'get_cases'; default True;
+    incremental: bool, loading only new cases, see 'get_cases'; default False;
+    page_workers: int, N of pages loaded at the same time with the "http" engine, see 'get_cases'; default 1;
+    parse_workers: int, N of processes parsing case pages, see 'get_cases'; default 0;
+    sink: SqliteSink, a database to add cases to, see 'get_cases'; default None;
     Saves json files with all parsed cases per website's server (for example, if there are 2 servers on one website, there will be 2 json files); Logs errors and pages that were not parsed;
-    Returns a dict with info about N cases found per server
+    Returns a dict with info about N cases found per server; returns str 'browser_required' if the website cannot be parsed with the HTTP engine
     '''
 
-    year = start_date.split('.')[-1]
-    return_dict = {website:{"year":year,"n_cases_by_server":{}}}
+    return _get_cases_texts("form2", browser, website, region, court_code, start_date, end_date, srv_num, path_to_save, captcha, autocaptcha, engine, browser_pool, output_format, checkpoint, incremental, page_workers, parse_workers, sink)
 
-    for server in srv_num:
 
-        results_per_site = {}
-        results_per_site[website] = {}
-        num_cases = 0
-        list_of_cases = []
-        logs = {}
+### Results files ###
 
-        # case__num_build coincides with server num
-        module_form2 = f"/modules.php?name_op=r&name=sud_delo&srv_num={server}&_deloId=1540006&case__case_type=0&_new=0&case__vnkod={court_code}&case__num_build={server}&case__case_numberss=&case__judicial_uidss=&parts__namess=&case__entry_date1d={start_date}&case__entry_date2d={end_date}"
+def _results_file_base(path_to_save:str, region:str, website:str, server:str, year:str) -> str:
+    '''
+    Shaping the path of a results file without the extension, for example '50_chehov_mo_1_2019'
+    '''
 
-        link_to_site = website + module_form2
+    return f"{path_to_save}{region}_{website.replace('http://','').replace('.sudrf.ru','').replace('.','_').replace('/','')}_{server}_{year}"
 
-        # checking captcha
-        if captcha == True:
-            captcha_addition = _get_captcha_f2(browser,website,autocaptcha)
-            link_to_site += captcha_addition
+def _is_results_file(file_name:str) -> bool:
+    '''
+    Checking if a file is a results file: '{base}.json' or '{base}.jsonl' (the logs of the latter are in '{base}.logs.json')
+    '''
 
-        # try to load the website content 3 times
-        tries = 0
+    if file_name.endswith(".logs.json") or file_name.endswith(".checkpoint.json") or file_name.endswith(".partial.jsonl"):
+        return False
 
-        while tries <= 3:
-            try:
-                browser.get(link_to_site)
-                # explicitly waiting for the results table
-                el_found = _explicit_wait(browser,"ID","resultTable",6)
+    return file_name.endswith(".json") or file_name.endswith(".jsonl")
 
-                # if there is a table with results
-                if el_found == True:
+# '{region}_{site}_{srv}_{year}.json' or '.jsonl', see '_results_file_base'
+_RESULTS_FILE_NAME = re.compile(r'^([^_]+)_(.+)_(\d+)_(\d{4})\.(json|jsonl)$')
 
-                    soup = BeautifulSoup(browser.page_source, 'html.parser')
+def _parse_results_file_name(file_name:str):
+    '''
+    Getting the region, site, server and year of a results file from its name
+    Returns a tuple of str, for example ('50', 'chehov_mo', '1', '2019') for '50_chehov_mo_1_2019.json'; None if it is not a results file
+    '''
 
-                    stats = _num_cases_pages_f2(soup)
-                    num_cases = stats[0]
-                    num_pages = stats[1]
+    if _is_results_file(file_name) == False:
+        return None
 
-                    logs["cases_found"] = "True"
-                    logs["driver_error"] = "False"
-                    logs["pagination_error"] = []
-                    results_per_site[website]["num_cases"] = num_cases
+    match = _RESULTS_FILE_NAME.match(file_name)
+    if match == None:
+        return None
 
-                    # getting cases on the first page
-                    # this will be all the cases for 1 page results
-                    # first, getting all the cases ids on the page
-                    cases_ids_on_page = _get_cases_ids_per_page_f2(soup)
+    return match.group(1, 2, 3, 4)
 
-                    # iterating over cases and colecting texts
-                    for case_id in cases_ids_on_page:
+def _index_results_files(dir_path:str) -> dict:
+    '''
+    Grouping results files in a directory by their names, reading the directory once
+    Returns a dict {(region, year): {site: {srv: file name}}}, sites and servers in the order of names,
+    for example {('50', '2019'): {'chehov_mo': {'1': '50_chehov_mo_1_2019.json', '2': '50_chehov_mo_2_2019.jsonl'}}}
+    '''
 
-                        case_page = f"{website}/modules.php?name=sud_delo&name_op=case&{case_id}&_deloId=1540006&_caseType=0&_new=0&srv_num={server}"
-                        
-                        # trying to retrieve case content
-                        tries_case = 0
-                        while tries_case <= 3:
-
-                            browser.get(case_page)
-                            # checking if tabs are loaded
-                            tabs_content = _explicit_wait(browser,"ID","case_bookmarks",6)
-                            soup_case = BeautifulSoup(browser.page_source, 'html.parser')
-                            content = soup_case.find('ul', {'class': 'bookmarks'})
-
-                            if content == None:
-                                results_per_case = {"case_text": "", "case_found": "False"}
-                                # failed, try again
-                                tries_case += 1
-                                continue
-
-                            else:
-                                # getting case data
-                                results_per_case = _get_one_case_text_f2(soup_case)
-                                # success
-                                break
-
-                        results_per_case["case_id_uid"] = case_id
-                        list_of_cases.append(results_per_case)
-
-                    if num_pages > 1:
-
-                        for i in range(2,num_pages+1):
-                            page_addition = f'&_page={i}'
-                            link_with_page = link_to_site + page_addition
-
-                            # adding Exception in case of the driver error
-                            try:
-                                browser.get(link_with_page)
-                                el_found = _explicit_wait(browser,"ID","resultTable",6)
-                                
-                                # if there's no table content found
-                                # check if it is because of captcha
-                                if el_found == False and captcha == True and BeautifulSoup(browser.page_source, 'html.parser').find("div", {"id": "error"}):
-                                    # getting new captcha
-                                    captcha_addition = _get_captcha_f2(browser,website,autocaptcha)
-                                    link_to_site = website + module_form2 + captcha_addition
-                                    link_with_page = link_to_site + page_addition
-                                    browser.get(link_with_page)
-                                    # trying one more time
-                                    el_found = _explicit_wait(browser,"ID","resultTable", 6)
-
-                                if el_found == False:
-                                    logs['pagination_error'].append(i)
-                                
-                                # if everything's ok
-                                if el_found == True:
-                                    soup = BeautifulSoup(browser.page_source, 'html.parser')
-                                    cases_ids_on_page = _get_cases_ids_per_page_f2(soup)
-
-                                    # iterating over cases and colecting texts
-                                    for case_id in cases_ids_on_page:
-
-                                        case_page = f"{website}/modules.php?name=sud_delo&name_op=case&{case_id}&_deloId=1540006&_caseType=0&_new=0&srv_num={server}"
-
-                                        tries_case = 0
-                                        while tries_case <= 3:
-
-                                            browser.get(case_page)
-                                            # checking if tabs are loaded
-                                            tabs_content = _explicit_wait(browser,"ID","case_bookmarks",6)
-                                            soup_case = BeautifulSoup(browser.page_source, 'html.parser')
-                                            content = soup_case.find('ul', {'class': 'bookmarks'})
-
-                                            if content == None:
-                                                results_per_case = {"case_text": "", "case_found": "False"}
-                                                # failed, try again
-                                                tries_case += 1
-                                                continue
-  
-                                            else:
-                                                # getting case data
-                                                results_per_case = _get_one_case_text_f2(soup_case)
-                                                # success
-                                                break
-
-                                        results_per_case["case_id_uid"] = case_id
-                                        list_of_cases.append(results_per_case)
-
-                            except WebDriverException:
-                                # recording the N of page that couldn't be loaded
-                                logs["driver_error"] = "True"
-                                logs["pagination_error"].append(i)
-                                # continue to the next page
-                                continue
-
-                    # saving data                
-                    results_per_site[website]["cases"] = list_of_cases
-                    results_per_site[website]["logs"] = logs
-
-                    # results are saved, stop trying, break the while loop
-                    break
+    index = {}
 
-                # no cases found (no results, error, or time out)
-                else:
-                    tries += 1
+    with os.scandir(dir_path) as entries:
+        names = sorted(entry.name for entry in entries if entry.is_file())
 
-                    logs["cases_found"] = "False"
-                    logs["driver_error"] = "False"
-                    logs["pagination_error"] = []
-                    results_per_site[website]["num_cases"] = num_cases
-                    results_per_site[website]["cases"] = list_of_cases
-                    results_per_site[website]["logs"] = logs
+    for name in names:
+        parsed = _parse_results_file_name(name)
+        if parsed == None:
+            continue
+        region, site, srv, year = parsed
+        # json and jsonl of the same server: the one later in the order is taken ('.jsonl')
+        index.setdefault((region, year), {}).setdefault(site, {})[srv] = name
 
-                    #try again
-                    continue
-                    
+    # servers in the numeric order
+    for sites in index.values():
+        for site, files_by_srv in sites.items():
+            sites[site] = dict(sorted(files_by_srv.items(), key=lambda item: int(item[0])))
 
-            except WebDriverException:
-                tries += 1
+    return index
 
-                logs["cases_found"] = "False"
-                logs["driver_error"] = "True"
-                logs["pagination_error"] = []
-                results_per_site[website]["num_cases"] = num_cases
-                results_per_site[website]["cases"] = list_of_cases
-                results_per_site[website]["logs"] = logs
+def _read_results_file(file_path:str) -> dict:
+    '''
+    Reading a results file of one website's server, json or jsonl
+    Returns a dict {website: {"num_cases": int, "cases": [...], "logs": {...}}}; an unfinished jsonl file has the logs {"cases_found": "False", "driver_error": "True", "pagination_error": []}
+    '''
 
-                #try again
-                continue
+    if file_path.endswith(".jsonl") == False:
+        with open(file_path, 'r') as jf:
+            return json.load(jf)
 
-        file_name = f"{path_to_save}{region}_{website.replace('http://','').replace('.sudrf.ru','').replace('.','_').replace('/','')}_{server}_{year}.json"
-        
-        with open(file_name, 'w') as jf:
-            json.dump(results_per_site, jf, ensure_ascii=False)
+    cases = []
+    with open(file_path, 'r') as jf:
+        for line in jf:
+            # the last line can be cut off by a crash
+            try:
+                cases.append(json.loads(line))
+            except ValueError:
+                break
 
-        return_dict[website]["n_cases_by_server"][server] = num_cases
+    logs_path = file_path[:-len(".jsonl")] + ".logs.json"
 
-    return return_dict
+    with open(logs_path, 'r') as jf:
+        results = json.load(jf)
 
+    website = list(results.keys())[0]
+    results[website] = {"num_cases": results[website]["num_cases"], "cases": cases, "logs": results[website]["logs"]}
 
-### The main parser function ###
+    return results
 
-def get_cases(website:str, region:str, start_date:str, end_date:str, path_to_driver:str, court_code="", srv_num=['1'], path_to_save="", apikey=""):
+def _read_results_website(file_path:str) -> str:
     '''
-    Getting texts of court decisions with metadata on one website for the indicated date range
-    region: str, region code; use keys in 'https://github.com/dataout-org/sudrfparser/blob/main/courts_info/sudrf_websites.json'
-    Dates to indicate a date range in which to look for cases:
-    (for example, the range 01.01.2021 and 31.12.2021 will get all the cases registered in a court in 2021)
-        start_date: str, date of cases registration in a court, 'DD.MM.YYYY';
-        end_date: str, date of cases registration in a court, 'DD.MM.YYYY';
-    path_to_driver: str, path to Chrome driver;
-    court_code: str, required for form2 websites; to retrieve the codes, use 'https://raw.githubusercontent.com/dataout-org/sudrfparser/main/courts_info/sudrf_websites.json'; default '';
-    srv_num: list, servers where to look for cases, default ['1']; one website can have multiple servers with criminal cases of the first instance;
-    path_to_save: str, path where to save the results, default '' (the same directory of the script execution; note that there can be a lot of large json files);
-    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default ''; keep default if entering captcha manually;
-    Saves json files with all parsed cases per website's server (for example, if there are 2 servers on one website, there will be 2 json files); Logs errors and pages that were not parsed;
-    Returns a dict with info about N cases found per server (if parsed successfully); returns a status str if parsing is failed;
+    Reading the website of a results file without reading the cases: it is the first key of the json file (or of the logs file of jsonl)
+    Returns str, for example 'http://chehov.mo.sudrf.ru'
     '''
 
-    # request the website soup
-    # feed soup to check captcha and form
+    if file_path.endswith(".jsonl"):
+        return list(_read_results_logs(file_path).keys())[0]
 
-    browser = _set_browser(path_to_driver)
-    link_to_site = website + "/modules.php?name=sud_delo&srv_num=1&name_op=sf&delo_id=1540005"
+    with open(file_path, 'r') as jf:
+        head = jf.read(4096)
 
-    # try to load the website content 3 times
-    tries = 0
-    content_found = False
+    try:
+        start = head.index('"')
+        return json.JSONDecoder().raw_decode(head, start)[0]
+    # a very long key, reading the whole file
+    except ValueError:
+        return list(_read_results_file(file_path).keys())[0]
 
-    while tries <= 3:
-        try:
-            browser.get(link_to_site)
-            content_found = _explicit_wait(browser,"ID","modSdpContent",6)
-            # additional time if explicit wait fails
-            time.sleep(3)
+def _read_results_logs(file_path:str) -> dict:
+    '''
+    Reading N cases and logs of a results file without reading its cases: for jsonl files only the logs file is read,
+    for json files only the beginning (website, N cases) and the end (logs) of the file
+    Returns a dict {website: {"num_cases": int, "logs": {...}}}
+    '''
 
-            if content_found == True:
+    if file_path.endswith(".jsonl"):
+        with open(file_path[:-len(".jsonl")] + ".logs.json", 'r') as jf:
+            return json.load(jf)
 
-                soup = BeautifulSoup(browser.page_source, 'html.parser')
+    # the files are written as {website: {"num_cases": N, "cases": [...], "logs": {...}}}
+    decoder = json.JSONDecoder()
+    try:
+        with open(file_path, 'rb') as jf:
+            head = jf.read(4096).decode('utf-8', errors='ignore')
+            jf.seek(0, os.SEEK_END)
+            jf.seek(max(0, jf.tell() - 65536))
+            tail = jf.read().decode('utf-8', errors='ignore')
 
-                form_and_captcha = _check_form_and_captcha(soup)
-                form_type = form_and_captcha["form_type"]
-                captcha = form_and_captcha["captcha"]
+        website, end = decoder.raw_decode(head, head.index('"'))
+        num_cases = int(re.match(r'\s*:\s*\{\s*"num_cases"\s*:\s*(\d+)', head[end:]).group(1))
 
-                # parser for form1
-                if form_type == "form1" and captcha == "False":
-                    results = _get_cases_texts_f1(website, region, start_date, end_date, path_to_driver, srv_num, path_to_save)
+        logs_start = tail.rindex('"logs"')
+        logs, end = decoder.raw_decode(tail, tail.index('{', logs_start))
+        # the logs are the last item of the file
+        if tail[end:].strip() != "}}":
+            raise ValueError
 
-                if form_type == "form1" and captcha == "True":
-                    results = _get_cases_texts_f1(website, region, start_date, end_date, path_to_driver, srv_num, path_to_save, captcha=True, autocaptcha=apikey)
+        return {website: {"num_cases": num_cases, "logs": logs}}
 
-                # parser for form2
-                if form_type == "form2" and captcha == "False":
-                    results = _get_cases_texts_f2(browser, website, region, court_code, start_date, end_date, path_to_driver, srv_num, path_to_save)
+    # written in another way, reading the whole file
+    except (ValueError, AttributeError):
+        results = _read_results_file(file_path)
+        return {website: {"num_cases": v["num_cases"], "logs": v["logs"]} for website, v in results.items()}
 
-                if form_type == "form2" and captcha == "True":
-                    results = _get_cases_texts_f2(browser, website, region, court_code, start_date, end_date, path_to_driver, srv_num, path_to_save, captcha=True, autocaptcha=apikey)
+class _CasesWriter:
+    '''
+    Writing parsed cases of one website's server into a json file '{file_base}.json', which is written at once when the server is parsed
+    (the format of the results files: {website: {"num_cases": int, "cases": [...], "logs": {...}}})
+    Usage: writer.add(case) for every case, writer.reset() to drop the cases of a failed attempt, writer.close(num_cases, logs)
+    'written_ids' is a set of 'case_id_uid' of the written cases; writer.keep_written() makes the cases written so far survive 'reset' and 'discard'
+    '''
 
-                # no point in trying because websites with other forms are not parsed
-                if form_type == "other":
-                    results = f"{website} cannot be parsed"
+    def __init__(self, file_base:str, website:str):
+        self.file_base = file_base
+        self.website = website
+        self.cases = []
+        self.written_ids = set()
+        self._kept = (0, set())
 
-                # succesful, stop trying
-                break
+    @property
+    def n_cases(self) -> int:
+        return len(self.written_ids)
 
-            # no web driver error, but content was not loaded
-            else:
-                tries += 1
-                continue
+    def add(self, case:dict):
+        self.cases.append(case)
+        self.written_ids.add(case["case_id_uid"])
 
-        # web driver error, try again
-        except WebDriverException:
-            tries += 1
-            continue
+    def keep_written(self):
+        self._kept = (len(self.cases), set(self.written_ids))
 
-    # give up if conent is still not loaded after 3 tries
-    if content_found == False:
-        results = f"Failed to load content of {website}"
-    
-    browser.close()
-    
-    return results
+    def reset(self):
+        self.cases = self.cases[:self._kept[0]]
+        self.written_ids = set(self._kept[1])
 
+    def discard(self):
+        self.reset()
 
-### Handling missed pages ###
+    def close(self, num_cases:int, logs:dict):
+        results_per_site = {self.website: {"num_cases": num_cases, "cases": self.cases, "logs": logs}}
+
+        with open(f"{self.file_base}.json", 'w') as jf:
+            json.dump(results_per_site, jf, ensure_ascii=False)
 
-def _get_missing_pages(dir_path:str,region_code:str,year:str) -> tuple:
+class _JsonlCasesWriter(_CasesWriter):
     '''
-    Getting files with missing pages;
-    Returns a tuple: (N missed pages, files of websites with missing pages);
-    Used as a subfunction for 'request_missing_pages'
+    Writing parsed cases of one website's server into '{file_base}.jsonl', one case per line as soon as it is parsed,
+    and {website: {"num_cases": int, "logs": {...}}} into '{file_base}.logs.json'
+    Memory use does not grow with N cases; cases parsed before a crash stay in the file
+    (until the server is parsed, the logs are {"cases_found": "False", "driver_error": "True", "pagination_error": []})
+    append: bool, adding cases to an existing file (a line cut off by a crash is dropped; the cases in the file are kept), default False (the file is overwritten)
     '''
-    
-    n_missed_pages = 0
-    sites_with_pagination_errors = []
-        
-    region_year_files = [join(dir_path, f) for f in listdir(dir_path) 
-                     if isfile(join(dir_path, f))
-                     and f.endswith(".json")
-                     and f.startswith(f"{region_code}_") and f"_{year}" in f]
-    
-    
-    for path in region_year_files:
-        with open(path,'r') as jf:
-            cases_per_site = json.load(jf)
-            for v in cases_per_site.values():
-                if len(v['logs']["pagination_error"]) > 0:
-                    sites_with_pagination_errors.append(path.split("/")[-1])
-                    n_missed_pages += len(v['logs']["pagination_error"])
-        
-    return (n_missed_pages,sites_with_pagination_errors)
 
+    stream_suffix = ".jsonl"
+
+    def __init__(self, file_base:str, website:str, append=False):
+        self.file_base = file_base
+        self.website = website
+        self.stream_path = file_base + self.stream_suffix
+        self.written_ids = set()
+
+        if append == True and os.path.isfile(self.stream_path):
+            self._read_written_ids()
+            self._file = open(self.stream_path, 'a')
+        else:
+            self._file = open(self.stream_path, 'w')
+            self._write_logs(0, {"cases_found": "False", "driver_error": "True", "pagination_error": []})
+
+        self.keep_written()
 
-def request_missing_pages(dir_path:str,region_code:str,year:str,path_to_driver:str,apikey="") -> list:
+    def _read_written_ids(self):
+        with open(self.stream_path, 'rb+') as f:
+            complete_size = 0
+            for line in f:
+                # the last line can be cut off by a crash
+                if line.endswith(b"\n") == False:
+                    break
+                self.written_ids.add(json.loads(line)["case_id_uid"])
+                complete_size += len(line)
+            f.truncate(complete_size)
+
+    def _write_logs(self, num_cases:int, logs:dict):
+        # replacing the logs file at once, so that it is never left half-written
+        tmp_path = f"{self.file_base}.logs.json.tmp"
+        with open(tmp_path, 'w') as jf:
+            json.dump({self.website: {"num_cases": num_cases, "logs": logs}}, jf, ensure_ascii=False)
+        os.replace(tmp_path, f"{self.file_base}.logs.json")
+
+    def add(self, case:dict):
+        self._file.write(json.dumps(case, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.written_ids.add(case["case_id_uid"])
+
+    def keep_written(self):
+        self._file.flush()
+        self._kept = (self._file.tell(), set(self.written_ids))
+
+    def reset(self):
+        self._file.flush()
+        self._file.seek(self._kept[0])
+        self._file.truncate()
+        self.written_ids = set(self._kept[1])
+
+    def discard(self):
+        self.reset()
+        self._file.close()
+
+        # nothing was in the file before
+        if self._kept[0] == 0:
+            for path in [self.stream_path, f"{self.file_base}.logs.json"]:
+                if os.path.isfile(path):
+                    os.remove(path)
+
+    def close(self, num_cases:int, logs:dict):
+        self._file.close()
+        self._write_logs(num_cases, logs)
+
+class _StreamedJsonCasesWriter(_JsonlCasesWriter):
     '''
-    Handling missing pages by region and year: checking whether the result json files have missing pages and requesting cases on them;
-    This function adds missing cases to the same resulting file (it overwrites files);
-    dir_path: str, path to the directory with the json files of parsed cases;
-    region_code: str, region code in the results json files, for which to check missing pages;
-    year: str, year in the results json files, for which to check missing pages;
-    (for example, the file '50_chehov_mo_1_2019.json' has the region code '50' and the year is '2019')
-    path_to_driver: str, path to Chrome driver;
-    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default ''; keep default if entering captcha manually
-    Returns a list with logs of N cases added per file
+    Writing parsed cases of one website's server into a json file '{file_base}.json' (the same as '_CasesWriter');
+    until the server is parsed, cases are appended to '{file_base}.partial.jsonl', so that they are kept for a resumed crawl (see '_get_cases_texts')
     '''
 
-    logs_to_return = []
-    missing_pages = _get_missing_pages(dir_path,region_code,year)
+    stream_suffix = ".partial.jsonl"
 
-    for site in missing_pages[1]:
-    
-        # getting srv info from the file name
-        srv = site.split("_")[-2]
-        
-        file_path = f"{dir_path}/{site}"
-        
-        with open(file_path,"r") as jf:
-            site_data = json.load(jf)
-            
-        website = list(site_data.keys())[0]
-            
-        pages_to_reguest = site_data[website]["logs"]["pagination_error"]
-        
-        browser = _set_browser(path_to_driver)
-        link_to_site = website + f"/modules.php?name=sud_delo&srv_num={srv}&name_op=sf&delo_id=1540005"
-        
-        all_cases_per_site_to_request = []
-        not_parsed_pages = []
-        new_cases_data = []
-        
-        try:
-            browser.get(link_to_site)
-            content_found = _explicit_wait(browser,"ID","modSdpContent",6)
+    def _write_logs(self, num_cases:int, logs:dict):
+        # the logs are written only in the json file
+        pass
 
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+    def discard(self):
+        self._file.close()
+        os.remove(self.stream_path)
 
-            form_and_captcha = _check_form_and_captcha(soup)
-            form_type = form_and_captcha["form_type"]
-            captcha = form_and_captcha["captcha"]
-            
-            # form1
-            if form_type == "form1":
-                
-                module = f'/modules.php?name=sud_delo&srv_num={srv}&name_op=r&delo_id=1540006&case_type=0&new=0&u1_case__ENTRY_DATE1D=01.01.{year}&u1_case__ENTRY_DATE2D=31.12.{year}&delo_table=u1_case&U1_PARTS__PARTS_TYPE='
-                
-                link_to_site = website + module
-
-                # check captcha
-                if captcha == "True":
-                    captcha_addition = _get_captcha_f1(browser,website,apikey)
-                    link_to_site += captcha_addition
-                
-                # collecting cases IDs per page
-                for page in pages_to_reguest:
-                    link_with_page = link_to_site + f"&page={page}"
-                    
-                    try:
-                        browser.get(link_with_page)
-                        content_found = _explicit_wait(browser,"ID","tablcont",6)
-                        soup = BeautifulSoup(browser.page_source, 'html.parser')
-                        
-                        if soup.find("table", {"id": "tablcont"}):
-                            cases_ids_on_page = _get_cases_ids_per_page_f1(soup)
-                            all_cases_per_site_to_request.extend(cases_ids_on_page)
-                            
-                    except WebDriverException:
-                        not_parsed_pages.append(page)
-                        continue
-                        
-                        
-                # getting all cases data by their IDs
-                for case_id in all_cases_per_site_to_request:
-                    
-                    case_page = f"{website}/modules.php?name=sud_delo&srv_num={srv}&name_op=case&{case_id}&delo_id=1540006"
-                    browser.get(case_page)
-
-                    # checking if tabs are loaded
-                    tabs_content = _explicit_wait(browser,"CLASS_NAME","tabs",6)
-
-                    if tabs_content == True:
-                        # getting case data
-                        soup_case = BeautifulSoup(browser.page_source, 'html.parser')
-                        results_per_case = _get_one_case_text_f1(soup_case)
-                        
-                    else:
-                        results_per_case = {"case_text": "", "case_found": "False"}
-
-                    results_per_case["case_id_uid"] = case_id
-                    new_cases_data.append(results_per_case)
-
-            # form2
-            if form_type == "form2":
-
-                # getting court codes from a file
-                court_codes_url = "https://github.com/dataout-org/sudrfparser/raw/main/courts_info/sudrf_websites.json"
-                r = requests.get(court_codes_url)
-                court_codes = r.json()
-
-                for court in court_codes[region_code]:
-                    if court["court_website"] == website:
-                        court_code = court["court_id"]
-
-                module_form2 = f'/modules.php?name_op=r&name=sud_delo&srv_num={srv}&_deloId=1540006&case__case_type=0&_new=0&case__vnkod={court_code}&case__num_build={srv}&case__case_numberss=&case__judicial_uidss=&parts__namess=&case__entry_date1d=01.01.{year}&case__entry_date2d=31.12.{year}'
-
-                link_to_site = website + module_form2
-
-                # checking captcha
-                if captcha == "True":
-                    captcha_addition = _get_captcha_f2(browser,website,apikey)
-                    link_to_site += captcha_addition
-
-                # collecting cases IDs per page
-                for page in pages_to_reguest:
-                    link_with_page = link_to_site + f'&_page={page}'
-                    
-                    try:
-                        browser.get(link_with_page)
-                        el_found = _explicit_wait(browser,"ID","resultTable", 6)
-                        soup = BeautifulSoup(browser.page_source, 'html.parser')
+    def close(self, num_cases:int, logs:dict):
+        self._file.close()
 
-                        # getting all the cases ids on the page
-                        cases_ids_on_page = _get_cases_ids_per_page_f2(soup)
-                        all_cases_per_site_to_request.extend(cases_ids_on_page)
+        with open(self.stream_path, 'r') as jf:
+            cases = [json.loads(line) for line in jf]
 
-                    except WebDriverException:
-                        not_parsed_pages.append(page)
-                        continue
+        with open(f"{self.file_base}.json", 'w') as jf:
+            json.dump({self.website: {"num_cases": num_cases, "cases": cases, "logs": logs}}, jf, ensure_ascii=False)
 
-                # getting all cases data by their IDs
-                for case_id in all_cases_per_site_to_request:
-
-                    case_page = f"{website}/modules.php?name=sud_delo&name_op=case&{case_id}&_deloId=1540006&_caseType=0&_new=0&srv_num={srv}"
-                    browser.get(case_page)
-
-                    # checking if tabs are loaded
-                    tabs_content = _explicit_wait(browser,"ID","case_bookmarks",6)
-
-                    if tabs_content == True:
-                        # getting case data
-                        soup_case = BeautifulSoup(browser.page_source, 'html.parser')
-                        results_per_case = _get_one_case_text_f2(soup_case)
-                    else:
-                        results_per_case = {"case_text": "", "case_found": "False"}
-
-                    results_per_case["case_id_uid"] = case_id
-                    new_cases_data.append(results_per_case)
-                    
-                
-        # this will add all non-requested pages per website to the pagination error list
-        except WebDriverException:
-            not_parsed_pages = pages_to_reguest
-            continue
-            
-        browser.close()
-        
-        if len(new_cases_data) > 0:
-        
-            site_data[website]["cases"].extend(new_cases_data)
-            # if pages were not parsed again, keep them in the file
-            site_data[website]["logs"]["pagination_error"] = not_parsed_pages
+        os.remove(self.stream_path)
 
-            # export new file / overwrite
-            with open(file_path, 'w') as jf:
-                json.dump(site_data,jf,ensure_ascii=False)
+def _cases_writer(file_base:str, website:str, output_format="json", checkpoint=False, resume=False, incremental=False) -> _CasesWriter:
+    '''
+    Choosing a writer of a website's server results
+    output_format: str, "json" or "jsonl";
+    checkpoint: bool, cases have to be on disk as soon as they are parsed, default False;
+    resume: bool, adding cases to the ones written by an interrupted crawl, default False;
+    incremental: bool, adding cases to the ones in the existing results file, default False;
+    Returns _CasesWriter, _JsonlCasesWriter or _StreamedJsonCasesWriter; cases of the existing results file are in 'written_ids' and are kept
+    '''
 
-            status = f"{len(new_cases_data)} cases were added to {site}"
-            
-        else:
-            status = f"No cases were added to {site}"
+    if output_format == "jsonl":
+        return _JsonlCasesWriter(file_base, website, append=(resume or incremental))
 
-        logs_to_return.append(status)
+    if checkpoint == True:
+        writer = _StreamedJsonCasesWriter(file_base, website, append=resume)
+    else:
+        writer = _CasesWriter(file_base, website)
 
-    return logs_to_return
+    # the cases of the previous crawl
+    if incremental == True and resume == False and os.path.isfile(f"{file_base}.json"):
+        for existing_results in _read_results_file(f"{file_base}.json").values():
+            for case in existing_results["cases"]:
+                writer.add(case)
+        writer.keep_written()
 
+    return writer
 
-### Compressing results files by region and year ###
+### Checkpoints of crawls ###
 
-def compress_by_region_year(dir_path:str,region_code:str,year:str,path_to_save:str) -> str:
+def _read_checkpoint(file_base:str, website:str, start_date:str, end_date:str, output_format:str):
     '''
-    Compressing json files with cases texts: putting all cases of one region per year in one compressed json file (gzip);
-    If there are multiple files for one website (results from several servers), merges them into one file;
-    dir_path: str, path to the directory with the json files of parsed cases;
-    region_code: str, a region to compress; for example '78';
-    year: str, a year to merge files by;
-    path_to_save: str, path to the directory, where to save the compressed gzip file (!NB the file can be large);
-    Returns str: status of the compression
+    Reading the checkpoint '{file_base}.checkpoint.json' of an interrupted crawl of a website's server
+    The checkpoint is used only for the same website, date range and output format
+    Returns a dict (see '_get_cases_texts') or None if there is no checkpoint to resume from
     '''
-    
-    compressed_filename = f"{region_code}_{year}_gzip.json"
-        
-    # all file paths by region and year
-    region_year_files = [join(dir_path, f) for f in listdir(dir_path) 
-                     if isfile(join(dir_path, f))
-                     and f.endswith(".json")
-                     and f.startswith(f"{region_code}_") and f"_{year}" in f]
-    
 
-    # merging multiple json files into one
-    merged = {}
-    
-    # check if the directory contains several files of different srv
-    list_of_court_str_ids = []
+    checkpoint_path = f"{file_base}.checkpoint.json"
 
-    for file_path in region_year_files:
+    if os.path.isfile(checkpoint_path) == False:
+        return None
 
-        court_str_id = file_path.split('/')[-1].split('.')[0].replace(f"{region_code}_",'').replace(f"_{year}",'')
-        srv_num_str = re.search('(_\d)',court_str_id)[0]
-        court_str_id = court_str_id.replace(srv_num_str,'')
-        list_of_court_str_ids.append(court_str_id)
+    try:
+        with open(checkpoint_path, 'r') as jf:
+            state = json.load(jf)
+    except ValueError:
+        return None
 
-    court_cases_by_srv = dict(Counter(list_of_court_str_ids))
+    if (state.get("website"), state.get("start_date"), state.get("end_date"), state.get("output_format")) != (website, start_date, end_date, output_format):
+        return None
 
-    # if there are several srv files, merge them in one and add to the common merged file
-    for court_name, n_srv in court_cases_by_srv.items():
+    return state
 
-        if n_srv > 1:
+def _save_checkpoint(file_base:str, state:dict):
+    '''
+    Saving the checkpoint of a crawl; the file is replaced at once, so that it is never left half-written
+    '''
 
-            combined_by_srv = {}
-            combined_by_srv_website = {}
+    tmp_path = f"{file_base}.checkpoint.json.tmp"
+    with open(tmp_path, 'w') as jf:
+        json.dump(state, jf, ensure_ascii=False)
+    os.replace(tmp_path, f"{file_base}.checkpoint.json")
 
-            for file_path in region_year_files:
-                if court_name in file_path:
+def _remove_checkpoint(file_base:str):
+    '''
+    Removing the checkpoint of a finished crawl
+    '''
 
-                    with open(file_path, 'r') as jf:
-                        cases_by_srv = json.load(jf)
-                        website = list(cases_by_srv.keys())[0]
-                        # srv num in the file name can be 2 digits
-                        srv_num_str = "srv_" + re.search('(_\d*_)',file_path)[0].replace('_','')
-                        combined_by_srv[srv_num_str]= cases_by_srv[website]
-                        combined_by_srv_website[website] = {}
+    if os.path.isfile(f"{file_base}.checkpoint.json"):
+        os.remove(f"{file_base}.checkpoint.json")
+
+### Shared crawling functionality for form1 and form2 ###
+
+# search results and case pages by form type:
+# elements that are present when a page is loaded, the pagination parameter, page parsers
+# and regions of the pages they read (see '_parse_html'): the first page of search results, the next ones and case pages
+_FORMS = {
+    "form1": {"results_element": "tablcont",
+              "case_by": "CLASS_NAME",
+              "case_element": "contentt",
+              "page_param": "page",
+              "listing_regions": [("div","id","content"), ("table","id","tablcont")],
+              "ids_regions": [("table","id","tablcont")],
+              "case_regions": [("div","class","casenumber"), ("ul","class","tabs"), ("div","class","contentt")],
+              "num_cases_pages": _num_cases_pages_f1,
+              "cases_ids_per_page": _get_cases_ids_per_page_f1,
+              "one_case_text": _get_one_case_text_f1,
+              "captcha": _get_captcha_f1},
+    "form2": {"results_element": "resultTable",
+              "case_by": "ID",
+              "case_element": "case_bookmarks",
+              "page_param": "_page",
+              "listing_regions": [("div","class","lawcase-count"), ("table","id","resultTable")],
+              "ids_regions": [("table","id","resultTable")],
+              "case_regions": [("div","class","case-num"), ("div","id","search_results"), ("ul","id","case_bookmarks")],
+              "num_cases_pages": _num_cases_pages_f2,
+              "cases_ids_per_page": _get_cases_ids_per_page_f2,
+              "one_case_text": _get_one_case_text_f2,
+              "captcha": _get_captcha_f2}
+}
+
+def _rendered_with_javascript(page_source:str) -> bool:
+    '''
+    Checking if a page loaded with the HTTP engine is a normal page of the website whose content is rendered with JavaScript:
+    the module container is there, but neither the content nor the N of found cases (so it is not an error page or an empty search result)
+    Returns True if a browser is needed for the page
+    '''
+
+    return (_element_in_source(page_source,"ID","modSdpContent")
+            and _element_in_source(page_source,"CLASS_NAME","lawcase-count") == False
+            and "найдено" not in page_source.lower())
+
+def _search_link(form_type:str, website:str, server:str, start_date:str, end_date:str, court_code="") -> str:
+    '''
+    Shaping a link to the search results of criminal cases of the first instance on one website's server
+    form_type: str, 'form1' or 'form2';
+    court_code: str, required for form2 websites;
+    Returns str
+    '''
+
+    if form_type == "form1":
+        module = f'/modules.php?name=sud_delo&srv_num={server}&name_op=r&delo_id=1540006&case_type=0&new=0&u1_case__ENTRY_DATE1D={start_date}&u1_case__ENTRY_DATE2D={end_date}&delo_table=u1_case&U1_PARTS__PARTS_TYPE='
+    else:
+        # case__num_build coincides with server num
+        module = f"/modules.php?name_op=r&name=sud_delo&srv_num={server}&_deloId=1540006&case__case_type=0&_new=0&case__vnkod={court_code}&case__num_build={server}&case__case_numberss=&case__judicial_uidss=&parts__namess=&case__entry_date1d={start_date}&case__entry_date2d={end_date}"
+
+    return website + module
+
+def _case_link(form_type:str, website:str, server:str, case_id:str) -> str:
+    '''
+    Shaping a link to a case page by the case id from the search results
+    form_type: str, 'form1' or 'form2';
+    case_id: str, the output of '_get_cases_ids_per_page_f1' or '_get_cases_ids_per_page_f2';
+    Returns str
+    '''
+
+    if form_type == "form1":
+        return f"{website}/modules.php?name=sud_delo&srv_num={server}&name_op=case&{case_id}&delo_id=1540006"
+    else:
+        return f"{website}/modules.php?name=sud_delo&name_op=case&{case_id}&_deloId=1540006&_caseType=0&_new=0&srv_num={server}"
+
+def _fetch_case_page(form_type:str, browser, website:str, server:str, case_id:str):
+    '''
+    Loading a case page (trying 3 times)
+    form_type: str, 'form1' or 'form2';
+    browser: WebDriver or requests.Session;
+    Returns str, html of the page; None if the case page is not loaded
+    '''
+
+    form = _FORMS[form_type]
+    case_page = _case_link(form_type, website, server, case_id)
+
+    # trying to retrieve case content
+    tries_case = 0
+    while tries_case <= 3:
+
+        page_source, tabs_content = _load_page(browser,case_page,form["case_by"],form["case_element"])
+
+        if tabs_content == True:
+            return page_source
+
+        # failed, try again
+        tries_case += 1
+
+    return None
+
+def _parse_case_page(form_type:str, page_source, case_id:str, parser_backend=None) -> dict:
+    '''
+    Getting case data from the html of a case page; runs in worker processes of 'CasePipeline' too
+    page_source: str or None (the page is not loaded);
+    parser_backend: str, see 'set_parser_backend', default None (the backend of the current process);
+    Returns a dict with case metadata and decision text; {"case_text": "", "case_found": "False"} if the case page is not loaded
+    '''
+
+    if page_source == None:
+        results_per_case = {"case_text": "", "case_found": "False"}
+    else:
+        form = _FORMS[form_type]
+        soup_case = _parse_html(page_source, form["case_regions"], parser_backend)
+        results_per_case = form["one_case_text"](soup_case)
+
+    results_per_case["case_id_uid"] = case_id
+
+    return results_per_case
+
+def _get_one_case(form_type:str, browser, website:str, server:str, case_id:str) -> dict:
+    '''
+    Loading a case page (trying 3 times) and getting case data
+    form_type: str, 'form1' or 'form2';
+    browser: WebDriver or requests.Session;
+    Returns a dict with case metadata and decision text; {"case_text": "", "case_found": "False"} if the case page is not loaded
+    '''
+
+    page_source = _fetch_case_page(form_type, browser, website, server, case_id)
+
+    return _parse_case_page(form_type, page_source, case_id)
+
+def _timed(function, *args):
+    # (result, seconds), for the metrics of stages running in worker processes
+    start = time.perf_counter()
+    result = function(*args)
+
+    return result, time.perf_counter() - start
+
+class _SearchResults:
+    '''
+    Pages of the search results of one website's server; keeps the link with the current captcha and gets a new captcha when it expires
+    search_link: str, the output of '_search_link';
+    captcha_addition: str, the current captcha part of the link, default '';
+    captcha: bool, if the website has captcha, default False;
+    autocaptcha: str, API key from https://ocr.space/OCRAPI, default '';
+    '''
+
+    def __init__(self, form_type:str, website:str, search_link:str, captcha_addition="", captcha=False, autocaptcha=""):
+        self.form_type = form_type
+        self.website = website
+        self.search_link = search_link
+        self.captcha_addition = captcha_addition
+        self.captcha = captcha
+        self.autocaptcha = autocaptcha
+        self._lock = threading.Lock()
+
+    def list_page(self, browser, i:int) -> tuple:
+        '''
+        Getting case ids on one page of the search results
+        Raises WebDriverException or requests.RequestException if the page is not loaded
+        Returns a tuple (list of case ids, status): "ok" or "not_found" (no table with results)
+        '''
+
+        form = _FORMS[self.form_type]
+        page_addition = f'&{form["page_param"]}={i}'
+
+        used_addition = self.captcha_addition
+        page_source, el_found = _load_page(browser,self.search_link + used_addition + page_addition,"ID",form["results_element"],from_cache=False,to_cache=False)
+
+        # if there's no table content found
+        # check if it is because of captcha
+        if el_found == False and self.captcha == True and _element_in_source(page_source,"ID","error"):
+            with self._lock:
+                # getting new captcha, unless another thread has just got it
+                if self.captcha_addition == used_addition:
+                    self.captcha_addition = form["captcha"](browser,self.website,self.autocaptcha)
+            # trying one more time
+            page_source, el_found = _load_page(browser,self.search_link + self.captcha_addition + page_addition,"ID",form["results_element"],from_cache=False,to_cache=False)
+
+        if el_found == False:
+            return [], "not_found"
+
+        soup = _parse_html(page_source, form["ids_regions"])
+
+        return form["cases_ids_per_page"](soup), "ok"
+
+class CasePipeline:
+    '''
+    Loading and parsing cases from pages of the search results in stages connected by bounded queues, so that waiting for websites and parsing overlap:
+    listing (a thread with a window of pages loaded at the same time: pages of the search results -> case ids) -> fetching (threads: case ids -> html of case pages)
+    -> parsing (a thread or worker processes: html -> case data) -> writing (the caller: cases and finished pages in the order of pages)
+    form_type: str, 'form1' or 'form2';
+    browser: WebDriver or requests.Session; a driver is used by one thread at a time, a session by all fetching threads;
+    website, server: str;
+    search_results: _SearchResults, pages of the search results;
+    fetch_workers: int, N of threads loading case pages, default 1 (always 1 for a driver); as many threads load pages of the search results, at most 2 x fetch_workers pages ahead;
+    parse_workers: int, N of processes parsing case pages, default 0 (parsing in one thread);
+    queue_size: int, max N of cases between listing and writing; listing waits when it is reached (backpressure), default 100;
+    skip_ids: set, case ids not to load (for example, already written), default None;
+    browser_pool: BrowserPool, the pool of the driver, to replace it if it crashes, default None;
+    Usage: for event, page, item in pipeline.run(pages): event is "case" (item is case data) or "page" (item is the page status: "ok", "not_found" or "error", after all its cases);
+    'metrics' has per stage ("listing", "fetching", "parsing", "writing"): N items, seconds busy and seconds waiting for the next stage ("blocked_sec")
+    '''
+
+    def __init__(self, form_type:str, browser, website:str, server:str, search_results, fetch_workers=1, parse_workers=0, queue_size=100, skip_ids=None, browser_pool=None):
+        self.form_type = form_type
+        self.browser = browser
+        self.website = website
+        self.server = server
+        self.search_results = search_results
+        self.is_session = isinstance(browser, requests.Session)
+        self.fetch_workers = fetch_workers if self.is_session else 1
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.skip_ids = skip_ids if skip_ids != None else set()
+        self.browser_pool = browser_pool
+        self.metrics = {stage: {"items": 0, "busy_sec": 0.0, "blocked_sec": 0.0} for stage in ["listing", "fetching", "parsing", "writing"]}
+        self._metrics_lock = threading.Lock()
+        # a driver can load one page at a time
+        self._browser_lock = threading.Lock()
+
+    def _count(self, stage:str, busy=0.0, blocked=0.0, items=0):
+        with self._metrics_lock:
+            self.metrics[stage]["items"] += items
+            self.metrics[stage]["busy_sec"] += busy
+            self.metrics[stage]["blocked_sec"] += blocked
+
+    def _load(self, function, *args):
+        # sessions are shared by threads, drivers are not
+        if self.is_session:
+            return function(self.browser, *args)
+
+        with self._browser_lock:
+            try:
+                return function(self.browser, *args)
+            except _FETCH_ERRORS:
+                # replacing the driver if it crashed
+                if self.browser_pool != None:
+                    self.browser = self.browser_pool.revive(self.browser)
+                raise
+
+    def _put(self, q, item, stage:str):
+        # waiting for the next stage, unless the pipeline is stopped
+        start = time.perf_counter()
+        while self._stop.is_set() == False:
+            try:
+                q.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        self._count(stage, blocked=time.perf_counter() - start)
+
+    def _list_page(self, page:int) -> tuple:
+        try:
+            case_ids, status = self._load(self.search_results.list_page, page)
+        except _FETCH_ERRORS:
+            case_ids, status = [], "error"
+
+        return [case_id for case_id in case_ids if case_id not in self.skip_ids], status
+
+    def _listing(self, pages:list):
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+                in_progress = {}
+                n_submitted = 0
+
+                for page in pages:
+                    # keeping a bounded window of pages ahead of the page to be queued
+                    while self._stop.is_set() == False and n_submitted < len(pages) and len(in_progress) < 2 * self.fetch_workers:
+                        in_progress[pages[n_submitted]] = executor.submit(_timed, self._list_page, pages[n_submitted])
+                        n_submitted += 1
+                    if self._stop.is_set():
+                        break
+
+                    (case_ids, status), listing_sec = in_progress.pop(page).result()
+                    self._count("listing", busy=listing_sec, items=1)
+
+                    self._put(self._pages, (page, case_ids, status), "listing")
+
+                    for n, case_id in enumerate(case_ids):
+                        # at most 'queue_size' cases are between listing and writing
+                        start = time.perf_counter()
+                        while self._stop.is_set() == False and self._slots.acquire(timeout=0.5) == False:
+                            continue
+                        self._count("listing", blocked=time.perf_counter() - start)
+                        self._put(self._to_fetch, (page, n, case_id), "listing")
+
+        # any error is passed to the caller
+        except BaseException as e:
+            self._put(self._pages, (None, [], e), "listing")
+            return
+
+        self._put(self._pages, (None, [], None), "listing")
+
+    def _fetching(self, parse_executor):
+        while self._stop.is_set() == False:
+            try:
+                item = self._to_fetch.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            page, n, case_id = item
+            start = time.perf_counter()
+            try:
+                page_source = self._load(lambda browser: _fetch_case_page(self.form_type, browser, self.website, self.server, case_id))
+                result = parse_executor.submit(_timed, _parse_case_page, self.form_type, page_source, case_id, PARSER_BACKEND)
+            # any error is passed to the caller
+            except BaseException as e:
+                result = e
+            self._count("fetching", busy=time.perf_counter() - start, items=1)
+
+            with self._done_condition:
+                self._done[(page, n)] = result
+                self._done_condition.notify_all()
+
+    def _wait_for_case(self, page:int, n:int):
+        start = time.perf_counter()
+        with self._done_condition:
+            while (page, n) not in self._done:
+                self._done_condition.wait(timeout=0.5)
+            result = self._done.pop((page, n))
+        self._count("writing", blocked=time.perf_counter() - start)
+
+        return result
+
+    def run(self, pages:list):
+        '''
+        Loading cases of the pages of the search results
+        Yields tuples ("case", page, case data) and ("page", page, status) in the order of pages
+        '''
+
+        self._stop = threading.Event()
+        self._pages = queue.Queue(maxsize=self.queue_size)
+        self._to_fetch = queue.Queue(maxsize=self.queue_size)
+        self._slots = threading.Semaphore(self.queue_size)
+        self._done = {}
+        self._done_condition = threading.Condition()
+
+        if self.parse_workers > 0:
+            parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        else:
+            parse_executor = ThreadPoolExecutor(max_workers=1)
+
+        listing_thread = threading.Thread(target=self._listing, args=(pages,), daemon=True)
+        fetching_threads = [threading.Thread(target=self._fetching, args=(parse_executor,), daemon=True) for i in range(self.fetch_workers)]
+
+        listing_thread.start()
+        for thread in fetching_threads:
+            thread.start()
+
+        try:
+            while True:
+                start = time.perf_counter()
+                page, case_ids, status = self._pages.get()
+                self._count("writing", blocked=time.perf_counter() - start)
+
+                # all pages are listed
+                if page == None:
+                    if isinstance(status, BaseException):
+                        raise status
+                    break
+
+                for n, case_id in enumerate(case_ids):
+                    result = self._wait_for_case(page, n)
+                    self._slots.release()
+
+                    if isinstance(result, _FETCH_ERRORS):
+                        # the page is recorded as not parsed, the next cases are still loaded
+                        status = "error"
+                        continue
+                    if isinstance(result, BaseException):
+                        raise result
+
+                    start = time.perf_counter()
+                    case, parsing_sec = result.result()
+                    self._count("writing", blocked=time.perf_counter() - start)
+                    self._count("parsing", busy=parsing_sec, items=1)
+
+                    start = time.perf_counter()
+                    yield "case", page, case
+                    self._count("writing", busy=time.perf_counter() - start, items=1)
+
+                yield "page", page, status
+
+        finally:
+            self._stop.set()
+            listing_thread.join()
+            for thread in fetching_threads:
+                thread.join()
+            parse_executor.shutdown()
+
+def _get_cases_texts(form_type:str, browser, website:str, region:str, court_code:str, start_date:str, end_date:str, srv_num=['1'], path_to_save='', captcha=False, autocaptcha="", engine="browser", browser_pool=None, output_format="json", checkpoint=True, incremental=False, page_workers=1, parse_workers=0, sink=None):
+    '''
+    Getting all court cases on one website in the indicated date range; the common part of '_get_cases_texts_f1' and '_get_cases_texts_f2'
+    form_type: str, 'form1' or 'form2';
+    browser: selenium.webdriver.chrome.webdriver.WebDriver (the output of '_set_browser') or requests.Session (the output of '_set_session');
+    court_code: str, required for form2 websites;
+    engine: str, "browser" or "http", the engine 'browser' belongs to, default "browser";
+    browser_pool: BrowserPool, the pool 'browser' was acquired from; crashed drivers are replaced from it, default None;
+    output_format: str, "json" or "jsonl" (see '_CasesWriter' and '_JsonlCasesWriter'), default "json";
+    checkpoint: bool, keeping the progress of every server in '{results file}.checkpoint.json', so that an interrupted crawl with the same date range is resumed from the page where it stopped, default True;
+    (a checkpoint: {"website", "start_date", "end_date", "output_format", "num_cases", "num_pages", "pages_done": [1, 2, ...], "logs": {...}, "captcha_addition": str}; it is removed when the server is parsed)
+    incremental: bool, loading only the cases that are not in the existing results file of the server and adding them to it, default False;
+    page_workers: int, N of case pages loaded at the same time if 'browser' is a requests.Session, default 1; cases are saved in the same order as with 1 worker;
+    parse_workers: int, N of processes parsing case pages, default 0 (parsing in a thread, while the next pages are loaded);
+    sink: SqliteSink, cases are added to it too, default None; with 'incremental', the cases of the server stored in it are not loaded either;
+    The pages after the first one are loaded with 'CasePipeline'; its metrics are returned in "pipeline_metrics_by_server";
+    With the HTTP engine, a form2 website is given up as soon as its pages have no search results table or case tabs (the website renders them with JavaScript)
+    Saves json (or jsonl) files with all parsed cases per website's server; Logs errors and pages that were not parsed;
+    Returns a dict with info about N cases found per server; returns str 'browser_required' if a form2 website cannot be parsed with the HTTP engine
+    '''
+
+    form = _FORMS[form_type]
+    check_http_form2 = engine == "http" and form_type == "form2"
+    # N of loaded search results pages rendered with JavaScript; one can be a glitch of the website, so the browser is needed after two
+    n_js_pages = 0
+
+    year = start_date.split('.')[-1]
+    return_dict = {website:{"year":year,"n_cases_by_server":{}}}
+
+    # Iterating over servers
+    for server in srv_num:
+
+        num_cases = 0
+        logs = {}
+        file_base = _results_file_base(path_to_save, region, website, server, year)
+
+        # the progress of an interrupted crawl
+        state = _read_checkpoint(file_base, website, start_date, end_date, output_format) if checkpoint == True else None
+        writer = _cases_writer(file_base, website, output_format, checkpoint, resume=state != None, incremental=incremental)
+
+        # cases collected before into the database (incremental crawl)
+        stored_ids = set()
+        if sink != None:
+            writer = _SinkCasesWriter(writer, sink, website, server, region, year)
+            if incremental == True:
+                stored_ids = sink.case_keys(website=website, srv=server)
+
+        search_link = _search_link(form_type, website, server, start_date, end_date, court_code)
+        link_to_site = search_link
+        captcha_addition = ""
+
+        if state != None:
+            # the first page was parsed, N cases and pages are known
+            num_cases = state["num_cases"]
+            logs = state["logs"]
+            captcha_addition = state["captcha_addition"]
+            link_to_site = search_link + captcha_addition
+
+        # checking captcha
+        elif captcha == True:
+            captcha_addition = form["captcha"](browser,website,autocaptcha)
+            link_to_site += captcha_addition
+
+        # try to load the website content 3 times
+        tries = 0
+
+        while state == None and tries <= 3:
+            try:
+                # cases of a failed attempt are collected again
+                writer.reset()
+
+                # explicitly waiting for the results table
+                # search results are not cached, new cases have to be seen
+                page_source, el_found = _load_page(browser,link_to_site,"ID",form["results_element"],from_cache=False,to_cache=False)
+
+                # form2 search results are not in the html, a browser is needed
+                if el_found == False and check_http_form2 and _rendered_with_javascript(page_source):
+                    n_js_pages += 1
+                    if n_js_pages >= 2:
+                        writer.discard()
+                        return "browser_required"
+
+                # if there is a table with results
+                if el_found == True:
+
+                    soup = _parse_html(page_source, form["listing_regions"])
+
+                    stats = form["num_cases_pages"](soup)
+                    num_cases = stats[0]
+                    num_pages = stats[1]
+
+                    logs["cases_found"] = "True"
+                    logs["driver_error"] = "False"
+                    logs["pagination_error"] = []
+
+                    # getting cases on the first page
+                    # this will be all the cases for 1 page results
+                    # first, getting all the cases ids on the page
+                    cases_ids_on_page = form["cases_ids_per_page"](soup)
+
+                    # iterating over cases and colecting texts
+                    first_case = True
+                    for case_id in cases_ids_on_page:
+                        # collected before (incremental crawl)
+                        if case_id in writer.written_ids or case_id in stored_ids:
+                            continue
+
+                        results_per_case = _get_one_case(form_type, browser, website, server, case_id)
+
+                        # form2 case tabs are not in the html, a browser is needed (the page is checked once more, so that a failed load is not taken for it)
+                        if check_http_form2 and first_case and results_per_case["case_found"] == "False":
+                            page_source = _load_page(browser,_case_link(form_type, website, server, case_id),form["case_by"],form["case_element"],from_cache=False)[0]
+                            if _rendered_with_javascript(page_source):
+                                writer.discard()
+                                return "browser_required"
+
+                        writer.add(results_per_case)
+                        first_case = False
+
+                    state = {"website": website, "start_date": start_date, "end_date": end_date, "output_format": output_format,
+                             "num_cases": num_cases, "num_pages": num_pages, "pages_done": [1], "logs": logs, "captcha_addition": captcha_addition}
+                    if checkpoint == True:
+                        _save_checkpoint(file_base, state)
+
+                    # the first page is parsed, stop trying, break the while loop
+                    break
+
+                # no cases found (no results, error, or time out)
+                else:
+                    tries += 1
+
+                    logs["cases_found"] = "False"
+                    logs["driver_error"] = "False"
+                    logs["pagination_error"] = []
+
+                    #try again
+                    continue
+
+            except _FETCH_ERRORS:
+                tries += 1
+
+                logs["cases_found"] = "False"
+                logs["driver_error"] = "True"
+                logs["pagination_error"] = []
+
+                if browser_pool != None:
+                    browser = browser_pool.revive(browser)
+
+                #try again
+                continue
+
+        # the next pages of the search results
+        if state != None:
+            # the cases of the first page are not dropped any more
+            writer.keep_written()
+
+            search_results = _SearchResults(form_type, website, search_link, state["captcha_addition"], captcha, autocaptcha)
+            # parsed before the crawl was interrupted or collected before (incremental crawl)
+            pipeline = CasePipeline(form_type, browser, website, server, search_results, fetch_workers=page_workers,
+                                    parse_workers=parse_workers, skip_ids=writer.written_ids | stored_ids, browser_pool=browser_pool)
+
+            # parsed before the crawl was interrupted
+            pages = [i for i in range(2,state["num_pages"]+1) if i not in state["pages_done"]]
+
+            # cases and pages come in the order of pages, so the output is the same for any N of workers
+            for event, i, item in pipeline.run(pages):
+
+                if event == "case":
+                    if item["case_id_uid"] not in writer.written_ids and item["case_id_uid"] not in stored_ids:
+                        writer.add(item)
+                    continue
+
+                if item == "not_found":
+                    logs['pagination_error'].append(i)
+
+                if item == "error":
+                    # recording the N of page that couldn't be loaded
+                    logs["driver_error"] = "True"
+                    logs["pagination_error"].append(i)
+
+                state["pages_done"].append(i)
+                state["captcha_addition"] = search_results.captcha_addition
+                if checkpoint == True:
+                    _save_checkpoint(file_base, state)
+
+            # the driver could be replaced
+            browser = pipeline.browser
+            return_dict[website].setdefault("pipeline_metrics_by_server", {})[server] = pipeline.metrics
+
+        writer.close(num_cases, logs)
+        _remove_checkpoint(file_base)
+
+        return_dict[website]["n_cases_by_server"][server] = num_cases
+
+    return return_dict
+
+def benchmark_parsing(page_source:str, form_type:str, page="case", backends=None, repeat=5) -> dict:
+    '''
+    Comparing parsing of a whole page with parsing of only the regions the page parsers read (see '_parse_html')
+    page_source: str, html of a saved page;
+    form_type: str, 'form1' or 'form2';
+    page: str, 'listing' (the first page of search results), 'ids' (the next pages of search results) or 'case', default 'case';
+    backends: list of parser backends (see 'set_parser_backend'), default all installed;
+    repeat: int, N of runs, the best time is taken, default 5;
+    Peak memory is measured with tracemalloc, so memory allocated by lxml and selectolax outside of Python is not counted
+    Returns a dict, for example {"bs4": {"full_sec": 0.92, "partial_sec": 0.11, "full_peak_kb": 41250, "partial_peak_kb": 5120, "same_results": True}}
+    '''
+
+    global PARSER_BACKEND
+
+    form = _FORMS[form_type]
+    regions = form[f"{page}_regions"]
+
+    if page == "listing":
+        extract = lambda soup: (form["num_cases_pages"](soup), form["cases_ids_per_page"](soup))
+    elif page == "ids":
+        extract = form["cases_ids_per_page"]
+    else:
+        extract = form["one_case_text"]
+
+    if backends == None:
+        backends = [b for b in _PARSERS if (b != "lxml" or lxml != None) and (b != "selectolax" or LexborHTMLParser != None)]
+
+    initial_backend = PARSER_BACKEND
+    benchmark = {}
+
+    try:
+        for backend in backends:
+            set_parser_backend(backend)
+            benchmark[backend] = {}
+            results = {}
+
+            for mode, mode_regions in [("full", None), ("partial", regions)]:
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    results[mode] = extract(_parse_html(page_source, mode_regions))
+                    times.append(time.perf_counter() - start)
+
+                tracemalloc.start()
+                extract(_parse_html(page_source, mode_regions))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                benchmark[backend][f"{mode}_sec"] = round(min(times), 4)
+                benchmark[backend][f"{mode}_peak_kb"] = peak // 1024
+
+            benchmark[backend]["same_results"] = results["full"] == results["partial"]
+    finally:
+        PARSER_BACKEND = initial_backend
+
+    return benchmark
+
+### The main parser function ###
+
+def get_cases(website:str, region:str, start_date:str, end_date:str, path_to_driver:str, court_code="", srv_num=['1'], path_to_save="", apikey="", engine="browser", browser_pool=None, site_profiles_path=SITE_PROFILES_PATH, profile_ttl_days=30, output_format="json", checkpoint=True, incremental=False, page_workers=1, parse_workers=0, sink=None):
+    '''
+    Getting texts of court decisions with metadata on one website for the indicated date range
+    region: str, region code; use keys in 'https://github.com/dataout-org/sudrfparser/blob/main/courts_info/sudrf_websites.json'
+    Dates to indicate a date range in which to look for cases:
+    (for example, the range 01.01.2021 and 31.12.2021 will get all the cases registered in a court in 2021)
+        start_date: str, date of cases registration in a court, 'DD.MM.YYYY';
+        end_date: str, date of cases registration in a court, 'DD.MM.YYYY';
+    path_to_driver: str, path to Chrome driver;
+    court_code: str, required for form2 websites; to retrieve the codes, use 'https://raw.githubusercontent.com/dataout-org/sudrfparser/main/courts_info/sudrf_websites.json'; default '';
+    srv_num: list, servers where to look for cases, default ['1']; one website can have multiple servers with criminal cases of the first instance;
+    path_to_save: str, path where to save the results, default '' (the same directory of the script execution; note that there can be a lot of large json files);
+    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default ''; keep default if entering captcha manually;
+    engine: str, "browser" to load pages with Chrome or "http" to load pages without a browser (much faster), default "browser"; with "http", form2 websites that render results with JavaScript fall back to Chrome (and are marked in the website's profile);
+    browser_pool: BrowserPool, Chrome drivers to reuse between websites (see 'BrowserPool'), default None (drivers are started for the website and quit afterwards);
+    site_profiles_path: str, json file where websites' form types and captcha are kept between calls, default SITE_PROFILES_PATH ('~/.sudrfparser/site_profiles.json'); '' to check the website every time;
+    profile_ttl_days: int, N of days after which a website's profile is checked again, default 30;
+    output_format: str, "json" to save all cases of a server in one json file when the server is parsed, or "jsonl" to append every case to '{file}.jsonl' as soon as it is parsed (constant memory, cases are kept if parsing is interrupted) with the logs in '{file}.logs.json'; default "json";
+    checkpoint: bool, keeping the progress of every server in '{file}.checkpoint.json' (pages done, captcha) with cases streamed to disk, so that calling 'get_cases' again with the same dates after a crash resumes from where it stopped; the checkpoint is removed when the server is parsed; default True;
+    incremental: bool, for re-crawling: search results are walked as usual, but only cases that are not in the existing results files (same website, server and year) are loaded, and they are added to these files; default False;
+    page_workers: int, N of case pages of one server loaded at the same time with the "http" engine, default 1; requests to one host are still limited by RATE_LIMITER (see 'configure_rate_limits'), so raise its rate for the host as well;
+    parse_workers: int, N of processes parsing case pages, default 0 (parsing in a thread); pages of the search results, case pages, parsing and saving are separate stages working at the same time (see 'CasePipeline'), processes help when parsing is slower than loading;
+    sink: SqliteSink, a database where cases are added too (see 'SqliteSink'), default None; with 'incremental', cases already in the database are not loaded either;
+    Saves json files with all parsed cases per website's server (for example, if there are 2 servers on one website, there will be 2 json files); Logs errors and pages that were not parsed;
+    Returns a dict with info about N cases found per server (if parsed successfully); returns a status str if parsing is failed;
+    '''
+
+    pool = browser_pool if browser_pool != None else BrowserPool(path_to_driver, max_idle=1)
+    browser = None
+
+    # the form type and captcha are known from the previous calls
+    profile = _cached_site_profile(website, site_profiles_path, profile_ttl_days)
+    profile_is_cached = profile != None
+
+    try:
+        # request the website soup
+        # feed soup to check captcha and form
+        # try to load the website content 3 times
+        tries = 0
+
+        while profile == None and tries <= 3:
+            try:
+                if browser == None:
+                    browser = _set_session(max(10, page_workers)) if engine == "http" else pool.acquire()
+
+                profile = _probe_site_profile(browser, website, "1", site_profiles_path)[0]
+
+                # no web driver error, but content was not loaded
+                if profile == None:
+                    tries += 1
+
+            # web driver error, try again
+            except _FETCH_ERRORS:
+                tries += 1
+                if isinstance(browser, requests.Session) == False:
+                    browser = pool.revive(browser)
+
+        # give up if conent is still not loaded after 3 tries
+        if profile == None:
+            return f"Failed to load content of {website}"
+
+        form_type = profile["form_type"]
+        captcha = profile["captcha"]
+
+        # parser for form1
+        if form_type == "form1":
+            # giving the driver back, form1 is parsed with images and JavaScript off in a driver of its own
+            if browser != None and isinstance(browser, requests.Session) == False:
+                pool.release(browser)
+                browser = None
+
+            results = _get_cases_texts_f1(website, region, start_date, end_date, path_to_driver, srv_num, path_to_save, captcha=(captcha == "True"), autocaptcha=apikey, engine=engine, browser_pool=pool, output_format=output_format, checkpoint=checkpoint, incremental=incremental, page_workers=page_workers, parse_workers=parse_workers, sink=sink)
+
+        # parser for form2
+        if form_type == "form2":
+
+            form2_engine = engine
+            # the website is known to render search results with JavaScript
+            if engine == "http" and _needs_browser(profile, profile_ttl_days):
+                form2_engine = "browser"
+
+            if form2_engine == "http":
+                if browser == None:
+                    browser = _set_session(max(10, page_workers))
+
+                results = _get_cases_texts_f2(browser, website, region, court_code, start_date, end_date, path_to_driver, srv_num, path_to_save, captcha=(captcha == "True"), autocaptcha=apikey, engine="http", output_format=output_format, checkpoint=checkpoint, incremental=incremental, page_workers=page_workers, parse_workers=parse_workers, sink=sink)
+
+                # falling back to the browser
+                if results == "browser_required":
+                    profile["needs_browser"] = True
+                    profile["needs_browser_at"] = int(time.time())
+                    form2_engine = "browser"
+
+            if form2_engine == "browser":
+                if isinstance(browser, requests.Session):
+                    browser.close()
+                    browser = None
+                if browser == None:
+                    browser = pool.acquire()
+
+                results = _get_cases_texts_f2(browser, website, region, court_code, start_date, end_date, path_to_driver, srv_num, path_to_save, captcha=(captcha == "True"), autocaptcha=apikey, browser_pool=pool, output_format=output_format, checkpoint=checkpoint, incremental=incremental, page_workers=page_workers, parse_workers=parse_workers, sink=sink)
+
+        # no point in trying because websites with other forms are not parsed
+        if form_type == "other":
+            results = f"{website} cannot be parsed"
+
+        # keeping servers with cases in the profile
+        if isinstance(results, dict):
+            n_cases_by_server = results[website]["n_cases_by_server"]
+            srv_with_cases = set(profile.get("srv_with_cases", []))
+            srv_with_cases.update(server for server, n_cases in n_cases_by_server.items() if n_cases > 0)
+            profile["srv_with_cases"] = sorted(srv_with_cases, key=int)
+
+            # nothing found with a saved profile: the form or captcha might have changed, check it next time
+            if profile_is_cached and sum(n_cases_by_server.values()) == 0:
+                profile["checked_at"] = 0
+
+        _save_site_profile(website, profile, site_profiles_path)
+
+    finally:
+        if isinstance(browser, requests.Session):
+            browser.close()
+        elif browser != None:
+            pool.release(browser)
+
+        if browser_pool == None:
+            pool.close()
+
+    return results
+
+
+### Partitioning date ranges of large courts ###
+
+def _split_date_range(start_date:str, end_date:str, unit:str) -> list:
+    '''
+    Splitting a date range into calendar months, weeks (7 days from the start date) or days
+    unit: str, "month", "week" or "day";
+    Returns a list of tuples (start_date, end_date), 'DD.MM.YYYY', both dates included
+    '''
+
+    start = datetime.datetime.strptime(start_date, "%d.%m.%Y").date()
+    end = datetime.datetime.strptime(end_date, "%d.%m.%Y").date()
+    ranges = []
+
+    while start <= end:
+        if unit == "month":
+            next_start = (start.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        elif unit == "week":
+            next_start = start + datetime.timedelta(days=7)
+        else:
+            next_start = start + datetime.timedelta(days=1)
+
+        range_end = min(next_start - datetime.timedelta(days=1), end)
+        ranges.append((start.strftime("%d.%m.%Y"), range_end.strftime("%d.%m.%Y")))
+        start = next_start
+
+    return ranges
+
+def _count_cases(browser, form_type:str, website:str, server:str, start_date:str, end_date:str, court_code="", captcha_addition="", captcha=False, autocaptcha="", tries=3) -> tuple:
+    '''
+    Getting N cases found on a website's server in a date range from the first page of the search results;
+    the page is loaded again after errors and error pages, with a new captcha if it has expired (as in '_SearchResults')
+    captcha_addition: str, the current captcha part of the link, default '';
+    captcha: bool, if the website has captcha, default False;
+    autocaptcha: str, API key from https://ocr.space/OCRAPI, default '';
+    tries: int, N of times the page is loaded again, default 3;
+    Returns a tuple (N cases, captcha_addition): N cases is 0 for an empty search result and None if it is unknown (the page is not loaded or is an error page)
+    '''
+
+    form = _FORMS[form_type]
+    search_link = _search_link(form_type, website, server, start_date, end_date, court_code)
+
+    for attempt in range(tries + 1):
+        try:
+            page_source, el_found = _load_page(browser,search_link + captcha_addition,"ID",form["results_element"],from_cache=False,to_cache=False)
+
+            if el_found == True:
+                return form["num_cases_pages"](_parse_html(page_source, form["listing_regions"]))[0], captcha_addition
+
+            # getting new captcha if it has expired, then trying again
+            if captcha == True and _element_in_source(page_source,"ID","error"):
+                captcha_addition = form["captcha"](browser,website,autocaptcha)
+                continue
+
+        except _FETCH_ERRORS:
+            continue
+
+        # no table with results: an empty search result says that nothing is found, an error page or a timeout doesn't
+        if "найдено" in page_source.lower():
+            return 0, captcha_addition
+
+    return None, captcha_addition
+
+def plan_date_partitions(website:str, start_date:str, end_date:str, path_to_driver="", court_code="", server="1", max_cases=1000, apikey="", engine="http", browser_pool=None, site_profiles_path=SITE_PROFILES_PATH, profile_ttl_days=30) -> list:
+    '''
+    Splitting a date range of one website's server into months, then weeks, then days, until every part has no more than 'max_cases' cases
+    (a day with more cases is not split); N cases are taken from the first page of the search results of every part; if N cases of any part stays unknown after retries, there is no plan
+    website: str, website address;
+    Dates: 'DD.MM.YYYY';
+    path_to_driver: str, path to Chrome driver, required for the "browser" engine, default '';
+    court_code: str, required for form2 websites, default '';
+    server: str, default "1";
+    max_cases: int, max N cases in one part, default 1000;
+    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default '';
+    engine: str, "http" or "browser", default "http"; form2 websites that render results with JavaScript are counted with the browser;
+    browser_pool: BrowserPool, drivers to reuse, default None;
+    Returns a list of tuples (start_date, end_date, N cases); [] if the website is not loaded or cannot be parsed
+    '''
+
+    pool = browser_pool if browser_pool != None else BrowserPool(path_to_driver, max_idle=1)
+    browser = None
+
+    try:
+        profile = _cached_site_profile(website, site_profiles_path, profile_ttl_days)
+        browser = _set_session() if engine == "http" else pool.acquire()
+
+        tries = 0
+        while profile == None and tries <= 3:
+            try:
+                profile = _probe_site_profile(browser, website, server, site_profiles_path)[0]
+            except _FETCH_ERRORS:
+                pass
+            tries += 1
+
+        if profile == None or profile["form_type"] not in _FORMS:
+            return []
+
+        form_type = profile["form_type"]
+
+        # form2 results rendered with JavaScript
+        if form_type == "form2" and _needs_browser(profile, profile_ttl_days) and isinstance(browser, requests.Session):
+            browser.close()
+            browser = pool.acquire()
+
+        captcha = profile["captcha"] == "True"
+        captcha_addition = ""
+        if captcha == True:
+            try:
+                captcha_addition = _FORMS[form_type]["captcha"](browser,website,apikey)
+            except _FETCH_ERRORS:
+                return []
+
+        # None if N cases of a part is unknown: the plan would be wrong
+        def plan(range_start:str, range_end:str, n_cases:int):
+            nonlocal captcha_addition
+
+            if n_cases <= max_cases:
+                return [(range_start, range_end, n_cases)]
+
+            # the largest unit that splits the range
+            for unit in ["month", "week", "day"]:
+                parts = _split_date_range(range_start, range_end, unit)
+                if len(parts) > 1:
+                    break
+            else:
+                return [(range_start, range_end, n_cases)]
+
+            partitions = []
+            for part_start, part_end in parts:
+                part_n_cases, captcha_addition = _count_cases(browser, form_type, website, server, part_start, part_end, court_code, captcha_addition, captcha, apikey)
+                part_plan = plan(part_start, part_end, part_n_cases) if part_n_cases != None else None
+                if part_plan == None:
+                    return None
+                partitions.extend(part_plan)
+
+            return partitions
+
+        n_cases, captcha_addition = _count_cases(browser, form_type, website, server, start_date, end_date, court_code, captcha_addition, captcha, apikey)
+        partitions = plan(start_date, end_date, n_cases) if n_cases != None else None
+
+        return partitions if partitions != None else []
+
+    finally:
+        if isinstance(browser, requests.Session):
+            browser.close()
+        elif browser != None:
+            pool.release(browser)
+
+        if browser_pool == None:
+            pool.close()
+
+def _partition_is_done(partition_dir:str) -> bool:
+    '''
+    Checking if a partition was parsed without errors
+    '''
+
+    if os.path.isdir(partition_dir) == False:
+        return False
+
+    results_files = [f for f in listdir(partition_dir) if _is_results_file(f)]
+    if len(results_files) == 0 or isfile(join(partition_dir, results_files[0].split(".")[0] + ".checkpoint.json")):
+        return False
+
+    for results in _read_results_logs(join(partition_dir, results_files[0])).values():
+        if results["logs"]["driver_error"] == "True" or len(results["logs"]["pagination_error"]) > 0:
+            return False
+
+    return True
+
+def get_cases_partitioned(website:str, region:str, start_date:str, end_date:str, path_to_driver:str, court_code="", srv_num=['1'], path_to_save="", apikey="", engine="browser", max_cases=1000, n_workers=1, retries=1, output_format="json", site_profiles_path=SITE_PROFILES_PATH, profile_ttl_days=30) -> dict:
+    '''
+    Getting texts of court decisions with metadata on one website for the indicated date range split into parts (see 'plan_date_partitions'); for courts with many cases
+    Every part is parsed by 'get_cases' into its own directory '{results file}_partitions/{start_date}_{end_date}/'; parts can be parsed in parallel,
+    parts with errors are parsed again (only missing cases are loaded), then all parts are merged into the usual results file of the server
+    The parameters are the same as in 'get_cases', and:
+    max_cases: int, max N cases in one part, default 1000;
+    n_workers: int, N of parts parsed at the same time, default 1;
+    retries: int, N of times parts with errors are parsed again, default 1;
+    Parts that still have errors are listed in the logs of the results file as "partition_errors": [{"start_date", "end_date", "driver_error", "pagination_error"}],
+    and the directory with parts is kept, so that calling the function again parses only these parts; otherwise the directory is removed
+    Returns a dict with info about N cases found per server and the parts {website: {"year", "n_cases_by_server", "partitions_by_server": {server: [[start_date, end_date, N cases]]}}} (N cases is None if the range could not be planned)
+    '''
+
+    year = start_date.split('.')[-1]
+    return_dict = {website:{"year":year,"n_cases_by_server":{},"partitions_by_server":{}}}
+
+    browser_pool = BrowserPool(path_to_driver, max_idle=n_workers)
+
+    try:
+        for server in srv_num:
+
+            file_base = _results_file_base(path_to_save, region, website, server, year)
+            partitions_dir = f"{file_base}_partitions"
+            plan_path = join(partitions_dir, "plan.json")
+
+            # the plan of the interrupted call
+            partitions = None
+            if isfile(plan_path):
+                with open(plan_path, 'r') as jf:
+                    saved_plan = json.load(jf)
+                if [saved_plan["start_date"], saved_plan["end_date"], saved_plan["max_cases"]] == [start_date, end_date, max_cases]:
+                    partitions = saved_plan["partitions"]
+
+            if partitions == None:
+                partitions = [list(partition) for partition in plan_date_partitions(website, start_date, end_date, path_to_driver, court_code, server, max_cases, apikey, engine, browser_pool, site_profiles_path, profile_ttl_days)]
+
+                # no plan (N cases are unknown): the whole range is one part, the plan is not saved, so that the next call plans again
+                if len(partitions) == 0:
+                    partitions = [[start_date, end_date, None]]
+                else:
+                    os.makedirs(partitions_dir, exist_ok=True)
+                    with open(plan_path, 'w') as jf:
+                        json.dump({"start_date": start_date, "end_date": end_date, "max_cases": max_cases, "partitions": partitions}, jf)
+
+            return_dict[website]["partitions_by_server"][server] = partitions
+
+            def partition_dir(partition:list) -> str:
+                return join(partitions_dir, f"{partition[0]}_{partition[1]}")
+
+            def parse_partition(partition:list):
+                os.makedirs(partition_dir(partition), exist_ok=True)
+                return get_cases(website, region, partition[0], partition[1], path_to_driver, court_code, [server], partition_dir(partition) + "/", apikey, engine, browser_pool,
+                                 site_profiles_path, profile_ttl_days, output_format=output_format, incremental=True)
+
+            for attempt in range(retries + 1):
+                to_parse = [partition for partition in partitions if _partition_is_done(partition_dir(partition)) == False]
+                if len(to_parse) == 0:
+                    break
+
+                with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                    list(executor.map(parse_partition, to_parse))
+
+            # merging parts into one results file
+            writer = _cases_writer(file_base, website, output_format)
+            num_cases = 0
+            logs = {"cases_found": "False", "driver_error": "False", "pagination_error": []}
+            partition_errors = []
+
+            for partition in partitions:
+                partition_files = [f for f in listdir(partition_dir(partition)) if _is_results_file(f)] if os.path.isdir(partition_dir(partition)) else []
+
+                if len(partition_files) == 0:
+                    partition_errors.append({"start_date": partition[0], "end_date": partition[1], "driver_error": "True", "pagination_error": []})
+                    continue
+
+                for results in _read_results_file(join(partition_dir(partition), partition_files[0])).values():
+                    num_cases += results["num_cases"]
+                    if results["logs"]["cases_found"] == "True":
+                        logs["cases_found"] = "True"
+                    if results["logs"]["driver_error"] == "True" or len(results["logs"]["pagination_error"]) > 0:
+                        partition_errors.append({"start_date": partition[0], "end_date": partition[1], "driver_error": results["logs"]["driver_error"], "pagination_error": results["logs"]["pagination_error"]})
+                    for case in results["cases"]:
+                        if case["case_id_uid"] not in writer.written_ids:
+                            writer.add(case)
+
+            if len(partition_errors) > 0:
+                logs["driver_error"] = "True"
+                logs["partition_errors"] = partition_errors
+
+            writer.close(num_cases, logs)
+
+            if len(partition_errors) == 0:
+                shutil.rmtree(partitions_dir, ignore_errors=True)
+
+            return_dict[website]["n_cases_by_server"][server] = num_cases
+
+    finally:
+        browser_pool.close()
+
+    return return_dict
+
+
+### Crawling all courts of a region ###
+
+def crawl_region(region_code:str, start_date:str, end_date:str, path_to_driver="", path_to_save="", apikey="", engine="http", max_concurrency=20, max_per_host=2, output_format="json", incremental=False) -> dict:
+    '''
+    Getting texts of court decisions with metadata on all websites of one region for the indicated date range; courts are parsed concurrently in threads
+    region_code: str, region code, a key in 'courts_info/sudrf_websites.json'; for example '78';
+    Dates to indicate a date range in which to look for cases:
+        start_date: str, date of cases registration in a court, 'DD.MM.YYYY';
+        end_date: str, date of cases registration in a court, 'DD.MM.YYYY';
+    path_to_driver: str, path to Chrome driver; required for the "browser" engine and for form2 websites that fall back to the browser, default '';
+    path_to_save: str, path where to save the results, default '';
+    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default '';
+    engine: str, "http" or "browser", see 'get_cases'; default "http";
+    max_concurrency: int, max N of servers parsed at the same time, default 20;
+    max_per_host: int, max N of servers of one host (website domain) parsed at the same time, default 2;
+    output_format: str, "json" or "jsonl", see 'get_cases'; default "json";
+    incremental: bool, loading only cases that are not in the existing results files, see 'get_cases'; default False;
+    Every website's server is parsed by 'get_cases' in a worker thread, so the results files are the same as for 'get_cases'
+    Returns a dict {website: [results of 'get_cases' per server]}; failed servers have a status str
+    '''
+
+    courts = get_court_registry().by_region(region_code)
+
+    host_semaphores = {}
+    for court in courts:
+        host_semaphores.setdefault(urllib.parse.urlsplit(court["court_website"]).netloc, threading.Semaphore(max_per_host))
+
+    def crawl_server(court:dict, server:str):
+        website = court["court_website"]
+
+        with host_semaphores[urllib.parse.urlsplit(website).netloc]:
+            try:
+                return get_cases(website, region_code, start_date, end_date, path_to_driver, court["court_id"], [server], path_to_save, apikey, engine, browser_pool, output_format=output_format, incremental=incremental)
+            # one website shouldn't stop the whole region
+            except Exception as e:
+                return f"Failed to parse {website} (srv {server}): {repr(e)}"
+
+    jobs = [(court, server) for court in courts for server in court["srv"]]
+
+    # servers of one host are spread over the queue, so that threads rarely wait for the host
+    n_jobs_by_host = {}
+    ranks = []
+    for court, server in jobs:
+        host = urllib.parse.urlsplit(court["court_website"]).netloc
+        ranks.append(n_jobs_by_host.get(host, 0))
+        n_jobs_by_host[host] = ranks[-1] + 1
+    jobs = [job for rank, job in sorted(zip(ranks, jobs), key=lambda item: item[0])]
+
+    # drivers for the "browser" engine and form2 websites that fall back to the browser
+    browser_pool = BrowserPool(path_to_driver, max_idle=max_concurrency)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            results = list(executor.map(lambda job: crawl_server(*job), jobs))
+    finally:
+        browser_pool.close()
+
+    results_by_website = {}
+    for (court, server), result in zip(jobs, results):
+        results_by_website.setdefault(court["court_website"], []).append(result)
+
+    return results_by_website
+
+
+### Crawling courts in parallel processes ###
+
+def _expected_cases_by_website(path_to_save:str) -> dict:
+    '''
+    Getting N cases found per website in the results files saved before (any year); used to balance workers in 'crawl_courts_parallel'
+    Returns a dict {website: N cases}
+    '''
+
+    expected = {}
+    dir_path = path_to_save if path_to_save != "" else "."
+
+    for sites in _index_results_files(dir_path).values():
+        for files_by_srv in sites.values():
+            for file_name in files_by_srv.values():
+                try:
+                    # N cases are read without the cases
+                    for website, results in _read_results_logs(join(dir_path, file_name)).items():
+                        expected[website] = max(expected.get(website, 0), results.get("num_cases", 0))
+                except (ValueError, AttributeError, OSError):
+                    continue
+
+    return expected
+
+def _crawl_shard(jobs:list, start_date:str, end_date:str, path_to_driver:str, path_to_save:str, apikey:str, engine:str, output_format="json", incremental=False) -> list:
+    '''
+    Parsing a list of websites one after another in a worker process of 'crawl_courts_parallel'; the worker has its own drivers
+    jobs: list of tuples (region_code, court); all servers of a website are parsed by the same worker, one after another;
+    Returns a list of tuples (website, result of 'get_cases' or a status str), one per server
+    '''
+
+    browser_pool = BrowserPool(path_to_driver, max_idle=1)
+    results = []
+
+    try:
+        for region_code, court in jobs:
+            website = court["court_website"]
+            for server in court["srv"]:
+                try:
+                    result = get_cases(website, region_code, start_date, end_date, path_to_driver, court["court_id"], [server], path_to_save, apikey, engine, browser_pool, output_format=output_format, incremental=incremental)
+                # one website shouldn't stop the worker
+                except Exception as e:
+                    result = f"Failed to parse {website} (srv {server}): {repr(e)}"
+                results.append((website, result))
+    finally:
+        browser_pool.close()
+
+    return results
+
+def _shard_jobs(jobs:list, regions:list, n_workers:int, shard_by="region", weights={}) -> list:
+    '''
+    Splitting websites between the worker processes of 'crawl_courts_parallel'; a website (all its servers) is always in one shard,
+    so that the requests to a host are limited by one process
+    jobs: list of tuples (region_code, court);
+    regions: list, region codes in the order of the shards for shard_by="region";
+    n_workers: int, max N of shards for shard_by="weight";
+    shard_by: str, "region" or "weight", see 'crawl_courts_parallel'; default "region";
+    weights: dict, expected N of cases per website {website: N} for shard_by="weight", default {} (every website counts as 1 case);
+    Returns a list of shards (lists of jobs), without empty shards
+    '''
+
+    if shard_by == "weight":
+        # the heaviest websites first, each to the least loaded shard
+        shards = [[] for i in range(n_workers)]
+        shard_weights = [0] * n_workers
+        for job in sorted(jobs, key=lambda job: weights.get(job[1]["court_website"], 1), reverse=True):
+            lightest = shard_weights.index(min(shard_weights))
+            shards[lightest].append(job)
+            shard_weights[lightest] += max(weights.get(job[1]["court_website"], 1), 1)
+
+    else:
+        shards = [[job for job in jobs if job[0] == region_code] for region_code in regions]
+
+    return [shard for shard in shards if len(shard) > 0]
+
+def crawl_courts_parallel(start_date:str, end_date:str, regions=[], path_to_driver="", path_to_save="", apikey="", engine="http", n_workers=None, shard_by="region", weights={}, output_format="json", incremental=False) -> dict:
+    '''
+    Getting texts of court decisions with metadata on many websites for the indicated date range; websites are split between worker processes
+    Dates to indicate a date range in which to look for cases:
+        start_date: str, date of cases registration in a court, 'DD.MM.YYYY';
+        end_date: str, date of cases registration in a court, 'DD.MM.YYYY';
+    regions: list, region codes to parse (keys in 'courts_info/sudrf_websites.json'), default [] (all regions);
+    path_to_driver: str, path to Chrome driver; required for the "browser" engine and for form2 websites that fall back to the browser, default '';
+    path_to_save: str, path where to save the results, default '';
+    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default '';
+    engine: str, "http" or "browser", see 'get_cases'; default "http";
+    n_workers: int, N of worker processes, default None (N of CPU cores); can be larger than N of cores since workers mostly wait for websites;
+    shard_by: str, "region" to give whole regions to workers or "weight" to split websites into n_workers shards with an equal expected N of cases, default "region";
+    weights: dict, expected N of cases per website {website: N} for shard_by="weight", default {} (taken from results files in path_to_save; websites without results count as 1 case);
+    output_format: str, "json" or "jsonl", see 'get_cases'; default "json";
+    incremental: bool, loading only cases that are not in the existing results files, see 'get_cases'; default False;
+    Every website's server is parsed by 'get_cases', so the results files are the same as for 'get_cases'; all servers of a website are parsed by one worker
+    Returns a dict {website: [results of 'get_cases' per server]}; failed servers have a status str
+    '''
+
+    registry = get_court_registry()
+    if len(regions) == 0:
+        regions = list(registry.courts_info.keys())
+
+    if n_workers == None:
+        n_workers = os.cpu_count()
+
+    # one job per website with all its servers
+    jobs = [(region_code, court) for region_code in regions for court in registry.by_region(region_code)]
+
+    if shard_by == "weight" and len(weights) == 0:
+        weights = _expected_cases_by_website(path_to_save)
+
+    # shards of jobs, one task per shard
+    shards = _shard_jobs(jobs, regions, n_workers, shard_by, weights)
+
+    results_by_website = {}
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(_crawl_shard, shard, start_date, end_date, path_to_driver, path_to_save, apikey, engine, output_format, incremental) for shard in shards]
+
+        for future in as_completed(futures):
+            for website, result in future.result():
+                results_by_website.setdefault(website, []).append(result)
+
+    return results_by_website
+
+
+### Handling missed pages ###
+
+def _get_missing_pages(dir_path:str,region_code:str,year:str,index=None) -> tuple:
+    '''
+    Getting files with missing pages;
+    index: dict, the output of '_index_results_files' for dir_path, default None (the directory is read);
+    Returns a tuple: (N missed pages, files of websites with missing pages);
+    Used as a subfunction for 'request_missing_pages'
+    '''
+    
+    n_missed_pages = 0
+    sites_with_pagination_errors = []
+
+    if index == None:
+        index = _index_results_files(dir_path)
+    
+    for files_by_srv in index.get((region_code, year), {}).values():
+        for file_name in files_by_srv.values():
+            # only the logs are read
+            cases_per_site = _read_results_logs(join(dir_path, file_name))
+            for v in cases_per_site.values():
+                if len(v['logs']["pagination_error"]) > 0:
+                    sites_with_pagination_errors.append(file_name)
+                    n_missed_pages += len(v['logs']["pagination_error"])
+        
+    return (n_missed_pages,sites_with_pagination_errors)
+
+
+def request_missing_pages(dir_path:str,region_code:str,year:str,path_to_driver:str,apikey="",browser_pool=None,site_profiles_path=SITE_PROFILES_PATH,profile_ttl_days=30) -> list:
+    '''
+    Handling missing pages by region and year: checking whether the result json files have missing pages and requesting cases on them;
+    This function adds missing cases to the same resulting file (it overwrites files);
+    dir_path: str, path to the directory with the json files of parsed cases;
+    region_code: str, region code in the results json files, for which to check missing pages;
+    year: str, year in the results json files, for which to check missing pages;
+    (for example, the file '50_chehov_mo_1_2019.json' has the region code '50' and the year is '2019')
+    path_to_driver: str, path to Chrome driver;
+    apikey: str, API key for autorecognition of captcha from https://ocr.space/OCRAPI; default ''; keep default if entering captcha manually
+    browser_pool: BrowserPool, Chrome drivers to reuse (see 'BrowserPool'), default None (one driver is reused for all websites and quit afterwards);
+    site_profiles_path: str, json file with websites' form types and captcha (see 'get_cases'), default SITE_PROFILES_PATH;
+    profile_ttl_days: int, N of days after which a website's profile is checked again, default 30;
+    Returns a list with logs of N cases added per file
+    '''
+
+    logs_to_return = []
+    missing_pages = _get_missing_pages(dir_path,region_code,year)
+
+    pool = browser_pool if browser_pool != None else BrowserPool(path_to_driver, max_idle=1)
+
+    try:
+        for site in missing_pages[1]:
+    
+            # getting srv info from the file name
+            srv = _parse_results_file_name(site)[2]
+        
+            file_path = f"{dir_path}/{site}"
+        
+            site_data = _read_results_logs(file_path)
+            
+            website = list(site_data.keys())[0]
+            
+            pages_to_reguest = site_data[website]["logs"]["pagination_error"]
+        
+            browser = pool.acquire()
+        
+            not_parsed_pages = []
+            new_cases_data = []
+        
+            try:
+                # the form type and captcha are known from the previous calls or checked now
+                profile = _cached_site_profile(website, site_profiles_path, profile_ttl_days)
+                if profile == None:
+                    profile = _probe_site_profile(browser, website, srv, site_profiles_path)[0]
+
+                # the search form is not loaded
+                if profile == None:
+                    profile = {"form_type": "other", "captcha": "False"}
 
-            combined_by_srv_website[website] = combined_by_srv
-            merged.update(combined_by_srv_website)
+                form_type = profile["form_type"]
+                captcha = profile["captcha"]
             
-        # if there is one srv, add cases to the merged files directly
+                if form_type == "form1" or form_type == "form2":
+
+                    form = _FORMS[form_type]
+
+                    # getting the court code from the courts info
+                    court_code = ""
+                    if form_type == "form2":
+                        court_code = get_court_registry().by_website(website)["court_id"]
+
+                    search_link = _search_link(form_type, website, srv, f"01.01.{year}", f"31.12.{year}", court_code)
+
+                    # check captcha
+                    captcha_addition = ""
+                    if captcha == "True":
+                        captcha_addition = form["captcha"](browser,website,apikey)
+
+                    # cases of the pages with errors can be in the file already (a page has an error if one of its cases is not loaded)
+                    written_ids = {case["case_id_uid"] for case in iter_cases(file_path, fields=["case_id_uid"])}
+
+                    # collecting cases of the pages with the same pipeline as 'get_cases'
+                    search_results = _SearchResults(form_type, website, search_link, captcha_addition, captcha == "True", apikey)
+                    pipeline = CasePipeline(form_type, browser, website, srv, search_results, skip_ids=written_ids, browser_pool=pool)
+
+                    try:
+                        for event, page, item in pipeline.run(pages_to_reguest):
+                            if event == "case":
+                                new_cases_data.append(item)
+                            elif item == "error":
+                                not_parsed_pages.append(page)
+                    finally:
+                        browser = pipeline.browser
+
+            # this will add all non-requested pages per website to the pagination error list
+            except WebDriverException:
+                not_parsed_pages = pages_to_reguest
+                continue
+
+            # giving the driver back to the pool (quit if it crashed)
+            finally:
+                pool.release(browser)
+        
+            if len(new_cases_data) > 0:
+        
+                # if pages were not parsed again, keep them in the file
+                site_data[website]["logs"]["pagination_error"] = not_parsed_pages
+
+                if file_path.endswith(".jsonl"):
+                    # appending new cases to the jsonl file and updating its logs
+                    writer = _JsonlCasesWriter(file_path[:-len(".jsonl")], website, append=True)
+                    for case in new_cases_data:
+                        writer.add(case)
+                    writer.close(site_data[website]["num_cases"], site_data[website]["logs"])
+
+                else:
+                    # the logs were read without the cases; the keys are kept in the order of the written files, the logs last (see '_read_results_logs')
+                    cases = list(_read_results_file(file_path).values())[0]["cases"] + new_cases_data
+                    site_data[website] = {"num_cases": site_data[website]["num_cases"], "cases": cases, "logs": site_data[website]["logs"]}
+
+                    # export new file / overwrite
+                    with open(file_path, 'w') as jf:
+                        json.dump(site_data,jf,ensure_ascii=False)
+
+                status = f"{len(new_cases_data)} cases were added to {site}"
+            
+            else:
+                status = f"No cases were added to {site}"
+
+            logs_to_return.append(status)
+
+    finally:
+        if browser_pool == None:
+            pool.close()
+
+    return logs_to_return
+
+
+### Re-parsing cached pages ###
+
+def _read_cached_page(file_path:str) -> tuple:
+    '''
+    Reading a page kept by 'PageCache'
+    Returns a tuple (url, page_source); (None, None) if the file is not found or broken
+    '''
+
+    try:
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            url = f.readline().rstrip("\n")
+            return url, f.read()
+    except (OSError, EOFError):
+        return None, None
+
+def _reparse_chunk(form_type:str, items:list, parser_backend:str) -> list:
+    '''
+    Parsing cached case pages in a worker process of 'reparse'
+    items: list of tuples (case_id, path to the cached page);
+    Returns a list of dicts with case data (None for pages that cannot be read), in the order of items
+    '''
+
+    cases = []
+    for case_id, file_path in items:
+        url, page_source = _read_cached_page(file_path)
+        cases.append(None if page_source == None else _parse_case_page(form_type, page_source, case_id, parser_backend))
+
+    return cases
+
+def _reparse_file(cache, file_path:str) -> tuple:
+    '''
+    Finding cached pages of the cases of one results file
+    Returns a tuple (results dict of the file, form type or None, list of tuples (N of the case in the file, case_id, path to the cached page))
+    '''
+
+    results = _read_results_file(file_path)
+    website = list(results.keys())[0]
+    server = os.path.basename(file_path).split("_")[-2]
+
+    form_type = None
+    items = []
+    for n, case in enumerate(results[website]["cases"]):
+        case_id = case["case_id_uid"]
+        # the form type is not in the results file, the case link shows it
+        for case_form_type in ([form_type] if form_type != None else ["form1", "form2"]):
+            page_path = cache._file_path(_case_link(case_form_type, website, server, case_id))
+            if os.path.isfile(page_path):
+                form_type = case_form_type
+                items.append((n, case_id, page_path))
+                break
+
+    return results, form_type, items
+
+def reparse(dir_path:str, cache_path=PAGE_CACHE_PATH, path_to_save="", region_code="", year="", n_workers=None, chunk_size=200) -> list:
+    '''
+    Parsing cases again from the pages kept by the page cache (see 'configure_page_cache'), without loading them from websites;
+    for example, after a fix of the case text or metadata parsers
+    dir_path: str, path to the directory with the results files (json or jsonl) of parsed cases;
+    cache_path: str, directory of the page cache, default PAGE_CACHE_PATH;
+    path_to_save: str, directory where to save the new results files, default '' (the files in dir_path are overwritten);
+    region_code: str, re-parsing only the files of this region, default '' (all regions);
+    year: str, re-parsing only the files of this year, default '' (all years);
+    n_workers: int, N of worker processes, default None (N of CPU cores);
+    chunk_size: int, N of cases parsed by a worker at a time, default 200;
+    Cases without cached pages are kept as they are; N of cases and logs of the files are kept too
+    Returns a list with logs of N cases re-parsed per file
+    '''
+
+    cache = PageCache(cache_path, ttl_days=None)
+    path_to_save = path_to_save or dir_path
+    os.makedirs(path_to_save, exist_ok=True)
+
+    files = [file_name for (file_region, file_year), sites in sorted(_index_results_files(dir_path).items())
+             if region_code in ("", file_region) and year in ("", file_year)
+             for files_by_srv in sites.values() for file_name in files_by_srv.values()]
+
+    logs_to_return = []
+
+    def write_file(file_name, results, futures):
+        website = list(results.keys())[0]
+        cases = results[website]["cases"]
+
+        n_reparsed = 0
+        for chunk, future in futures:
+            for (n, case_id, page_path), case in zip(chunk, future.result()):
+                if case != None:
+                    cases[n] = case
+                    n_reparsed += 1
+
+        extension = ".jsonl" if file_name.endswith(".jsonl") else ".json"
+        writer = _cases_writer(join(path_to_save, file_name[:-len(extension)]), website, extension.lstrip("."))
+        for case in cases:
+            writer.add(case)
+        writer.close(results[website]["num_cases"], results[website]["logs"])
+
+        logs_to_return.append(f"{n_reparsed} of {len(cases)} cases were re-parsed in {file_name}")
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # files waiting for their cases to be parsed; a few files are kept in progress, so that workers don't wait for writing
+        pending = []
+        n_pending_chunks = 0
+        max_pending_chunks = 4 * (n_workers or os.cpu_count() or 1)
+
+        for file_name in files:
+            results, form_type, items = _reparse_file(cache, join(dir_path, file_name))
+
+            futures = []
+            for i in range(0, len(items), chunk_size):
+                chunk = items[i:i + chunk_size]
+                futures.append((chunk, executor.submit(_reparse_chunk, form_type, [(case_id, page_path) for n, case_id, page_path in chunk], PARSER_BACKEND)))
+
+            pending.append((file_name, results, futures))
+            n_pending_chunks += len(futures)
+
+            while n_pending_chunks > max_pending_chunks:
+                file_name, results, futures = pending.pop(0)
+                write_file(file_name, results, futures)
+                n_pending_chunks -= len(futures)
+
+        for file_name, results, futures in pending:
+            write_file(file_name, results, futures)
+
+    return logs_to_return
+
+
+### Codecs of region-year archives ###
+
+# the first bytes of compressed files
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def _zstd_dictionary(dictionary):
+    # a path to a dictionary trained by 'train_zstd_dictionary', or its bytes
+    if dictionary == None:
+        return None
+    if isinstance(dictionary, str):
+        with open(dictionary, 'rb') as f:
+            dictionary = f.read()
+    return zstandard.ZstdCompressionDict(dictionary)
+
+def _open_archive_writer(file_path:str, codec="gzip", level=None, threads=0, dictionary=None):
+    '''
+    Opening a compressed text file for writing
+    codec: str, "gzip" or "zstd", default "gzip";
+    level: int, compression level, default None (9 for gzip, 3 for zstd);
+    threads: int, N of threads compressing with zstd, default 0 (in the calling thread); -1 for N of CPU cores;
+    dictionary: str or bytes, a zstd dictionary (see 'train_zstd_dictionary'), default None; the same dictionary is needed to read the file;
+    Raises ValueError for an unknown codec, ImportError if zstd is chosen and the zstandard package is not installed
+    Returns a text stream
+    '''
+
+    if codec == "gzip":
+        return gzip.open(file_path, 'wt', encoding='utf-8', compresslevel=level if level != None else 9)
+
+    if codec != "zstd":
+        raise ValueError(f"Unknown codec '{codec}', use 'gzip' or 'zstd'")
+    if zstandard == None:
+        raise ImportError("The 'zstd' codec requires the zstandard package")
+
+    compressor = zstandard.ZstdCompressor(level=level if level != None else 3, threads=threads, dict_data=_zstd_dictionary(dictionary))
+
+    return io.TextIOWrapper(compressor.stream_writer(open(file_path, 'wb')), encoding='utf-8')
+
+def open_archive(file_path:str, dictionary=None):
+    '''
+    Opening a region-year archive (the output of 'compress_by_region_year') for reading; the codec is recognized by the first bytes of the file
+    dictionary: str or bytes, the zstd dictionary the archive was compressed with, default None;
+    Returns a text stream, for example json.load(open_archive('78_2021_zstd.json'))
+    '''
+
+    with open(file_path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+
+    if magic == _ZSTD_MAGIC:
+        if zstandard == None:
+            raise ImportError("Reading zstd archives requires the zstandard package")
+        dict_data = _zstd_dictionary(dictionary)
+        decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+        return io.TextIOWrapper(decompressor.stream_reader(open(file_path, 'rb'), closefd=True), encoding='utf-8')
+
+    # not compressed
+    return open(file_path, 'r', encoding='utf-8')
+
+def read_archive(file_path:str, dictionary=None) -> dict:
+    '''
+    Reading a whole region-year archive (the output of 'compress_by_region_year'), gzip or zstd
+    dictionary: str or bytes, the zstd dictionary the archive was compressed with, default None;
+    Returns a dict {website: {"num_cases", "cases", "logs"}} (or {website: {"srv_1": {...}, ...}} for websites with several servers)
+    '''
+
+    with open_archive(file_path, dictionary) as f:
+        return json.load(f)
+
+def train_zstd_dictionary(dir_path:str, dictionary_path:str, region_code="", year="", dict_size=112640, max_samples=20000) -> str:
+    '''
+    Training a zstd dictionary on cases of results files; decisions share a lot of boilerplate, which the dictionary keeps once
+    dir_path: str, path to the directory with the results files;
+    dictionary_path: str, where to save the dictionary;
+    region_code, year: str, taking samples only from the files of this region or year, default '' (all files);
+    dict_size: int, max size of the dictionary in bytes, default 112640 (110 KB);
+    max_samples: int, N of cases used for training, default 20000; cases are taken evenly from all files
+    Returns str, dictionary_path
+    '''
+
+    if zstandard == None:
+        raise ImportError("Training a zstd dictionary requires the zstandard package")
+
+    files = [join(dir_path, file_name) for (file_region, file_year), sites in sorted(_index_results_files(dir_path).items())
+             if region_code in ("", file_region) and year in ("", file_year)
+             for files_by_srv in sites.values() for file_name in files_by_srv.values()]
+
+    samples = []
+    per_file = max(1, max_samples // max(1, len(files)))
+    for file_path in files:
+        for results in _read_results_file(file_path).values():
+            cases = results["cases"]
+            step = max(1, len(cases) // per_file)
+            samples.extend(json.dumps(case).encode('utf-8') for case in cases[::step][:per_file])
+
+    dictionary = zstandard.train_dictionary(dict_size, samples[:max_samples])
+
+    with open(dictionary_path, 'wb') as f:
+        f.write(dictionary.as_bytes())
+
+    return dictionary_path
+
+def benchmark_codecs(dir_path:str, region_code:str, year:str, codecs=None, dictionary=None) -> dict:
+    '''
+    Comparing codecs of 'compress_by_region_year' on the results files of one region and year
+    codecs: list of dicts with the codec parameters of 'compress_by_region_year', default gzip levels 1, 6, 9 and zstd levels 3, 9, 19
+    (with 4 threads and, if the zstandard package is installed, with a dictionary trained on the same files);
+    dictionary: str, a zstd dictionary for the codecs with {"dictionary": True}, default None (trained on the files);
+    Returns a dict, for example {"gzip-9": {"size_mb": 120.5, "ratio": 8.1, "write_mb_s": 14.2, "read_mb_s": 95.0}, ...}; MB/s are of the uncompressed json
+    '''
+
+    if codecs == None:
+        codecs = [{"codec": "gzip", "level": 1}, {"codec": "gzip", "level": 6}, {"codec": "gzip", "level": 9}]
+        if zstandard != None:
+            codecs += [{"codec": "zstd", "level": 3}, {"codec": "zstd", "level": 9}, {"codec": "zstd", "level": 19},
+                       {"codec": "zstd", "level": 3, "threads": 4}, {"codec": "zstd", "level": 19, "dictionary": True}]
+
+    benchmark = {}
+    temp_dir = join(dir_path, f".benchmark_codecs_{os.getpid()}")
+    os.makedirs(temp_dir, exist_ok=True)
+
+    try:
+        if dictionary == None and any(codec.get("dictionary") == True for codec in codecs):
+            dictionary = train_zstd_dictionary(dir_path, join(temp_dir, "dictionary"), region_code, year)
+
+        for codec in codecs:
+            params = dict(codec)
+            if params.get("dictionary") == True:
+                params["dictionary"] = dictionary
+            name = f"{codec['codec']}-{codec.get('level', 'default')}" + (f"-{codec['threads']}threads" if codec.get("threads") else "") + ("-dict" if codec.get("dictionary") else "")
+
+            start = time.perf_counter()
+            compress_by_region_year(dir_path, region_code, year, temp_dir, **params)
+            write_sec = time.perf_counter() - start
+
+            archive_path = join(temp_dir, f"{region_code}_{year}_{params['codec']}.json")
+            size = os.path.getsize(archive_path)
+
+            start = time.perf_counter()
+            with open_archive(archive_path, params.get("dictionary")) as f:
+                n_chars = 0
+                while True:
+                    chunk = f.read(1 << 20)
+                    if chunk == "":
+                        break
+                    n_chars += len(chunk)
+            read_sec = time.perf_counter() - start
+
+            # the archive is ascii json, chars are bytes
+            raw_mb = n_chars / 1024 / 1024
+            benchmark[name] = {"size_mb": round(size / 1024 / 1024, 2), "ratio": round(n_chars / size, 2),
+                               "write_mb_s": round(raw_mb / write_sec, 1), "read_mb_s": round(raw_mb / read_sec, 1)}
+            os.remove(archive_path)
+
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return benchmark
+
+
+### Seekable region-year archives ###
+
+def _compress_block(data:bytes, codec:str, level, dictionary) -> bytes:
+    # a complete gzip member or zstd frame; concatenated, they are a valid gzip or zstd file too
+    if codec == "gzip":
+        return gzip.compress(data, level if level != None else 6)
+    return zstandard.ZstdCompressor(level=level if level != None else 3, dict_data=dictionary).compress(data)
+
+def _write_block_archive(file_path:str, merged:dict, codec="gzip", level=None, dictionary=None, block_size_kb=256):
+    '''
+    Writing cases of a region and year into independently compressed blocks of json lines (one case per line) and the index into '{file_path}.index.json.gz'
+    merged: dict {website: {srv: path to the results file}};
+    A block has cases of one server only, so that a court is read without other courts;
+    the index: {"codec": str, "courts": {website: {srv: {"num_cases", "logs", "blocks": [first, last]}}},
+                "blocks": [[offset, size], ...], "cases": [[case_id_uid, website, srv, block, offset in the block, length], ...]}
+    '''
+
+    if codec not in ("gzip", "zstd"):
+        raise ValueError(f"Unknown codec '{codec}', use 'gzip' or 'zstd'")
+    if codec == "zstd" and zstandard == None:
+        raise ImportError("The 'zstd' codec requires the zstandard package")
+
+    dictionary = _zstd_dictionary(dictionary) if codec == "zstd" else None
+    block_size = block_size_kb * 1024
+    index = {"codec": codec, "dictionary": dictionary != None, "courts": {}, "blocks": [], "cases": []}
+
+    with open(file_path, 'wb') as f:
+
+        def write_block(lines):
+            data = b"".join(lines)
+            compressed = _compress_block(data, codec, level, dictionary)
+            index["blocks"].append([f.tell(), len(compressed)])
+            f.write(compressed)
+
+        for website, paths_by_srv in merged.items():
+            for srv, results_path in paths_by_srv.items():
+                results = list(_read_results_file(results_path).values())[0]
+                first_block = len(index["blocks"])
+
+                lines = []
+                offset = 0
+                for case in results["cases"]:
+                    line = (json.dumps(case, ensure_ascii=False) + "\n").encode('utf-8')
+                    if offset > 0 and offset + len(line) > block_size:
+                        write_block(lines)
+                        lines = []
+                        offset = 0
+                    index["cases"].append([case.get("case_id_uid"), website, srv, len(index["blocks"]), offset, len(line)])
+                    lines.append(line)
+                    offset += len(line)
+
+                if len(lines) > 0:
+                    write_block(lines)
+
+                index["courts"].setdefault(website, {})[srv] = {"num_cases": results["num_cases"], "logs": results["logs"],
+                                                                "blocks": [first_block, len(index["blocks"])]}
+
+    with gzip.open(f"{file_path}.index.json.gz", 'wt', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+
+class BlockArchiveReader:
+    '''
+    Reading single cases and courts from a seekable region-year archive (see 'compress_by_region_year' with seekable=True) without decompressing the whole archive
+    file_path: str, path to '{region}_{year}_{codec}.blocks' (its index is '{file_path}.index.json.gz');
+    dictionary: str or bytes, the zstd dictionary the archive was compressed with, default None;
+    cache_blocks: int, N of decompressed blocks kept in memory, default 16;
+    Usage: with BlockArchiveReader('78_2021_zstd.blocks') as archive: archive.get_case('case_id=1&case_uid=...')
+    '''
+
+    def __init__(self, file_path:str, dictionary=None, cache_blocks=16):
+        with gzip.open(f"{file_path}.index.json.gz", 'rt', encoding='utf-8') as f:
+            index = json.load(f)
+
+        self.codec = index["codec"]
+        self.courts = index["courts"]
+        self._blocks = index["blocks"]
+        # case_id_uid: [(website, srv, block, offset, length), ...]; a case id can be on several courts' websites
+        self._cases = {}
+        for case_id, website, srv, block, offset, length in index["cases"]:
+            self._cases.setdefault(case_id, []).append((website, srv, block, offset, length))
+
+        if self.codec == "zstd":
+            if zstandard == None:
+                raise ImportError("Reading zstd archives requires the zstandard package")
+            if index["dictionary"] == True and dictionary == None:
+                raise ValueError("The archive is compressed with a zstd dictionary, pass it as 'dictionary'")
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=_zstd_dictionary(dictionary))
+
+        self._file = open(file_path, 'rb')
+        self._lock = threading.Lock()
+        self._read_block = functools.lru_cache(maxsize=cache_blocks)(self._decompress_block)
+
+    def _decompress_block(self, block:int) -> bytes:
+        offset, size = self._blocks[block]
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(size)
+        if self.codec == "gzip":
+            return gzip.decompress(data)
+        return self._decompressor.decompress(data)
+
+    def websites(self) -> list:
+        '''
+        Returns a list of websites in the archive
+        '''
+        return list(self.courts.keys())
+
+    def case_ids(self) -> list:
+        '''
+        Returns a list of case ids (case_id_uid) in the archive
+        '''
+        return list(self._cases.keys())
+
+    def get_case(self, case_id_uid:str, website=None, srv=None):
+        '''
+        Reading one case by its id; website and srv, str, choose the court if the id is on several websites, default None (the first one)
+        Returns a dict with case data; None if the case is not in the archive
+        '''
+
+        for case_website, case_srv, block, offset, length in self._cases.get(case_id_uid, []):
+            if website in (None, case_website) and srv in (None, case_srv):
+                return json.loads(self._read_block(block)[offset:offset + length])
+
+        return None
+
+    def get_court(self, website:str, srv=None) -> dict:
+        '''
+        Reading all cases of one website's server, or of all its servers if srv is None
+        Returns a dict {srv: {"num_cases", "cases", "logs"}}, the same as the results files; {} if the website is not in the archive
+        '''
+
+        court = {}
+
+        for court_srv, info in self.courts.get(website, {}).items():
+            if srv not in (None, court_srv):
+                continue
+            cases = []
+            for block in range(info["blocks"][0], info["blocks"][1]):
+                # blocks of a court are read once, they are not kept in the cache
+                cases.extend(json.loads(line) for line in self._decompress_block(block).splitlines())
+            court[court_srv] = {"num_cases": info["num_cases"], "cases": cases, "logs": info["logs"]}
+
+        return court
+
+    def iter_cases(self):
+        '''
+        Reading all cases of the archive one block at a time
+        Yields tuples (website, srv, case data)
+        '''
+
+        for website, courts in self.courts.items():
+            for srv, info in courts.items():
+                for block in range(info["blocks"][0], info["blocks"][1]):
+                    for line in self._decompress_block(block).splitlines():
+                        yield website, srv, json.loads(line)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+### Compressing results files by region and year ###
+
+def compress_by_region_year(dir_path:str,region_code:str,year:str,path_to_save:str,codec="gzip",level=None,threads=0,dictionary=None,seekable=False,block_size_kb=256) -> str:
+    '''
+    Compressing json files with cases texts: putting all cases of one region per year in one compressed json file (gzip);
+    If there are multiple files for one website (results from several servers), merges them into one file;
+    dir_path: str, path to the directory with the json files of parsed cases;
+    region_code: str, a region to compress; for example '78';
+    year: str, a year to merge files by;
+    path_to_save: str, path to the directory, where to save the compressed gzip file (!NB the file can be large);
+    codec: str, "gzip" or "zstd" (needs the zstandard package), default "gzip"; the file is '{region_code}_{year}_{codec}.json';
+    level: int, compression level, default None (9 for gzip, 3 for zstd);
+    threads: int, N of threads compressing with zstd, default 0; -1 for N of CPU cores;
+    dictionary: str, path to a zstd dictionary (see 'train_zstd_dictionary'), default None; the same dictionary is needed to read the file;
+    (see 'benchmark_codecs' to compare them; read the file with 'read_archive' or 'open_archive')
+    seekable: bool, saving '{region_code}_{year}_{codec}.blocks' instead: cases in independently compressed blocks with an index of cases and courts,
+    so that one case or one court is read without decompressing the rest (see 'BlockArchiveReader'); default False;
+    block_size_kb: int, max size of a block before compression for seekable archives, default 256; smaller blocks are faster to read, larger ones compress better
+    The merged file is written one results file at a time, so memory use is bounded by the largest results file, not by the region
+    Returns str: status of the compression
+    '''
+    
+    compressed_filename = f"{region_code}_{year}_{codec}.json"
+
+    # what goes to the merged json file: {website: {srv: path}}; a website with several servers is {website: {"srv_1": {...}, ...}} in the file
+    # only the websites are read here, the cases are read one file at a time while writing
+    merged = {}
+
+    for site, files_by_srv in _index_results_files(dir_path).get((region_code, year), {}).items():
+        paths_by_srv = {srv: join(dir_path, file_name) for srv, file_name in files_by_srv.items()}
+        merged[_read_results_website(list(paths_by_srv.values())[-1])] = paths_by_srv
+
+    if seekable == True:
+        _write_block_archive(f"{path_to_save}/{region_code}_{year}_{codec}.blocks", merged, codec, level, dictionary, block_size_kb)
+        return f"Results for the region {region_code} and year {year} are compressed and saved in {path_to_save}"
+
+    encoder = json.JSONEncoder()
+
+    def write_value(archive_out, file_path):
+        # the cases of one website's server, the only file in memory
+        results = _read_results_file(file_path)
+        for chunk in encoder.iterencode(results[list(results.keys())[0]]):
+            archive_out.write(chunk)
+
+    # writing the merged json file court by court, the same as json.dumps of all the files merged in one dict
+    with _open_archive_writer(f"{path_to_save}/{compressed_filename}", codec, level, threads, dictionary) as archive_out:
+        archive_out.write("{")
+
+        for n, (website, paths_by_srv) in enumerate(merged.items()):
+            if n > 0:
+                archive_out.write(", ")
+            archive_out.write(json.dumps(website) + ": ")
+
+            # if there is one srv, the cases are added to the merged file directly
+            if len(paths_by_srv) == 1:
+                write_value(archive_out, list(paths_by_srv.values())[0])
+
+            # if there are several srv files, they are merged in one
+            else:
+                archive_out.write("{")
+                for i, (srv, file_path) in enumerate(paths_by_srv.items()):
+                    if i > 0:
+                        archive_out.write(", ")
+                    archive_out.write(json.dumps(f"srv_{srv}") + ": ")
+                    write_value(archive_out, file_path)
+                archive_out.write("}")
+
+        archive_out.write("}")
+
+    return f"Results for the region {region_code} and year {year} are compressed and saved in {path_to_save}"
+
+
+### Reading collected cases ###
+
+# '{region}_{year}_{codec}.json' or '.blocks', see 'compress_by_region_year'
+_ARCHIVE_NAME = re.compile(r'^([^_]+)_(\d{4})_(gzip|zstd)\.(json|blocks)$')
+
+class _JsonStream:
+    '''
+    Reading a large json document from a text stream value by value, keeping only a chunk of it in memory;
+    used to get cases out of results files and region-year archives one at a time
+    '''
+
+    def __init__(self, text_stream, chunk_size=1 << 20):
+        self._stream = text_stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        # dropping what is read and adding the next chunk; False at the end of the stream
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if chunk == "":
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        # the next symbol after whitespace, None at the end of the stream
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._fill() == False:
+                return None
+
+    def expect(self, symbol:str):
+        if self.peek() != symbol:
+            raise ValueError(f"Expected '{symbol}' at {self._pos} of the json document")
+        self._pos += 1
+
+    def value(self):
+        # one complete json value (a case, a key, N cases, logs)
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # a number at the end of the chunk can continue in the next one
+                if end < len(self._buf) or self._eof or self._fill() == False:
+                    self._pos = end
+                    return value
+            except ValueError:
+                if self._fill() == False:
+                    raise
+
+    def object_keys(self):
+        # the keys of an object; the caller reads the value of every key before the next one
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def array_items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("]")
+            return
+
+def _stream_court_cases(stream, website:str, srv):
+    '''
+    Reading cases of one website from {"num_cases", "cases": [...], "logs"} or, in region-year archives, {"srv_1": {...}, "srv_2": {...}}
+    Yields tuples (website, srv, case data)
+    '''
+
+    for key in stream.object_keys():
+        if key == "cases":
+            for case in stream.array_items():
+                yield website, srv, case
+        elif key.startswith("srv_") and srv == None:
+            yield from _stream_court_cases(stream, website, key[len("srv_"):])
+        else:
+            stream.value()
+
+def _stream_json_cases(file_path:str, srv=None, dictionary=None):
+    '''
+    Reading cases of a json results file or of a json region-year archive (gzip, zstd or not compressed) one at a time
+    Yields tuples (website, srv, case data)
+    '''
+
+    with open_archive(file_path, dictionary) as f:
+        stream = _JsonStream(f)
+        for website in stream.object_keys():
+            yield from _stream_court_cases(stream, website, srv)
+
+def _stream_jsonl_cases(file_path:str, srv=None):
+    '''
+    Reading cases of a jsonl results file one line at a time
+    Yields tuples (website, srv, case data)
+    '''
+
+    website = _read_results_website(file_path)
+
+    with open(file_path, 'r') as jf:
+        for line in jf:
+            # the last line can be cut off by a crash
+            try:
+                case = json.loads(line)
+            except ValueError:
+                break
+            yield website, srv, case
+
+def _cases_sources(path:str, region=None, year=None) -> list:
+    '''
+    Choosing files to read cases from: results files, or region-year archives for regions and years without results files
+    Returns a list of tuples (kind: "json", "jsonl" or "blocks", file path, srv or None)
+    '''
+
+    if os.path.isfile(path):
+        name = os.path.basename(path)
+        parsed = _parse_results_file_name(name)
+        archive = _ARCHIVE_NAME.match(name)
+        region_year = parsed[0::3] if parsed != None else (archive.group(1, 2) if archive != None else None)
+        if region_year != None and (region not in (None, region_year[0]) or year not in (None, region_year[1])):
+            return []
+        kind = "blocks" if name.endswith(".blocks") else ("jsonl" if name.endswith(".jsonl") else "json")
+        return [(kind, path, parsed[2] if parsed != None else None)]
+
+    sources = []
+    index = _index_results_files(path)
+
+    for (file_region, file_year), sites in sorted(index.items()):
+        if region in (None, file_region) and year in (None, file_year):
+            for files_by_srv in sites.values():
+                for srv, file_name in files_by_srv.items():
+                    sources.append(("jsonl" if file_name.endswith(".jsonl") else "json", join(path, file_name), srv))
+
+    archives = {}
+    for name in sorted(listdir(path)):
+        archive = _ARCHIVE_NAME.match(name)
+        if archive == None:
+            continue
+        archive_region, archive_year = archive.group(1, 2)
+        # cases of the results files are not read twice
+        if (archive_region, archive_year) in index or region not in (None, archive_region) or year not in (None, archive_year):
+            continue
+        # one archive per region and year
+        archives.setdefault((archive_region, archive_year), ("blocks" if name.endswith(".blocks") else "json", join(path, name), None))
+
+    return sources + [archives[region_year] for region_year in sorted(archives)]
+
+def _iter_source_cases(kind:str, file_path:str, srv=None, dictionary=None):
+    '''
+    Reading cases of one file chosen by '_cases_sources'
+    Yields tuples (website, srv, case data)
+    '''
+
+    if kind == "blocks":
+        with BlockArchiveReader(file_path, dictionary) as archive:
+            yield from archive.iter_cases()
+    elif kind == "jsonl":
+        yield from _stream_jsonl_cases(file_path, srv)
+    else:
+        yield from _stream_json_cases(file_path, srv, dictionary)
+
+def iter_cases(path_or_dir:str, region=None, year=None, fields=None, with_court=False, dictionary=None):
+    '''
+    Reading collected cases one at a time, with memory use not depending on N of cases
+    path_or_dir: str, a results file (json or jsonl), a region-year archive (the output of 'compress_by_region_year', json or seekable) or a directory with them;
+    in a directory, region-year archives are read only for regions and years without results files, so that cases are not read twice
+    region: str, only cases of this region code, for example '78', default None (all regions);
+    year: str, only cases of this year, default None (all years);
+    fields: list, keys of case data to keep, for example ["case_id_uid", "metadata"], default None (all keys);
+    with_court: bool, yielding tuples (website, srv, case) instead of case data; srv is None for websites with one server in json region-year archives, default False;
+    dictionary: str or bytes, the zstd dictionary of zstd archives, default None;
+    Yields dicts with case data, for example: for case in iter_cases("results/", region="78", fields=["case_text"]): ...
+    '''
+
+    for kind, file_path, srv in _cases_sources(path_or_dir, region, year):
+        cases = _iter_source_cases(kind, file_path, srv, dictionary)
+        try:
+            for website, case_srv, case in cases:
+                if fields != None:
+                    case = {field: case[field] for field in fields if field in case}
+                yield (website, case_srv, case) if with_court == True else case
+        finally:
+            cases.close()
+
+
+### Parquet export ###
+
+def _parquet_schemas() -> dict:
+    '''
+    Schemas of the tables of 'export_parquet'; region and year are the partitions (directories), not columns in the files
+    '''
+
+    court = [("website", pyarrow.string()), ("srv", pyarrow.string()), ("case_id_uid", pyarrow.string())]
+
+    return {
+        "cases": pyarrow.schema(court + [("case_found", pyarrow.bool_()), ("id_text", pyarrow.string()), ("uid_2", pyarrow.string()),
+                                         ("adm_date", pyarrow.date32()), ("judge", pyarrow.string()), ("decision_result", pyarrow.string()),
+                                         ("n_accused", pyarrow.int32())]),
+        "accused": pyarrow.schema(court + [("accused_n", pyarrow.int32()), ("name", pyarrow.string()), ("article", pyarrow.string())]),
+        "texts": pyarrow.schema(court + [("case_text", pyarrow.large_string())]),
+    }
+
+def _parse_date(date_str):
+    # 'DD.MM.YYYY' from case pages; None if the date is missing or written in another way
+    try:
+        return datetime.datetime.strptime(date_str.strip(), "%d.%m.%Y").date()
+    except (ValueError, AttributeError):
+        return None
+
+def _case_rows(website:str, srv, case:dict) -> tuple:
+    '''
+    Flattening one case into the rows of the tables of 'export_parquet'
+    Returns a tuple (row of cases, list of rows of accused, row of texts)
+    '''
+
+    metadata = case.get("metadata", {})
+    court = {"website": website, "srv": srv, "case_id_uid": case.get("case_id_uid")}
+    accused = metadata.get("accused", [])
+
+    case_row = dict(court, case_found=case.get("case_found") == "True", id_text=metadata.get("id_text"), uid_2=metadata.get("uid_2"),
+                    adm_date=_parse_date(metadata.get("adm_date")), judge=metadata.get("judge"), decision_result=metadata.get("decision_result"),
+                    n_accused=len(accused))
+
+    # one row per article of every accused
+    accused_rows = []
+    for n, person in enumerate(accused):
+        articles = [article.strip() for article in person.get("article", []) if article.strip() != ""] or [None]
+        for article in articles:
+            accused_rows.append(dict(court, accused_n=n, name=person.get("name"), article=article))
+
+    return case_row, accused_rows, dict(court, case_text=case.get("case_text", ""))
+
+def _source_region_year(file_path:str):
+    # region and year of a file from '_cases_sources', from its name
+    name = os.path.basename(file_path)
+    parsed = _parse_results_file_name(name)
+    if parsed != None:
+        return parsed[0], parsed[3]
+    archive = _ARCHIVE_NAME.match(name)
+    if archive != None:
+        return archive.group(1, 2)
+    return None
+
+def export_parquet(path_or_dir:str, path_to_save:str, region=None, year=None, batch_size=10000, compression="zstd", dictionary=None) -> dict:
+    '''
+    Exporting collected cases (results files and region-year archives, see 'iter_cases') into Parquet datasets partitioned by region and year:
+    '{path_to_save}/cases/region=78/year=2021/part-78_spb_1_2021.parquet' - one row per case with typed metadata (adm_date is a date);
+    '{path_to_save}/accused/...' - one row per article of every accused; '{path_to_save}/texts/...' - decision texts, kept apart so that queries over metadata don't read them;
+    all tables have website, srv and case_id_uid to join them; read them with 'parquet_dataset'
+    path_or_dir: str, a file or a directory with results files or region-year archives;
+    path_to_save: str, directory of the datasets; every source file has its own part file, which is replaced when the file is exported again
+    (a region-year archive has all cases of its region and year, so it replaces the whole partition; the results files of a directory replace the part of an archive);
+    region, year: str, only cases of this region code or year, default None (all);
+    batch_size: int, N of cases per row group, default 10000;
+    compression: str, Parquet compression, default "zstd";
+    dictionary: str or bytes, the zstd dictionary of zstd archives, default None;
+    Raises ImportError if the pyarrow package is not installed; raises ValueError if one results file is exported into a partition exported from an archive (export the archive or the directory instead)
+    Returns a dict with N rows per table, for example {"cases": 1200, "accused": 1350, "texts": 1200}
+    '''
+
+    if pyarrow == None:
+        raise ImportError("Parquet export requires the pyarrow package")
+
+    # all results files of a region and year are exported, they replace an archive
+    whole_partitions = os.path.isdir(path_or_dir)
+
+    schemas = _parquet_schemas()
+    n_rows = {table: 0 for table in schemas}
+
+    for kind, file_path, srv in _cases_sources(path_or_dir, region, year):
+        partition = _source_region_year(file_path) or ("unknown", "unknown")
+        name = os.path.basename(file_path).split(".")[0]
+        is_archive = _ARCHIVE_NAME.match(os.path.basename(file_path)) != None
+
+        writers = {}
+        try:
+            for table, schema in schemas.items():
+                partition_dir = join(path_to_save, table, f"region={partition[0]}", f"year={partition[1]}")
+                os.makedirs(partition_dir, exist_ok=True)
+                parts = [part_name[len("part-"):-len(".parquet")] for part_name in os.listdir(partition_dir)]
+                archive_parts = [part for part in parts if _ARCHIVE_NAME.match(f"{part}.json") != None]
+                if len(archive_parts) > 0 and is_archive == False and whole_partitions == False:
+                    raise ValueError(f"{partition_dir} is exported from an archive, export the archive or the directory with all results files of region {partition[0]} and year {partition[1]}")
+                # the cases of an archive are in the parts of results files and vice versa
+                for part in parts:
+                    if part == name or is_archive or part in archive_parts:
+                        os.remove(join(partition_dir, f"part-{part}.parquet"))
+                writers[table] = pyarrow.parquet.ParquetWriter(join(partition_dir, f"part-{name}.parquet"), schema, compression=compression)
+
+            batches = {table: [] for table in schemas}
+            def flush():
+                for table, rows in batches.items():
+                    if len(rows) > 0:
+                        writers[table].write_table(pyarrow.Table.from_pylist(rows, schema=schemas[table]))
+                        n_rows[table] += len(rows)
+                    batches[table] = []
+
+            for website, case_srv, case in _iter_source_cases(kind, file_path, srv, dictionary):
+                case_row, accused_rows, text_row = _case_rows(website, case_srv, case)
+                batches["cases"].append(case_row)
+                batches["accused"].extend(accused_rows)
+                batches["texts"].append(text_row)
+
+                if len(batches["cases"]) >= batch_size:
+                    flush()
+            flush()
+
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    return n_rows
+
+def parquet_dataset(path_to_save:str, table="cases"):
+    '''
+    Opening a table exported by 'export_parquet' as a pyarrow dataset; region and year are string columns (region codes like '07' keep the zero)
+    table: str, "cases", "accused" or "texts", default "cases";
+    Returns pyarrow.dataset.Dataset, for example parquet_dataset("parquet/").to_table(filter=pyarrow.dataset.field("region") == "78")
+    '''
+
+    if pyarrow == None:
+        raise ImportError("Reading Parquet requires the pyarrow package")
+
+    partitioning = pyarrow.dataset.partitioning(pyarrow.schema([("region", pyarrow.string()), ("year", pyarrow.string())]), flavor="hive")
+
+    return pyarrow.dataset.dataset(join(path_to_save, table), format="parquet", partitioning=partitioning)
+
+
+### SQLite storage ###
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    case_key TEXT NOT NULL,
+    case_id_uid TEXT,
+    website TEXT NOT NULL,
+    srv TEXT NOT NULL,
+    court TEXT,
+    region TEXT,
+    year TEXT,
+    keyword TEXT,
+    case_found INTEGER,
+    id_text TEXT,
+    uid_2 TEXT,
+    adm_date TEXT,
+    judge TEXT,
+    decision_result TEXT,
+    case_text TEXT,
+    data TEXT,
+    UNIQUE (source, website, srv, case_key)
+);
+CREATE TABLE IF NOT EXISTS accused (
+    case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+    accused_n INTEGER,
+    name TEXT,
+    article TEXT
+);
+CREATE INDEX IF NOT EXISTS cases_case_id_uid ON cases(case_id_uid);
+CREATE INDEX IF NOT EXISTS cases_court ON cases(website, srv);
+CREATE INDEX IF NOT EXISTS cases_court_name ON cases(court);
+CREATE INDEX IF NOT EXISTS cases_adm_date ON cases(adm_date);
+CREATE INDEX IF NOT EXISTS cases_judge ON cases(judge);
+CREATE INDEX IF NOT EXISTS cases_region_year ON cases(region, year);
+CREATE INDEX IF NOT EXISTS accused_article ON accused(article);
+CREATE INDEX IF NOT EXISTS accused_case_id ON accused(case_id);
+"""
+
+# the full-text index of decision texts, kept in sync with 'cases' by triggers
+_SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(case_text, content='cases', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+    INSERT INTO cases_fts(rowid, case_text) VALUES (new.id, new.case_text);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, case_text) VALUES ('delete', old.id, old.case_text);
+END;
+CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF case_text ON cases BEGIN
+    INSERT INTO cases_fts(cases_fts, rowid, case_text) VALUES ('delete', old.id, old.case_text);
+    INSERT INTO cases_fts(rowid, case_text) VALUES (new.id, new.case_text);
+END;
+"""
+
+def _sink_srv(srv) -> str:
+    # websites with one server have no srv in json region-year archives; it is "1" for them, as the default 'srv_num' of 'get_cases'
+    return str(srv) if srv not in (None, "") else "1"
+
+class SqliteSink:
+    '''
+    Keeping cases in a SQLite database with indexes on case ids, courts, dates of admission, judges and articles, and a full-text index (FTS5) of decision texts;
+    can be passed as 'sink' to 'get_cases' and to bsr_parser.get_cases and bsr_parser.get_cases_by_keywords, which then also skip the cases that are already in it
+    db_path: str, path to the database file (created if it does not exist);
+    batch_size: int, N of cases inserted in one transaction, default 1000;
+    A case is identified by (source, website, srv, case_key): source is "sudrf" or "bsr", case_key is 'case_id_uid' for sudrf websites and the bsr case id for bsr;
+    a case added again replaces the stored one; srv is "1" if it is not known (websites with one server in json region-year archives);
+    the decision text is kept once, in the full-text indexed column, and the rest of the case data as json
+    Usage: with SqliteSink("cases.db") as sink: sink.load("results/"); sink.search("мошенничество", region="78")
+    '''
+
+    def __init__(self, db_path:str, batch_size=1000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(_SQLITE_SCHEMA)
+        try:
+            self._connection.executescript(_SQLITE_FTS_SCHEMA)
+            self.fts = True
+        # SQLite built without FTS5
+        except sqlite3.OperationalError:
+            self.fts = False
+        self._batch = []
+        # sinks are shared by threads (for example, by the pipeline and the writer)
+        self._lock = threading.RLock()
+
+    def add(self, case:dict, website:str, srv="", region="", year="", source="sudrf", case_key=None, court="", keyword=""):
+        '''
+        Adding a case; cases are inserted by batches of 'batch_size' (call 'flush' or 'close' to insert the rest)
+        case_key: str, default None (case["case_id_uid"]);
+        '''
+
+        with self._lock:
+            self._batch.append((case, website, _sink_srv(srv), region, year, source, case_key if case_key != None else case.get("case_id_uid", ""), court, keyword))
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        '''
+        Inserting the added cases in one transaction
+        '''
+
+        with self._lock:
+            if len(self._batch) == 0:
+                return
+
+            with self._connection:
+                for case, website, srv, region, year, source, case_key, court, keyword in self._batch:
+                    metadata = case.get("metadata", {})
+                    adm_date = _parse_date(metadata.get("adm_date"))
+
+                    self._connection.execute("DELETE FROM cases WHERE source = ? AND website = ? AND srv = ? AND case_key = ?", (source, website, srv, case_key))
+                    case_id = self._connection.execute(
+                        "INSERT INTO cases (source, case_key, case_id_uid, website, srv, court, region, year, keyword, case_found, id_text, uid_2, adm_date, judge, decision_result, case_text, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (source, case_key, case.get("case_id_uid"), website, srv, court, region, year, keyword, case.get("case_found") == "True",
+                         metadata.get("id_text"), metadata.get("uid_2"), adm_date.isoformat() if adm_date != None else None,
+                         metadata.get("judge"), metadata.get("decision_result"), case.get("case_text", ""),
+                         # the text is kept only in 'case_text'
+                         json.dumps({key: value for key, value in case.items() if key != "case_text"}, ensure_ascii=False))).lastrowid
+
+                    accused_rows = []
+                    for n, person in enumerate(metadata.get("accused", [])):
+                        articles = [article.strip() for article in person.get("article", []) if article.strip() != ""] or [None]
+                        accused_rows.extend((case_id, n, person.get("name"), article) for article in articles)
+                    self._connection.executemany("INSERT INTO accused (case_id, accused_n, name, article) VALUES (?, ?, ?, ?)", accused_rows)
+
+            self._batch = []
+
+    def case_keys(self, source="sudrf", website=None, srv=None) -> set:
+        '''
+        Getting the keys of stored cases, for example to skip them in a crawl
+        Returns a set of case keys
+        '''
+
+        query = "SELECT case_key FROM cases WHERE source = ?"
+        params = [source]
+        if website != None:
+            query += " AND website = ?"
+            params.append(website)
+        if srv != None:
+            query += " AND srv = ?"
+            params.append(_sink_srv(srv))
+
+        with self._lock:
+            self.flush()
+            return {row[0] for row in self._connection.execute(query, params)}
+
+    def has(self, case_key:str, source="sudrf", website=None) -> bool:
+        '''
+        Checking if a case is stored
+        '''
+
+        query = "SELECT 1 FROM cases WHERE source = ? AND case_key = ?"
+        params = [source, case_key]
+        if website != None:
+            query += " AND website = ?"
+            params.append(website)
+
+        with self._lock:
+            self.flush()
+            return self._connection.execute(query + " LIMIT 1", params).fetchone() != None
+
+    def _rows(self, query:str, params:list) -> list:
+        with self._lock:
+            self.flush()
+            rows = self._connection.execute(query, params).fetchall()
+        return [{"source": source, "website": website, "srv": srv, "region": region, "year": year, "case": {"case_text": case_text, **json.loads(data)}}
+                for source, website, srv, region, year, case_text, data in rows]
+
+    def get(self, case_key:str, source=None) -> list:
+        '''
+        Getting stored cases by their key (or by 'case_id_uid')
+        Returns a list of dicts {"source", "website", "srv", "region", "year", "case": case data}
+        '''
+
+        query = "SELECT source, website, srv, region, year, case_text, data FROM cases WHERE (case_key = ? OR case_id_uid = ?)"
+        params = [case_key, case_key]
+        if source != None:
+            query += " AND source = ?"
+            params.append(source)
+
+        return self._rows(query, params)
+
+    def search(self, query:str, region=None, year=None, limit=20) -> list:
+        '''
+        Full-text search in decision texts, for example sink.search('"незаконный оборот" NEAR наркотических')
+        query: str, FTS5 query;
+        region, year: str, only cases of this region or year, default None;
+        limit: int, max N of cases, the most relevant first, default 20;
+        Raises sqlite3.OperationalError if SQLite is built without FTS5
+        Returns a list of dicts {"source", "website", "srv", "region", "year", "case": case data}
+        '''
+
+        if self.fts == False:
+            raise sqlite3.OperationalError("Full-text search requires SQLite with FTS5")
+
+        sql = ("SELECT cases.source, cases.website, cases.srv, cases.region, cases.year, cases.case_text, cases.data FROM cases_fts "
+               "JOIN cases ON cases.id = cases_fts.rowid WHERE cases_fts MATCH ?")
+        params = [query]
+        if region != None:
+            sql += " AND cases.region = ?"
+            params.append(region)
+        if year != None:
+            sql += " AND cases.year = ?"
+            params.append(year)
+
+        return self._rows(sql + " ORDER BY cases_fts.rank LIMIT ?", params + [limit])
+
+    def load(self, path_or_dir:str, region=None, year=None, dictionary=None) -> int:
+        '''
+        Adding cases of results files and region-year archives (see 'iter_cases')
+        Returns int, N of added cases
+        '''
+
+        n_cases = 0
+        for kind, file_path, srv in _cases_sources(path_or_dir, region, year):
+            file_region, file_year = _source_region_year(file_path) or ("", "")
+            for website, case_srv, case in _iter_source_cases(kind, file_path, srv, dictionary):
+                self.add(case, website, case_srv, file_region, file_year)
+                n_cases += 1
+        self.flush()
+
+        return n_cases
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class _SinkCasesWriter:
+    '''
+    A results writer (see '_cases_writer') that also adds cases to a SqliteSink;
+    the cases of an attempt are kept until writer.keep_written() or writer.close(), so that 'reset' and 'discard' drop them from the sink too
+    '''
+
+    def __init__(self, writer, sink, website:str, server:str, region:str, year:str):
+        self._writer = writer
+        self._sink = sink
+        self._court = (website, server, region, year)
+        self._attempt = []
+        self._kept = False
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    def add(self, case:dict):
+        self._writer.add(case)
+        # no attempts after 'keep_written', the cases go to the sink at once
+        if self._kept == True:
+            self._sink.add(case, *self._court)
         else:
-            for file_path in region_year_files:
-                if court_name in file_path:
-
-                    with open(file_path, 'r') as jf:
-                        cases_by_court = json.load(jf)
-                        merged.update(cases_by_court)
-                        
-    # compress the merged json file
-    with gzip.open(f"{path_to_save}/{compressed_filename}", 'w') as gzip_out:
-        gzip_out.write(json.dumps(merged).encode('utf-8'))
-
-    return f"Results for the region {region_code} and year {year} are compressed and saved in {path_to_save}"
\ No newline at end of file
+            self._attempt.append(case)
+
+    def _keep_attempt(self):
+        for case in self._attempt:
+            self._sink.add(case, *self._court)
+        self._attempt = []
+        self._kept = True
+
+    def keep_written(self):
+        self._writer.keep_written()
+        self._keep_attempt()
+
+    def reset(self):
+        self._writer.reset()
+        self._attempt = []
+
+    def discard(self):
+        self._writer.discard()
+        self._attempt = []
+
+    def close(self, num_cases:int, logs:dict):
+        self._writer.close(num_cases, logs)
+        self._keep_attempt()
+        self._sink.flush()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sudrfparser
+from fake_site import FakeSession
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+@pytest.fixture
+def registry(monkeypatch):
+    '''
+    The registry of the courts in 'tests/data/courts_info' instead of the bundled one: regions 50 and 78, two courts each;
+    "Центральный районный суд" is the name of a court in both regions
+    '''
+
+    registry = sudrfparser.CourtRegistry(os.path.join(DATA_DIR, "courts_info"))
+    monkeypatch.setattr(sudrfparser, "get_court_registry", lambda: registry)
+    return registry
+
+@pytest.fixture
+def results_dir(tmp_path):
+    '''
+    A copy of the results files in 'tests/data/results': 50_odin_1_2021.json, 50_dva_1_2021.jsonl (with its logs), 50_dva_2_2021.json, 78_tri_1_2020.json
+    '''
+
+    path = tmp_path / "results"
+    shutil.copytree(os.path.join(DATA_DIR, "results"), path)
+    return str(path)
+
+@pytest.fixture
+def fake_site(monkeypatch, tmp_path):
+    '''
+    Making 'get_cases' with the HTTP engine load pages from a 'FakeSession';
+    call the fixture with FakeSession options to set the website up, it returns the list of the sessions created by the crawl
+    Websites' profiles saved to the default SITE_PROFILES_PATH go to the test's directory
+    '''
+
+    monkeypatch.setattr(sudrfparser, "RATE_LIMITER", sudrfparser.RateLimiter(rate=100000, burst=100000))
+    monkeypatch.setattr(sudrfparser, "PAGE_CACHE", None)
+
+    profiles_path = str(tmp_path / "site_profiles.json")
+    read_site_profiles, save_site_profile = sudrfparser._read_site_profiles, sudrfparser._save_site_profile
+    redirect = lambda path: profiles_path if path == sudrfparser.SITE_PROFILES_PATH else path
+    monkeypatch.setattr(sudrfparser, "_read_site_profiles", lambda path: read_site_profiles(redirect(path)))
+    monkeypatch.setattr(sudrfparser, "_save_site_profile", lambda website, profile, path: save_site_profile(website, profile, redirect(path)))
+
+    sessions = []
+
+    def set_up(**options):
+        def set_session(pool_size=10):
+            sessions.append(FakeSession(**options))
+            return sessions[-1]
+        monkeypatch.setattr(sudrfparser, "_set_session", set_session)
+        return sessions
+
+    return set_up
@@ -0,0 +1,146 @@
+'''
+A fake court website for the tests: search results and case pages served by a requests.Session without network
+'''
+
+import datetime
+import os
+import re
+
+import requests
+
+import sudrfparser
+
+def f1_listing(page:int, n_cases:int, ids=None) -> str:
+    ids = list(ids if ids != None else range(n_cases))[(page-1)*25:page*25]
+    rows = ''.join(f'<tr><td><a href="/modules.php?name=sud_delo&srv_num=1&name_op=case&case_id={i}&case_uid=uid-{i}&delo_id=1540006">1-{i}/2021</a></td><td>x</td></tr>' for i in ids)
+    return f'''<html><head><meta charset="windows-1251"></head><body><div id="content"><table><tr><td align="right">Всего по запросу найдено - {n_cases}.</td></tr></table>
+<table id="tablcont"><tr><th>N</th></tr>{rows}</table></div></body></html>'''
+
+def f1_case(i:int) -> str:
+    return f'''<html><body><div class="casenumber">Дело № 1-{i}/2021\n</div>
+<ul class="tabs"><li id="tab1">ДЕЛО</li><li id="tab2">ЛИЦА</li><li id="tab3">СУДЕБНЫЕ АКТЫ</li></ul>
+<div class="contentt"><div id="cont1"><table><tr><td>Уникальный идентификатор дела</td><td>UID{i}</td></tr><tr><td>Дата поступления</td><td>01.02.2021</td></tr><tr><td>Судья</td><td>Иванов И.И.</td></tr><tr><td>Результат рассмотрения</td><td>Вынесен ПРИГОВОР</td></tr></table></div>
+<div id="cont2"><table><tr><td>h</td></tr><tr><td>h2</td></tr><tr><td>Петров П.П.</td><td>ст.158 ч.1 УК РФ</td></tr></table></div>
+<div id="cont3"><p>Текст приговора&nbsp;{i}</p><script>var x=1;</script><p>конец</p></div></div></body></html>'''
+
+def f2_listing(page:int, n_cases:int) -> str:
+    ids = range((page-1)*20, min(page*20, n_cases))
+    rows = ''.join(f'<tr><td class="lawcase-number-td"><a href="/modules.php?name=sud_delo&name_op=case&_id={i}&_uid=u2-{i}&_deloId=1540006">1-{i}</a></td></tr>' for i in ids)
+    return f'''<html><body><div id="modSdpContent"><div class="lawcase-count">Всего найдено - {n_cases}. Показаны с 1 по 20</div><table id="resultTable">{rows}</table></div></body></html>'''
+
+def f2_case(i:int) -> str:
+    return f'''<html><body><div class="case-num">Дело № 1-{i}</div><div id="search_results"><ul id="case_bookmarks" class="bookmarks"><li id="id1">Дело</li><li id="id2">Лица</li><li id="id3">Судебные акты</li></ul>
+<div id="content1"><table class="law-case-table"><tr><td>Уникальный идентификатор дела</td><td>U{i}</td></tr><tr><td>Дата поступления дела</td><td>03.03.2021</td></tr><tr><td>Судья</td><td>Сидоров</td></tr></table></div>
+<div id="content2"><table><tr><td>ФИО</td></tr><tr><td>Кто-то</td><td>ст.228 УК РФ</td></tr></table></div>
+<div id="content3">Приговор {i}&nbsp;текст</div></div></body></html>'''
+
+SEARCH_FORM = '<html><body><div id="modSdpContent"><div class="box box_common m-all_m">form</div></div></body></html>'
+# the form2 search form loads its scripts and styles
+SEARCH_FORM_F2 = '<html><body><div id="modSdpContent"><link rel="stylesheet" href="/sdp.css"><div class="box box_common m-all_m">form</div></div></body></html>'
+# a form2 page whose content is rendered with JavaScript
+JS_ONLY = '<html><body><div id="modSdpContent"><div id="search_results"></div></div></body></html>'
+
+class FakeResponse:
+    def __init__(self, text:str, url:str, status_code=200):
+        self.text = text
+        self.content = text.encode('cp1251')
+        self.headers = {'Content-Type': 'text/html; charset=windows-1251'}
+        self.url = url
+        self.status_code = status_code
+        self.encoding = 'windows-1251'
+
+class FakeSession(requests.Session):
+    '''
+    form: "form1" or "form2"; n_cases: N cases found; js_only: form2 pages without results (rendered with JavaScript);
+    bad_gateway: N of first search results pages answered with 502; js_glitches: N of first search results pages rendered with JavaScript, the next ones are normal;
+    crash_on: a part of a url that raises 'crash' once;
+    fail_pages: pages of the search results that raise ConnectionError;
+    daily: a function datetime.date -> N cases registered that day, so that N cases depends on the dates of the search (form1, instead of n_cases; case ids are unique per day);
+    'calls' has the urls of all requests
+    '''
+
+    def __init__(self, form="form1", n_cases=60, js_only=False, bad_gateway=0, js_glitches=0, crash_on=None, crash=None, daily=None, fail_pages=()):
+        super().__init__()
+        self.form = form
+        self.n_cases = n_cases
+        self.js_only = js_only
+        self.bad_gateway = bad_gateway
+        self.js_glitches = js_glitches
+        self.crash_on = crash_on
+        self.crash = crash
+        self.daily = daily
+        self.fail_pages = set(fail_pages)
+        self.calls = []
+
+    def _ids(self, url):
+        if self.daily == None:
+            return range(self.n_cases)
+
+        # cases of every day of the search, numbered by the day of the year
+        start, end = [datetime.datetime.strptime(d, "%d.%m.%Y").date() for d in re.findall(r'(?i)entry_date[12]d=([\d.]+)', url)]
+        ids = []
+        while start <= end:
+            ids += [start.timetuple().tm_yday * 1000 + k for k in range(self.daily(start))]
+            start += datetime.timedelta(days=1)
+        return ids
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+
+        if self.crash_on != None and self.crash_on in url:
+            self.crash_on = None
+            raise self.crash
+
+        if 'name_op=sf' in url:
+            return FakeResponse(SEARCH_FORM if self.form == "form1" else SEARCH_FORM_F2, url)
+
+        if 'name_op=case' in url:
+            if self.js_only:
+                return FakeResponse(JS_ONLY, url)
+            i = int(re.search(r'(?:case_id|_id)=(\d+)', url)[1])
+            return FakeResponse(f1_case(i) if self.form == "form1" else f2_case(i), url)
+
+        if 'name_op=r' in url:
+            if self.bad_gateway > 0:
+                self.bad_gateway -= 1
+                return FakeResponse('<html><body>502 Bad Gateway</body></html>', url, 502)
+            if self.js_glitches > 0:
+                self.js_glitches -= 1
+                return FakeResponse(JS_ONLY, url)
+            m = re.search(r'&_?page=(\d+)', url)
+            page = int(m[1]) if m else 1
+            if page in self.fail_pages:
+                raise requests.exceptions.ConnectionError("connection reset")
+            if self.js_only:
+                return FakeResponse(JS_ONLY, url)
+            ids = self._ids(url)
+            return FakeResponse(f1_listing(page, len(ids), ids) if self.form == "form1" else f2_listing(page, self.n_cases), url)
+
+        return FakeResponse('', url)
+
+class FakePool:
+    '''
+    A BrowserPool whose "drivers" are FakeSessions made by 'make_session'
+    '''
+
+    def __init__(self, make_session):
+        self.make_session = make_session
+        self.acquired = []
+
+    def acquire(self, imagesOff=False, javaScriptOff=False):
+        self.acquired.append(self.make_session())
+        return self.acquired[-1]
+
+    def release(self, browser):
+        pass
+
+    def revive(self, browser):
+        return browser
+
+    def close(self):
+        pass
+
+def crawl(path_to_save:str, website="http://test.sudrf.ru", **kwargs):
+    # a crawl of one website over the HTTP engine, without saved profiles
+    return sudrfparser.get_cases(website, "50", "01.01.2021", "31.12.2021", "", path_to_save=path_to_save + os.sep,
+                                 engine="http", site_profiles_path="", **kwargs)
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+import sudrfparser
+
+CODECS = ["gzip", pytest.param("zstd", marks=pytest.mark.skipif(sudrfparser.zstandard == None, reason="zstandard is not installed"))]
+
+def _results(results_dir, name):
+    with open(os.path.join(results_dir, name), 'r') as f:
+        return json.load(f)
+
+def _jsonl_cases(results_dir, name):
+    with open(os.path.join(results_dir, name), 'r') as f:
+        return [json.loads(line) for line in f]
+
+### Region-year json archives ###
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_compress_round_trip(results_dir, tmp_path, codec):
+    status = sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), codec=codec)
+    assert "50" in status and "2021" in status
+
+    archive_path = os.path.join(tmp_path, f"50_2021_{codec}.json")
+    archive = sudrfparser.read_archive(archive_path)
+
+    # one server: the results are stored directly; several servers: by "srv_N"
+    assert archive["http://odin.mo.sudrf.ru"] == _results(results_dir, "50_odin_1_2021.json")["http://odin.mo.sudrf.ru"]
+    dva = archive["http://dva.mo.sudrf.ru"]
+    assert sorted(dva.keys()) == ["srv_1", "srv_2"]
+    assert dva["srv_1"]["cases"] == _jsonl_cases(results_dir, "50_dva_1_2021.jsonl")
+    assert dva["srv_1"]["logs"] == {"cases_found": "True", "driver_error": "False", "pagination_error": []}
+    assert dva["srv_2"] == _results(results_dir, "50_dva_2_2021.json")["http://dva.mo.sudrf.ru"]
+
+    # the other region is not in the archive
+    assert "http://tri.spb.sudrf.ru" not in archive
+
+    # the codec is recognized by the file
+    with sudrfparser.open_archive(archive_path) as f:
+        assert json.load(f) == archive
+
+def test_open_archive_not_compressed(results_dir):
+    with sudrfparser.open_archive(os.path.join(results_dir, "50_odin_1_2021.json")) as f:
+        assert json.load(f) == _results(results_dir, "50_odin_1_2021.json")
+
+@pytest.mark.parametrize("codec, level", [("gzip", 1), pytest.param("zstd", 19, marks=pytest.mark.skipif(sudrfparser.zstandard == None, reason="zstandard is not installed"))])
+def test_compress_level(results_dir, tmp_path, codec, level):
+    sudrfparser.compress_by_region_year(results_dir, "78", "2020", str(tmp_path), codec=codec, level=level)
+    assert sudrfparser.read_archive(os.path.join(tmp_path, f"78_2020_{codec}.json")) == _results(results_dir, "78_tri_1_2020.json")
+
+def test_unknown_codec(results_dir, tmp_path):
+    with pytest.raises(ValueError):
+        sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), codec="bz2")
+    with pytest.raises(ValueError):
+        sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), codec="bz2", seekable=True)
+
+@pytest.mark.skipif(sudrfparser.zstandard == None, reason="zstandard is not installed")
+def test_zstd_dictionary(results_dir, tmp_path):
+    dictionary = "Приговор по делу о краже Вынесен ПРИГОВОР case_found metadata accused".encode('utf-8') * 20
+    sudrfparser.compress_by_region_year(results_dir, "78", "2020", str(tmp_path), codec="zstd", dictionary=dictionary)
+    archive_path = os.path.join(tmp_path, "78_2020_zstd.json")
+
+    assert sudrfparser.read_archive(archive_path, dictionary=dictionary) == _results(results_dir, "78_tri_1_2020.json")
+    with pytest.raises(Exception):
+        sudrfparser.read_archive(archive_path)
+
+def test_zstd_not_installed(results_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(sudrfparser, "zstandard", None)
+    with pytest.raises(ImportError):
+        sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), codec="zstd")
+
+@pytest.mark.skipif(sudrfparser.zstandard == None, reason="zstandard is not installed")
+def test_train_zstd_dictionary(results_dir, tmp_path):
+    dictionary_path = sudrfparser.train_zstd_dictionary(results_dir, str(tmp_path / "cases.dict"), dict_size=2000)
+    sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), codec="zstd", dictionary=dictionary_path)
+
+    # the archive is read with the dictionary, as a path or as bytes
+    archive = sudrfparser.read_archive(str(tmp_path / "50_2021_zstd.json"), dictionary=dictionary_path)
+    assert archive["http://odin.mo.sudrf.ru"] == _results(results_dir, "50_odin_1_2021.json")["http://odin.mo.sudrf.ru"]
+    with open(dictionary_path, 'rb') as f:
+        assert sudrfparser.read_archive(str(tmp_path / "50_2021_zstd.json"), dictionary=f.read()) == archive
+
+### Seekable archives ###
+
+@pytest.fixture(params=CODECS)
+def blocks_path(request, results_dir, tmp_path):
+    # blocks of 1 KB, so that the cases of a server are in several blocks
+    sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), codec=request.param, seekable=True, block_size_kb=1)
+    return os.path.join(tmp_path, f"50_2021_{request.param}.blocks")
+
+def test_block_archive_index(blocks_path):
+    assert os.path.isfile(f"{blocks_path}.index.json.gz")
+
+    with sudrfparser.BlockArchiveReader(blocks_path) as archive:
+        assert sorted(archive.websites()) == ["http://dva.mo.sudrf.ru", "http://odin.mo.sudrf.ru"]
+        assert sorted(archive.case_ids()) == sorted(f"case_id={n}&case_uid=uid-{n}" for n in (101, 102, 103, 201, 202, 203))
+        assert sorted(archive.courts["http://dva.mo.sudrf.ru"].keys()) == ["1", "2"]
+        # servers are in separate blocks, a server with several cases in several blocks
+        odin_blocks = archive.courts["http://odin.mo.sudrf.ru"]["1"]["blocks"]
+        assert odin_blocks[1] - odin_blocks[0] > 1
+
+def test_block_archive_get_case(blocks_path, results_dir):
+    odin = _results(results_dir, "50_odin_1_2021.json")["http://odin.mo.sudrf.ru"]
+
+    with sudrfparser.BlockArchiveReader(blocks_path) as archive:
+        for case in odin["cases"]:
+            assert archive.get_case(case["case_id_uid"]) == case
+        assert archive.get_case("case_id=203&case_uid=uid-203", website="http://dva.mo.sudrf.ru", srv="2")["case_id_uid"] == "case_id=203&case_uid=uid-203"
+        assert archive.get_case("case_id=203&case_uid=uid-203", srv="1") == None
+        assert archive.get_case("case_id=0&case_uid=none") == None
+
+def test_block_archive_get_court(blocks_path, results_dir):
+    with sudrfparser.BlockArchiveReader(blocks_path) as archive:
+        assert archive.get_court("http://odin.mo.sudrf.ru") == {"1": _results(results_dir, "50_odin_1_2021.json")["http://odin.mo.sudrf.ru"]}
+
+        dva = archive.get_court("http://dva.mo.sudrf.ru", srv="1")
+        assert list(dva.keys()) == ["1"]
+        assert dva["1"]["num_cases"] == 2
+        assert dva["1"]["cases"] == _jsonl_cases(results_dir, "50_dva_1_2021.jsonl")
+
+        assert archive.get_court("http://none.sudrf.ru") == {}
+
+def test_block_archive_iter_cases(blocks_path):
+    with sudrfparser.BlockArchiveReader(blocks_path) as archive:
+        courts = [(website, srv, case["case_id_uid"]) for website, srv, case in archive.iter_cases()]
+
+    assert len(courts) == 6
+    assert ("http://dva.mo.sudrf.ru", "2", "case_id=203&case_uid=uid-203") in courts
+
+### Reading archives with iter_cases ###
+
+@pytest.mark.parametrize("seekable", [False, True])
+def test_iter_cases_archives(results_dir, tmp_path, seekable):
+    sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path), seekable=seekable)
+    name = "50_2021_gzip.blocks" if seekable else "50_2021_gzip.json"
+
+    cases = list(sudrfparser.iter_cases(os.path.join(tmp_path, name), with_court=True))
+    assert sorted(case["case_id_uid"] for website, srv, case in cases) == sorted(f"case_id={n}&case_uid=uid-{n}" for n in (101, 102, 103, 201, 202, 203))
+    srv_by_id = {case["case_id_uid"]: srv for website, srv, case in cases}
+    assert srv_by_id["case_id=203&case_uid=uid-203"] == "2"
+    # a website with one server has no srv in json archives
+    assert srv_by_id["case_id=101&case_uid=uid-101"] == (None if seekable == False else "1")
+
+def test_iter_cases_directory_with_archives(results_dir, tmp_path):
+    sudrfparser.compress_by_region_year(results_dir, "78", "2020", results_dir)
+
+    # the cases of the results files are not read again from the archive
+    assert len(list(sudrfparser.iter_cases(results_dir))) == 8
+
+    os.remove(os.path.join(results_dir, "78_tri_1_2020.json"))
+    assert sorted(case["case_id_uid"] for case in sudrfparser.iter_cases(results_dir, region="78")) == ["case_id=301&case_uid=uid-301", "case_id=302&case_uid=uid-302"]
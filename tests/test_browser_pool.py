@@ -0,0 +1,114 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+import sudrfparser
+
+class FakeDriver:
+    '''
+    A Chrome driver without Chrome: 'crashed' makes it stop responding, 'quit' is recorded
+    '''
+
+    def __init__(self, imagesOff, javaScriptOff):
+        self.profile = (imagesOff, javaScriptOff)
+        self.crashed = False
+        self.quit_called = False
+        self.n_pages_loaded = 0
+        self.window_handles = ["main"]
+        self.switch_to = self
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise WebDriverException("chrome not reachable")
+        return "about:blank"
+
+    def window(self, handle):
+        self.current_window = handle
+
+    def close(self):
+        self.window_handles.remove(self.current_window)
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture
+def drivers(monkeypatch):
+    started = []
+
+    def set_browser(path_to_driver, imagesOff=False, javaScriptOff=False):
+        started.append(FakeDriver(imagesOff, javaScriptOff))
+        return started[-1]
+
+    monkeypatch.setattr(sudrfparser, "_set_browser", set_browser)
+    return started
+
+def test_drivers_are_reused(drivers):
+    pool = sudrfparser.BrowserPool("")
+    browser = pool.acquire(imagesOff=True, javaScriptOff=True)
+    pool.release(browser)
+
+    assert pool.acquire(imagesOff=True, javaScriptOff=True) is browser
+    # another profile gets a driver of its own
+    other = pool.acquire()
+    assert other is not browser and other.profile == (False, False)
+    assert len(drivers) == 2
+
+    pool.close()
+    assert all(driver.quit_called for driver in drivers)
+
+def test_release_recycles(drivers):
+    pool = sudrfparser.BrowserPool("", max_pages=10)
+
+    browser = pool.acquire()
+    browser.n_pages_loaded = 10
+    pool.release(browser)
+    assert browser.quit_called == True
+    assert pool.acquire() is not browser
+
+    crashed = pool.acquire()
+    crashed.crashed = True
+    pool.release(crashed)
+    assert crashed.quit_called == True
+
+def test_release_closes_tabs(drivers):
+    pool = sudrfparser.BrowserPool("")
+    browser = pool.acquire()
+    browser.window_handles = ["main", "tab1", "tab2"]
+    pool.release(browser)
+
+    assert browser.window_handles == ["main"]
+    assert pool.acquire() is browser
+
+def test_max_idle(drivers):
+    pool = sudrfparser.BrowserPool("", max_idle=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    # only one driver waits in the pool, the longest waiting one is quit
+    assert first.quit_called == True and second.quit_called == False
+    assert pool.acquire() is second
+
+def test_idle_crashed_driver_is_replaced(drivers):
+    pool = sudrfparser.BrowserPool("")
+    browser = pool.acquire()
+    pool.release(browser)
+    browser.crashed = True
+
+    new_browser = pool.acquire()
+    assert new_browser is not browser and browser.quit_called == True
+
+def test_revive(drivers):
+    pool = sudrfparser.BrowserPool("")
+    browser = pool.acquire(imagesOff=True)
+    assert pool.revive(browser) is browser
+
+    browser.crashed = True
+    new_browser = pool.revive(browser)
+    assert new_browser is not browser and new_browser.profile == (True, False)
+    assert browser.quit_called == True
+
+    # releasing the stale reference returns the replacement to the pool
+    pool.release(browser)
+    assert new_browser.quit_called == False
+    assert pool.acquire(imagesOff=True) is new_browser
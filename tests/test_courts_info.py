@@ -0,0 +1,47 @@
+import pytest
+
+import bsr_parser
+import sudrfparser
+
+def test_lookups(registry):
+    assert registry.by_court_id("50RS0002")["court_website"] == "http://dva.mo.sudrf.ru"
+    assert registry.by_court_id("99RS0001") == None
+    # with or without the scheme, 'www.' and the trailing slash
+    assert registry.by_website("chetyre.spb.sudrf.ru")["court_id"] == "78RS0004"
+    assert registry.by_website("HTTP://dva.mo.sudrf.ru/")["court_id"] == "50RS0002"
+    assert [court["court_id"] for court in registry.by_region("78")] == ["78RS0003", "78RS0004"]
+    assert registry.by_region("99") == []
+
+def test_find_by_name(registry):
+    assert registry.find_by_name("Первый городской суд")["court_id"] == "50RS0001"
+    assert registry.find_by_name("Первый городской суд (Московская область)")["court_id"] == "50RS0001"
+    # double spaces, letter case, punctuation and 'ё'
+    assert registry.find_by_name("елкинский  районный суд")["court_id"] == "78RS0004"
+    assert registry.find_by_name("Ёлкинский районный суд (г Санкт-Петербург)")["court_id"] == "78RS0004"
+    assert registry.find_by_name("Второй городской суд") == None
+
+def test_find_by_name_ambiguous(registry):
+    # the name without the region belongs to courts of two regions
+    assert [court["court_id"] for court in registry.find_all_by_name("Центральный районный суд")] == ["50RS0002", "78RS0003"]
+    with pytest.raises(ValueError, match="2 courts"):
+        registry.find_by_name("Центральный районный суд")
+
+    # the region makes the name unique
+    assert registry.find_by_name("Центральный районный суд", region_code="78")["court_id"] == "78RS0003"
+    assert registry.find_by_name("Центральный районный суд (Московская область)")["court_id"] == "50RS0002"
+    # the court of another region is not taken
+    assert registry.find_by_name("Первый городской суд", region_code="78") == None
+
+def test_bsr_court_website(registry):
+    assert bsr_parser._get_court_website("Центральный районный суд (г. Санкт-Петербург)") == {"court_website": "http://tri.spb.sudrf.ru", "srv": ["1"], "court_id": "78RS0003"}
+    assert bsr_parser._get_court_website("Центральный районный суд") == {}
+    assert bsr_parser._get_court_website("Второй городской суд") == {}
+
+def test_bundled_registry():
+    registry = sudrfparser.get_court_registry()
+    assert registry is sudrfparser.get_court_registry()
+    # every court of the bundled info can be found by its full name and its website
+    for courts in registry.courts_info.values():
+        for court in courts:
+            assert registry.find_by_name(court["court_name"])["court_id"] == court["court_id"]
+            assert registry.by_website(court["court_website"])["court_id"] == court["court_id"]
@@ -0,0 +1,259 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+import requests
+
+import sudrfparser
+from fake_site import FakePool, FakeSession, JS_ONLY, crawl, f2_listing
+
+class Crash(BaseException):
+    # an interruption that is not caught by the crawl, as KeyboardInterrupt
+    pass
+
+def _results(path, name="50_test_1_2021"):
+    if os.path.isfile(os.path.join(path, f"{name}.jsonl")):
+        with open(os.path.join(path, f"{name}.jsonl"), 'r') as f:
+            cases = [json.loads(line) for line in f]
+        with open(os.path.join(path, f"{name}.logs.json"), 'r') as f:
+            results = list(json.load(f).values())[0]
+        return dict(results, cases=cases)
+
+    with open(os.path.join(path, f"{name}.json"), 'r') as f:
+        return list(json.load(f).values())[0]
+
+def _case_ids(results):
+    return [case["case_id_uid"] for case in results["cases"]]
+
+def _case_calls(session):
+    return [url for url in session.calls if "name_op=case" in url]
+
+### Crawling a website ###
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_get_cases(fake_site, tmp_path, output_format):
+    sessions = fake_site(n_cases=60)
+    result = crawl(str(tmp_path), output_format=output_format)
+
+    assert result["http://test.sudrf.ru"]["n_cases_by_server"] == {"1": 60}
+    results = _results(str(tmp_path))
+    assert results["num_cases"] == 60
+    assert _case_ids(results) == [f"case_id={i}&case_uid=uid-{i}" for i in range(60)]
+    assert results["logs"] == {"cases_found": "True", "driver_error": "False", "pagination_error": []}
+    assert results["cases"][7]["case_text"] == "Текст приговора7конец"
+    assert results["cases"][7]["metadata"]["accused"] == [{"name": "Петров П.П.", "article": ["ст.158 ч.1"]}]
+    # every case page is loaded once, without a browser
+    assert len(_case_calls(sessions[-1])) == 60
+    # jsonl: one case per line and the logs next to them
+    if output_format == "jsonl":
+        assert sorted(os.listdir(tmp_path)) == ["50_test_1_2021.jsonl", "50_test_1_2021.logs.json"]
+    # the crawl is finished, no checkpoint is left
+    assert [name for name in os.listdir(tmp_path) if "checkpoint" in name] == []
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_pipeline_output_same_for_any_workers(fake_site, tmp_path, output_format):
+    fake_site(n_cases=110)
+    for page_workers in [1, 4]:
+        os.makedirs(tmp_path / str(page_workers))
+        crawl(str(tmp_path / str(page_workers)), output_format=output_format, page_workers=page_workers)
+
+    assert _results(str(tmp_path / "4")) == _results(str(tmp_path / "1"))
+    assert len(_results(str(tmp_path / "1"))["cases"]) == 110
+
+def test_pipeline_failed_page(fake_site, tmp_path):
+    fake_site(n_cases=110, fail_pages=(3,))
+    crawl(str(tmp_path), page_workers=3)
+
+    results = _results(str(tmp_path))
+    assert results["logs"]["pagination_error"] == [3]
+    assert results["logs"]["driver_error"] == "True"
+    # the cases of the other pages are collected in order
+    assert _case_ids(results) == [f"case_id={i}&case_uid=uid-{i}" for i in list(range(50)) + list(range(75, 110))]
+
+### CasePipeline ###
+
+def _pipeline(session, **kwargs):
+    search_link = sudrfparser._search_link("form1", "http://test.sudrf.ru", "1", "01.01.2021", "31.12.2021")
+    search_results = sudrfparser._SearchResults("form1", "http://test.sudrf.ru", search_link)
+    return sudrfparser.CasePipeline("form1", session, "http://test.sudrf.ru", "1", search_results, **kwargs)
+
+@pytest.mark.parametrize("fetch_workers", [1, 4])
+def test_case_pipeline_events_in_order(fake_site, fetch_workers):
+    fake_site()
+    session = FakeSession(n_cases=100)
+    pipeline = _pipeline(session, fetch_workers=fetch_workers, queue_size=5, skip_ids={"case_id=30&case_uid=uid-30"})
+
+    events = [(event, page, item["case_id_uid"] if event == "case" else item) for event, page, item in pipeline.run([2, 3, 4])]
+
+    expected = []
+    for page in [2, 3, 4]:
+        expected += [("case", page, f"case_id={i}&case_uid=uid-{i}") for i in range((page-1)*25, page*25) if i != 30]
+        expected.append(("page", page, "ok"))
+    assert events == expected
+    # the skipped case is not loaded
+    assert not any("case_id=30&" in url for url in session.calls)
+
+    assert pipeline.metrics["listing"]["items"] == 3
+    assert pipeline.metrics["fetching"]["items"] == 74
+    assert pipeline.metrics["writing"]["items"] == 74
+
+def test_case_pipeline_statuses(fake_site):
+    fake_site()
+    # the 2nd page is not loaded
+    pipeline = _pipeline(FakeSession(n_cases=50, fail_pages=(2,)), fetch_workers=2)
+
+    assert [(page, item) for event, page, item in pipeline.run([2, 3]) if event == "page"] == [(2, "error"), (3, "ok")]
+
+def test_case_pipeline_passes_interruptions(fake_site):
+    fake_site()
+    pipeline = _pipeline(FakeSession(n_cases=100, crash_on="case_id=60&", crash=Crash()), fetch_workers=2)
+
+    events = []
+    with pytest.raises(Crash):
+        for event in pipeline.run([2, 3, 4]):
+            events.append(event)
+    # the cases before the crash are given to the caller, in order
+    assert [item["case_id_uid"] for event, page, item in events if event == "case"] == [f"case_id={i}&case_uid=uid-{i}" for i in range(25, 60)]
+
+### Requesting missing pages ###
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_request_missing_pages(fake_site, tmp_path, output_format):
+    # one case of the 2nd page is not loaded, the page is marked as not parsed
+    fake_site(n_cases=60, crash_on="case_id=30&", crash=requests.exceptions.ConnectionError("connection reset"))
+    crawl(str(tmp_path), output_format=output_format)
+    assert _results(str(tmp_path))["logs"]["pagination_error"] == [2]
+    assert len(_results(str(tmp_path))["cases"]) == 59
+
+    pool = FakePool(lambda: FakeSession(n_cases=60))
+    file_name = f"50_test_1_2021.{output_format}"
+    assert sudrfparser.request_missing_pages(str(tmp_path), "50", "2021", "", browser_pool=pool) == [f"1 cases were added to {file_name}"]
+
+    # only the missing case is loaded and added
+    results = _results(str(tmp_path))
+    assert sorted(_case_ids(results), key=lambda case_id: int(case_id.split("&")[0].split("=")[1])) == [f"case_id={i}&case_uid=uid-{i}" for i in range(60)]
+    assert results["logs"]["pagination_error"] == []
+    assert len(_case_calls(pool.acquired[0])) == 1 and "case_id=30&" in _case_calls(pool.acquired[0])[0]
+
+### Resuming and re-crawling ###
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_checkpoint_resume(fake_site, tmp_path, output_format):
+    fake_site(n_cases=110, crash_on="case_id=60&", crash=Crash())
+    with pytest.raises(Crash):
+        crawl(str(tmp_path), output_format=output_format)
+
+    checkpoint_path = tmp_path / "50_test_1_2021.checkpoint.json"
+    with open(checkpoint_path, 'r') as f:
+        state = json.load(f)
+    assert state["num_pages"] == 5
+    assert state["pages_done"] == [1, 2]
+
+    # the same crawl is resumed from the 3rd page
+    sessions = fake_site(n_cases=110)
+    result = crawl(str(tmp_path), output_format=output_format)
+
+    assert result["http://test.sudrf.ru"]["n_cases_by_server"] == {"1": 110}
+    results = _results(str(tmp_path))
+    assert _case_ids(results) == [f"case_id={i}&case_uid=uid-{i}" for i in range(110)]
+    assert results["logs"]["pagination_error"] == []
+    assert os.path.isfile(checkpoint_path) == False
+
+    # the cases written before the crash are not loaded again
+    loaded = [int(url.split("case_id=")[1].split("&")[0]) for url in _case_calls(sessions[-1])]
+    assert sorted(loaded) == list(range(60, 110))
+
+def test_checkpoint_other_dates_not_resumed(fake_site, tmp_path):
+    fake_site(n_cases=60, crash_on="case_id=30&", crash=Crash())
+    with pytest.raises(Crash):
+        crawl(str(tmp_path))
+
+    file_base = str(tmp_path / "50_test_1_2021")
+    assert sudrfparser._read_checkpoint(file_base, "http://test.sudrf.ru", "01.01.2021", "31.12.2021", "json") != None
+    assert sudrfparser._read_checkpoint(file_base, "http://test.sudrf.ru", "01.02.2021", "31.12.2021", "json") == None
+    assert sudrfparser._read_checkpoint(file_base, "http://test.sudrf.ru", "01.01.2021", "31.12.2021", "jsonl") == None
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_incremental(fake_site, tmp_path, output_format):
+    fake_site(n_cases=60)
+    crawl(str(tmp_path), output_format=output_format)
+
+    # 15 new cases, listing pages are loaded again
+    sessions = fake_site(n_cases=75)
+    result = crawl(str(tmp_path), output_format=output_format, incremental=True)
+
+    assert result["http://test.sudrf.ru"]["n_cases_by_server"] == {"1": 75}
+    assert _case_ids(_results(str(tmp_path))) == [f"case_id={i}&case_uid=uid-{i}" for i in range(75)]
+    assert len(_case_calls(sessions[-1])) == 15
+
+### The HTTP engine and form2 websites rendered with JavaScript ###
+
+def _crawl_f2(path_to_save, session):
+    return sudrfparser._get_cases_texts("form2", session, "http://test2.sudrf.ru", "50", "1", "01.01.2021", "31.12.2021",
+                                        path_to_save=path_to_save + os.sep, engine="http")
+
+def test_rendered_with_javascript():
+    assert sudrfparser._rendered_with_javascript(JS_ONLY) == True
+    assert sudrfparser._rendered_with_javascript(f2_listing(1, 45)) == False
+    # an error page, an empty search result
+    assert sudrfparser._rendered_with_javascript('<html><body>502 Bad Gateway</body></html>') == False
+    assert sudrfparser._rendered_with_javascript('<div id="modSdpContent">Всего найдено - 0</div>') == False
+
+def test_needs_browser():
+    now = int(time.time())
+    assert sudrfparser._needs_browser({"needs_browser": True, "needs_browser_at": now}) == True
+    assert sudrfparser._needs_browser({"needs_browser": True, "needs_browser_at": now - 31 * 24 * 3600}) == False
+    assert sudrfparser._needs_browser({"needs_browser": True, "needs_browser_at": now - 31 * 24 * 3600}, ttl_days=60) == True
+    assert sudrfparser._needs_browser({"needs_browser": False, "needs_browser_at": now}) == False
+    # profiles saved before the flag had a timestamp are checked again
+    assert sudrfparser._needs_browser({"needs_browser": True}) == False
+
+def test_form2_http(fake_site, tmp_path):
+    fake_site()
+    result = _crawl_f2(str(tmp_path), FakeSession(form="form2", n_cases=45, bad_gateway=1, js_glitches=1))
+
+    # a failed load and one page rendered with JavaScript are retried over HTTP
+    assert result["http://test2.sudrf.ru"]["n_cases_by_server"] == {"1": 45}
+    results = _results(str(tmp_path), "50_test2_1_2021")
+    assert _case_ids(results) == [f"_id={i}&_uid=u2-{i}" for i in range(45)]
+    assert results["cases"][3]["metadata"]["judge"] == "Сидоров"
+
+def test_form2_browser_required(fake_site, tmp_path):
+    fake_site()
+    assert _crawl_f2(str(tmp_path), FakeSession(form="form2", js_only=True)) == "browser_required"
+    # nothing is saved for the website
+    assert os.listdir(tmp_path) == []
+
+def test_form2_falls_back_to_browser(fake_site, tmp_path):
+    sessions = fake_site(form="form2", js_only=True)
+    pool = FakePool(lambda: FakeSession(form="form2", n_cases=30))
+    os.makedirs(tmp_path / "results")
+
+    result = sudrfparser.get_cases("http://test2.sudrf.ru", "50", "01.01.2021", "31.12.2021", "", "50RS0002", path_to_save=str(tmp_path / "results") + os.sep,
+                                   engine="http", browser_pool=pool)
+
+    # the cases are collected with the "driver" of the pool
+    assert result["http://test2.sudrf.ru"]["n_cases_by_server"] == {"1": 30}
+    assert len(pool.acquired) == 1 and len(_case_calls(pool.acquired[0])) == 30
+    assert len(_results(str(tmp_path / "results"), "50_test2_1_2021")["cases"]) == 30
+    # the next crawls go to the browser at once
+    profile = sudrfparser._read_site_profiles(str(tmp_path / "site_profiles.json"))["http://test2.sudrf.ru"]
+    assert profile["form_type"] == "form2" and sudrfparser._needs_browser(profile) == True
+
+### Websites' profiles ###
+
+def _save_profiles(site_profiles_path, websites):
+    for website in websites:
+        sudrfparser._save_site_profile(website, {"form_type": "form1", "checked_at": 1}, site_profiles_path)
+
+def test_profiles_saved_from_processes(tmp_path):
+    site_profiles_path = str(tmp_path / "profiles" / "site_profiles.json")
+    websites = [[f"http://court{i}-{j}.sudrf.ru" for j in range(25)] for i in range(4)]
+
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_save_profiles, [site_profiles_path] * 4, websites))
+
+    # no profile is lost by the workers saving at the same time
+    assert len(sudrfparser._read_site_profiles(site_profiles_path)) == 100
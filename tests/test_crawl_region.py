@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+
+import sudrfparser
+
+def test_crawl_region(fake_site, registry, tmp_path):
+    sessions = fake_site(n_cases=30)
+    os.makedirs(tmp_path / "results")
+    results = sudrfparser.crawl_region("50", "01.01.2021", "31.12.2021", path_to_save=str(tmp_path / "results") + os.sep, max_concurrency=4)
+
+    # one result per server of every website of the region
+    assert sorted(results.keys()) == ["http://dva.mo.sudrf.ru", "http://odin.mo.sudrf.ru"]
+    assert [result["http://dva.mo.sudrf.ru"]["n_cases_by_server"] for result in results["http://dva.mo.sudrf.ru"]] in ([{"1": 30}, {"2": 30}], [{"2": 30}, {"1": 30}])
+    assert sorted(os.listdir(tmp_path / "results")) == ["50_dva_mo_1_2021.json", "50_dva_mo_2_2021.json", "50_odin_mo_1_2021.json"]
+    # every case page is loaded once
+    assert sum(len([url for url in session.calls if "name_op=case" in url]) for session in sessions) == 90
+
+def test_crawl_region_limits_hosts(registry, monkeypatch):
+    active = {}
+    max_active = {"all": 0}
+    lock = threading.Lock()
+
+    def get_cases(website, region, start_date, end_date, path_to_driver, court_code, srv_num, *args, **kwargs):
+        with lock:
+            active[website] = active.get(website, 0) + 1
+            max_active[website] = max(max_active.get(website, 0), active[website])
+            max_active["all"] = max(max_active["all"], sum(active.values()))
+        time.sleep(0.05)
+        with lock:
+            active[website] -= 1
+        if website == "https://www.chetyre.spb.sudrf.ru/":
+            raise ValueError("broken page")
+        return {website: {"n_cases_by_server": {srv_num[0]: 1}}}
+
+    monkeypatch.setattr(sudrfparser, "get_cases", get_cases)
+
+    results = sudrfparser.crawl_region("50", "01.01.2021", "31.12.2021", max_concurrency=4, max_per_host=1)
+    # the servers of one host are not crawled at the same time
+    assert max_active["http://dva.mo.sudrf.ru"] == 1
+    assert len(results["http://dva.mo.sudrf.ru"]) == 2
+
+    # one website doesn't stop the region
+    results = sudrfparser.crawl_region("78", "01.01.2021", "31.12.2021", max_concurrency=1)
+    assert results["https://www.chetyre.spb.sudrf.ru/"][0].startswith("Failed to parse https://www.chetyre.spb.sudrf.ru/ (srv 1)")
+    assert results["http://tri.spb.sudrf.ru"] == [{"http://tri.spb.sudrf.ru": {"n_cases_by_server": {"1": 1}}}]
+    assert max_active["all"] <= 4
+
+def test_crawl_region_spreads_hosts(registry, monkeypatch):
+    calls = []
+    monkeypatch.setattr(sudrfparser, "get_cases", lambda website, region, start_date, end_date, path_to_driver, court_code, srv_num, *args, **kwargs: calls.append((website, srv_num[0])))
+
+    sudrfparser.crawl_region("50", "01.01.2021", "31.12.2021", max_concurrency=1)
+    # the first servers of all hosts go before the second ones
+    assert calls == [("http://odin.mo.sudrf.ru", "1"), ("http://dva.mo.sudrf.ru", "1"), ("http://dva.mo.sudrf.ru", "2")]
+
+def test_crawl_region_unknown_region(registry):
+    assert sudrfparser.crawl_region("99", "01.01.2021", "31.12.2021") == {}
+
+### Crawling courts in parallel processes ###
+
+def _jobs(registry, regions):
+    return [(region_code, court) for region_code in regions for court in registry.by_region(region_code)]
+
+def test_shard_jobs(registry):
+    jobs = _jobs(registry, ["50", "78"])
+
+    shards = sudrfparser._shard_jobs(jobs, ["50", "78"], 4)
+    assert [[court["court_id"] for region_code, court in shard] for shard in shards] == [["50RS0001", "50RS0002"], ["78RS0003", "78RS0004"]]
+
+    # the heaviest websites first, each to the lightest shard; every website is weighted once, whatever its N of servers
+    weights = {"http://dva.mo.sudrf.ru": 100, "http://odin.mo.sudrf.ru": 60, "http://tri.spb.sudrf.ru": 50}
+    shards = sudrfparser._shard_jobs(jobs, ["50", "78"], 2, "weight", weights)
+    assert [[court["court_id"] for region_code, court in shard] for shard in shards] == [["50RS0002", "78RS0004"], ["50RS0001", "78RS0003"]]
+
+    # no empty shards
+    assert len(sudrfparser._shard_jobs(jobs, ["50", "78"], 10, "weight")) == 4
+
+def test_crawl_shard(registry, monkeypatch):
+    calls = []
+
+    def get_cases(website, region, start_date, end_date, path_to_driver, court_code, srv_num, *args, **kwargs):
+        calls.append((website, srv_num))
+        if srv_num == ["2"]:
+            raise ValueError("broken page")
+        return {website: {"n_cases_by_server": {srv_num[0]: 1}}}
+
+    monkeypatch.setattr(sudrfparser, "get_cases", get_cases)
+    results = sudrfparser._crawl_shard(_jobs(registry, ["50"]), "01.01.2021", "31.12.2021", "", "", "", "http")
+
+    # one result per server, the servers of a website one after another
+    assert calls == [("http://odin.mo.sudrf.ru", ["1"]), ("http://dva.mo.sudrf.ru", ["1"]), ("http://dva.mo.sudrf.ru", ["2"])]
+    assert [website for website, result in results] == ["http://odin.mo.sudrf.ru", "http://dva.mo.sudrf.ru", "http://dva.mo.sudrf.ru"]
+    assert results[2][1].startswith("Failed to parse http://dva.mo.sudrf.ru (srv 2)")
+
+def test_expected_cases_by_website(fake_site, tmp_path):
+    fake_site(n_cases=30)
+    sudrfparser.get_cases("http://odin.mo.sudrf.ru", "50", "01.01.2021", "31.12.2021", "", srv_num=["1"], path_to_save=str(tmp_path) + os.sep, engine="http", site_profiles_path="")
+    fake_site(n_cases=45)
+    sudrfparser.get_cases("http://odin.mo.sudrf.ru", "50", "01.01.2020", "31.12.2020", "", srv_num=["1"], path_to_save=str(tmp_path) + os.sep, engine="http", site_profiles_path="")
+
+    # the largest N of cases of the website over the years
+    assert sudrfparser._expected_cases_by_website(str(tmp_path) + os.sep) == {"http://odin.mo.sudrf.ru": 45}
@@ -0,0 +1,105 @@
+import pytest
+
+import sudrfparser
+from fake_site import f1_case, f1_listing, f2_case, f2_listing
+from test_parsers import BACKENDS
+
+### _find_region ###
+
+def _region(page_source, tag, attr, value):
+    span = sudrfparser._find_region(page_source, tag, attr, value)
+    return page_source[span[0]:span[1]] if span != None else None
+
+def test_find_region_nested_tags():
+    page = '<div id="a"><DIV class="x"><div>1</div>tail</DIV></div><div id="b">2</div>'
+    assert _region(page, "div", "class", "x") == '<DIV class="x"><div>1</div>tail</DIV>'
+    assert _region(page, "div", "id", "a") == page[:page.index('<div id="b">')]
+    assert _region(page, "div", "id", "b") == '<div id="b">2</div>'
+
+def test_find_region_attributes():
+    page = "<table class='law-case-table wide' id=resultTable><tr><td>1</td></tr></table>"
+    # 'class' is matched by one of the classes, other attributes by the whole value, quoted or not
+    assert _region(page, "table", "class", "law-case-table") == page
+    assert _region(page, "table", "class", "law-case-table wide") == page
+    assert _region(page, "table", "id", "resultTable") == page
+    assert _region(page, "table", "id", "result") == None
+    assert _region(page, "table", "class", "law") == None
+
+def test_find_region_value_in_other_attribute():
+    # the value is in the tag, but not in the attribute
+    page = '<div title="contentt"></div><div class="contentt">x</div>'
+    assert _region(page, "div", "class", "contentt") == '<div class="contentt">x</div>'
+
+def test_find_region_tag_prefix():
+    # <tablex> is not a <table>
+    page = '<tablex id="t"></tablex><table id="t"><tr><td>1</td></tr></table>'
+    assert _region(page, "table", "id", "t") == '<table id="t"><tr><td>1</td></tr></table>'
+
+def test_find_region_unclosed_and_missing():
+    page = '<body><div id="content"><div>1</div>'
+    assert _region(page, "div", "id", "content") == '<div id="content"><div>1</div>'
+    assert sudrfparser._find_region(page, "div", "id", "other") == None
+    assert sudrfparser._find_region(page, "table", "id", "content") == None
+
+def test_find_region_skips_comments_and_scripts():
+    page = ('<div class="contentt"><!-- old layout </div> --><script>var s = "</div>";</script>'
+            '<style>p:after {content: "<div>"}</style><div id="cont3">x</div></div><div id="b"></div>')
+    assert _region(page, "div", "class", "contentt") == page[:page.index('<div id="b">')]
+    # elements inside comments and scripts are not found
+    assert _region('<!-- <div id="a">old</div> --><div id="a">new</div>', "div", "id", "a") == '<div id="a">new</div>'
+    assert sudrfparser._find_region('<script>"<div id=\'a\'>"</script>', "div", "id", "a") == None
+    # an unclosed comment hides the rest of the page
+    assert _region('<div id="a">1<!-- </div>', "div", "id", "a") == '<div id="a">1<!-- </div>'
+
+### _slice_regions ###
+
+def test_slice_regions_document_order():
+    page = '<html><body><p id="1">a</p><ul class="tabs"><li>x</li></ul><p>b</p><div class="casenumber">N</div></body></html>'
+    assert (sudrfparser._slice_regions(page, [("div", "class", "casenumber"), ("ul", "class", "tabs")])
+            == '<html><body><ul class="tabs"><li>x</li></ul><div class="casenumber">N</div></body></html>')
+
+def test_slice_regions_nested_taken_once():
+    page = '<div id="content"><table id="tablcont"><tr><td>1</td></tr></table></div>'
+    assert sudrfparser._slice_regions(page, [("div", "id", "content"), ("table", "id", "tablcont")]) == f"<html><body>{page}</body></html>"
+
+def test_slice_regions_missing_region():
+    assert sudrfparser._slice_regions('<div id="content"></div>', [("div", "id", "content"), ("table", "id", "tablcont")]) == None
+
+### _parse_html with regions ###
+
+PAGES = [("form1", "listing_regions", "num_cases_pages", f1_listing(2, 60)),
+         ("form1", "ids_regions", "cases_ids_per_page", f1_listing(3, 60)),
+         ("form1", "case_regions", "one_case_text", f1_case(7)),
+         ("form2", "listing_regions", "num_cases_pages", f2_listing(1, 45)),
+         ("form2", "ids_regions", "cases_ids_per_page", f2_listing(2, 45)),
+         ("form2", "case_regions", "one_case_text", f2_case(9))]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("form_type, regions, parser, page_source", PAGES)
+def test_parse_regions_same_as_whole_page(backend, form_type, regions, parser, page_source):
+    form = sudrfparser._FORMS[form_type]
+    # all the regions are on the fake pages
+    assert sudrfparser._slice_regions(page_source, form[regions]) != None
+
+    whole = form[parser](sudrfparser._parse_html(page_source, backend=backend))
+    sliced = form[parser](sudrfparser._parse_html(page_source, form[regions], backend=backend))
+    assert sliced == whole
+    # and the same as with BeautifulSoup
+    assert whole == form[parser](sudrfparser._parse_html(page_source, backend="bs4"))
+
+# a case page with a closing tag in a comment, as left on some websites after a change of layout
+MALFORMED_CASE = f1_case(5).replace('<div class="contentt">', '<div class="contentt"><!-- old layout </div> -->')
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_regions_comment_with_closing_tag(backend):
+    form = sudrfparser._FORMS["form1"]
+    whole = form["one_case_text"](sudrfparser._parse_html(MALFORMED_CASE, backend="bs4"))
+    assert whole["case_text"] == "Текст приговора5конец"
+
+    assert form["one_case_text"](sudrfparser._parse_html(MALFORMED_CASE, form["case_regions"], backend=backend)) == whole
+
+def test_parse_regions_whole_page_if_missing():
+    # no table of results: the page is parsed whole, the parser sees the same page
+    page_source = '<html><body><div id="content"><table><tr><td>Всего по запросу найдено - 0.</td></tr></table></div></body></html>'
+    soup = sudrfparser._parse_html(page_source, sudrfparser._FORMS["form1"]["listing_regions"], backend="bs4")
+    assert soup.find("div", {"id": "content"}) != None
@@ -0,0 +1,92 @@
+import gzip
+import os
+import time
+
+import sudrfparser
+from fake_site import crawl
+
+def test_normalize_url():
+    assert (sudrfparser._normalize_url("HTTP://Test.SUDRF.ru/modules.php?name_op=case&name=sud_delo&captcha=12345&captchaid=abc")
+            == "http://test.sudrf.ru/modules.php?name=sud_delo&name_op=case")
+    assert sudrfparser._normalize_url("http://test.sudrf.ru") == "http://test.sudrf.ru/"
+    # the search request of bsr.sudrf.ru is in the fragment
+    assert sudrfparser._normalize_url("https://bsr.sudrf.ru/bigs/portal.html#{\"start\":10}").endswith("#{\"start\":10}")
+    assert sudrfparser._normalize_url("http://a.ru/p?b=2&a=1") != sudrfparser._normalize_url("http://a.ru/p?b=3&a=1")
+
+def test_put_and_get(tmp_path):
+    cache = sudrfparser.PageCache(str(tmp_path))
+    cache.put("http://test.sudrf.ru/p?b=2&a=1&captcha=1", "<html>страница</html>")
+
+    # the same page with other captcha parameters and another order of the query
+    assert cache.get("http://TEST.sudrf.ru/p?a=1&b=2&captcha=2") == "<html>страница</html>"
+    assert cache.get("http://test.sudrf.ru/p?a=1&b=3") == None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert list(cache.urls()) == [("http://test.sudrf.ru/p?b=2&a=1&captcha=1", cache._file_path("http://test.sudrf.ru/p?a=1&b=2"))]
+
+    cache.clear()
+    assert cache.get("http://test.sudrf.ru/p?a=1&b=2") == None
+
+def _age(cache, url, days, used_days=None):
+    # the page was loaded 'days' ago and used last 'used_days' ago
+    file_path = cache._file_path(url)
+    now = time.time()
+    os.utime(file_path, (now - (used_days if used_days != None else days) * 86400, now - days * 86400))
+
+def test_ttl(tmp_path):
+    cache = sudrfparser.PageCache(str(tmp_path), ttl_days=30)
+    cache.put("http://a.ru/1", "old")
+    cache.put("http://a.ru/2", "new")
+    _age(cache, "http://a.ru/1", 31)
+    _age(cache, "http://a.ru/2", 29)
+
+    assert cache.get("http://a.ru/1") == None
+    assert cache.get("http://a.ru/2") == "new"
+
+    # using a page doesn't make it fresh
+    _age(cache, "http://a.ru/2", 31, used_days=0)
+    assert cache.get("http://a.ru/2") == None
+
+    # without ttl, pages are kept until they are evicted
+    assert sudrfparser.PageCache(str(tmp_path), ttl_days=None).get("http://a.ru/1") == "old"
+
+def test_evicts_least_recently_used(tmp_path):
+    pages = {f"http://a.ru/{i}": os.urandom(15000).hex() for i in range(6)}
+    # room for 4.5 pages
+    page_size = len(gzip.compress(("http://a.ru/0\n" + pages["http://a.ru/0"]).encode("utf-8"), 6))
+    cache = sudrfparser.PageCache(str(tmp_path), max_size_mb=4.5 * page_size / 1024 / 1024)
+
+    for i in range(4):
+        cache.put(f"http://a.ru/{i}", pages[f"http://a.ru/{i}"])
+        _age(cache, f"http://a.ru/{i}", 1, used_days=10 - i)
+    # the oldest page is used again
+    assert cache.get("http://a.ru/0") == pages["http://a.ru/0"]
+
+    cache.put("http://a.ru/4", pages["http://a.ru/4"])
+    cache.put("http://a.ru/5", pages["http://a.ru/5"])
+
+    # the least recently used pages are removed, down to 90% of the size
+    assert sorted(url for url, file_path in cache.urls()) == ["http://a.ru/0", "http://a.ru/3", "http://a.ru/4", "http://a.ru/5"]
+    assert cache._size == sum(os.path.getsize(file_path) for url, file_path in cache.urls())
+    assert cache._size <= 0.9 * cache.max_size
+
+def test_crawl_caches_case_pages(fake_site, monkeypatch, tmp_path):
+    sessions = fake_site(n_cases=30)
+    monkeypatch.setattr(sudrfparser, "PAGE_CACHE", sudrfparser.PageCache(str(tmp_path / "cache")))
+    os.makedirs(tmp_path / "results")
+
+    crawl(str(tmp_path / "results"))
+    crawl(str(tmp_path / "results"))
+
+    # the second crawl loads the search results (new cases have to be seen), but not the case pages
+    assert len([url for url in sessions[-1].calls if "name_op=case" in url]) == 0
+    assert len([url for url in sessions[-1].calls if "name_op=r" in url]) == 2
+    assert sudrfparser.PAGE_CACHE.hits == 30
+    assert all("name_op=case" in url for url, file_path in sudrfparser.PAGE_CACHE.urls())
+
+def test_configure_page_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(sudrfparser, "PAGE_CACHE", None)
+
+    cache = sudrfparser.configure_page_cache(str(tmp_path), ttl_days=90)
+    assert sudrfparser.PAGE_CACHE is cache and cache.ttl_days == 90
+    assert sudrfparser.configure_page_cache(enabled=False) == None
+    assert sudrfparser.PAGE_CACHE == None
@@ -0,0 +1,80 @@
+import datetime
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import sudrfparser
+
+def _parts(path_to_save, table, region, year):
+    return sorted(os.listdir(os.path.join(path_to_save, table, f"region={region}", f"year={year}")))
+
+def _table(path_to_save, table="cases"):
+    return sudrfparser.parquet_dataset(path_to_save, table).to_table()
+
+def test_export_directory(results_dir, tmp_path):
+    path_to_save = str(tmp_path / "parquet")
+    n_rows = sudrfparser.export_parquet(results_dir, path_to_save)
+
+    # one row per article (case 102 has two), case 103 has no accused and no rows in 'accused'
+    assert n_rows == {"cases": 8, "accused": 9, "texts": 8}
+    assert _parts(path_to_save, "cases", "50", "2021") == ["part-50_dva_1_2021.parquet", "part-50_dva_2_2021.parquet", "part-50_odin_1_2021.parquet"]
+    assert _parts(path_to_save, "texts", "78", "2020") == ["part-78_tri_1_2020.parquet"]
+
+    cases = {row["case_id_uid"]: row for row in _table(path_to_save).to_pylist()}
+    assert len(cases) == 8
+    assert cases["case_id=101&case_uid=uid-101"]["adm_date"] == datetime.date(2021, 2, 12)
+    assert cases["case_id=103&case_uid=uid-103"]["adm_date"] == None
+    assert cases["case_id=103&case_uid=uid-103"]["n_accused"] == 0
+    assert (cases["case_id=203&case_uid=uid-203"]["website"], cases["case_id=203&case_uid=uid-203"]["srv"]) == ("http://dva.mo.sudrf.ru", "2")
+    # region codes are strings
+    assert cases["case_id=301&case_uid=uid-301"]["region"] == "78"
+
+    texts = {row["case_id_uid"]: row["case_text"] for row in _table(path_to_save, "texts").to_pylist()}
+    assert texts["case_id=101&case_uid=uid-101"] == "Приговор по делу о краже велосипеда"
+
+def test_export_filters(results_dir, tmp_path):
+    path_to_save = str(tmp_path / "parquet")
+    assert sudrfparser.export_parquet(results_dir, path_to_save, region="78")["cases"] == 2
+    assert os.listdir(os.path.join(path_to_save, "cases")) == ["region=78"]
+
+def test_export_file_replaces_its_part(results_dir, tmp_path):
+    path_to_save = str(tmp_path / "parquet")
+    sudrfparser.export_parquet(results_dir, path_to_save)
+
+    # exporting one file again replaces only its part, the other files of the partition are kept
+    n_rows = sudrfparser.export_parquet(os.path.join(results_dir, "50_odin_1_2021.json"), path_to_save, batch_size=1)
+    assert n_rows["cases"] == 3
+    assert _parts(path_to_save, "cases", "50", "2021") == ["part-50_dva_1_2021.parquet", "part-50_dva_2_2021.parquet", "part-50_odin_1_2021.parquet"]
+    assert _table(path_to_save).num_rows == 8
+
+def test_export_archive_replaces_partition(results_dir, tmp_path):
+    path_to_save = str(tmp_path / "parquet")
+    sudrfparser.export_parquet(results_dir, path_to_save)
+    sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path))
+    archive_path = str(tmp_path / "50_2021_gzip.json")
+
+    # the archive has all cases of the region and year
+    assert sudrfparser.export_parquet(archive_path, path_to_save)["cases"] == 6
+    assert _parts(path_to_save, "cases", "50", "2021") == ["part-50_2021_gzip.parquet"]
+    assert _table(path_to_save).num_rows == 8
+
+    # one results file would duplicate the cases of the archive
+    with pytest.raises(ValueError):
+        sudrfparser.export_parquet(os.path.join(results_dir, "50_odin_1_2021.json"), path_to_save)
+    assert _parts(path_to_save, "cases", "50", "2021") == ["part-50_2021_gzip.parquet"]
+
+    # all results files of the directory replace the archive
+    sudrfparser.export_parquet(results_dir, path_to_save)
+    assert "part-50_2021_gzip.parquet" not in _parts(path_to_save, "cases", "50", "2021")
+    assert _table(path_to_save).num_rows == 8
+
+def test_export_accused_rows(results_dir, tmp_path):
+    path_to_save = str(tmp_path / "parquet")
+    sudrfparser.export_parquet(os.path.join(results_dir, "50_odin_1_2021.json"), path_to_save)
+
+    accused = _table(path_to_save, "accused").to_pylist()
+    assert sorted((row["case_id_uid"], row["accused_n"], row["article"]) for row in accused) == [("case_id=101&case_uid=uid-101", 0, "ст.158 ч.2"),
+                                                                                                ("case_id=102&case_uid=uid-102", 0, "ст.158 ч.1"),
+                                                                                                ("case_id=102&case_uid=uid-102", 0, "ст.159 ч.1")]
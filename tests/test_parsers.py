@@ -0,0 +1,49 @@
+import pytest
+
+import sudrfparser
+from fake_site import f1_case, f1_listing, f2_case, f2_listing
+
+BACKENDS = ["bs4",
+            pytest.param("lxml", marks=pytest.mark.skipif(sudrfparser.lxml == None, reason="lxml is not installed")),
+            pytest.param("selectolax", marks=pytest.mark.skipif(sudrfparser.LexborHTMLParser == None, reason="selectolax is not installed"))]
+
+# (form type, page parser, page)
+PAGES = [("form1", "num_cases_pages", f1_listing(2, 60)),
+         ("form1", "cases_ids_per_page", f1_listing(3, 60)),
+         ("form1", "one_case_text", f1_case(7)),
+         ("form2", "num_cases_pages", f2_listing(1, 45)),
+         ("form2", "cases_ids_per_page", f2_listing(2, 45)),
+         ("form2", "one_case_text", f2_case(9))]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("form_type, parser, page_source", PAGES)
+def test_backends_same_as_bs4(backend, form_type, parser, page_source):
+    parse = sudrfparser._FORMS[form_type][parser]
+    assert parse(sudrfparser._parse_html(page_source, backend=backend)) == parse(sudrfparser._parse_html(page_source, backend="bs4"))
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_text_as_bs4(backend):
+    page_source = '<div id="a">\n  <p>Текст&nbsp;1</p>\n\n<script>var x=1;</script><pre>  \n</pre><b class="x y">2</b></div>'
+    node = sudrfparser._parse_html(page_source, backend=backend).find("div", id="a")
+    soup = sudrfparser._parse_html(page_source, backend="bs4").find("div", id="a")
+
+    assert node.text == soup.text
+    assert node.find("b", class_="y").text == "2"
+    assert [p.text for p in node.find_all("p")] == ["Текст\xa01"]
+    assert node.find("i") == None
+
+def test_set_parser_backend(monkeypatch):
+    monkeypatch.setattr(sudrfparser, "PARSER_BACKEND", "bs4")
+
+    with pytest.raises(ValueError, match="Unknown parser backend"):
+        sudrfparser.set_parser_backend("html5lib")
+    assert sudrfparser.PARSER_BACKEND == "bs4"
+
+    # the missing package is reported when the backend is chosen, not when a page is parsed
+    monkeypatch.setattr(sudrfparser, "lxml", None)
+    with pytest.raises(ImportError):
+        sudrfparser.set_parser_backend("lxml")
+
+def test_parsed_node_is_abstract():
+    with pytest.raises(TypeError):
+        sudrfparser._ParsedNode(None)
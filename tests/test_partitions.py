@@ -0,0 +1,128 @@
+import datetime
+import json
+import os
+
+import sudrfparser
+from fake_site import FakeResponse, FakeSession
+
+WEBSITE = "http://test.sudrf.ru"
+
+def _daily(day):
+    # 10 cases a day in February, 300 on the 1st of March, 1 on other days
+    if day == datetime.date(2021, 3, 1):
+        return 300
+    return 10 if day.month == 2 else 1
+
+def test_split_date_range():
+    assert sudrfparser._split_date_range("15.01.2021", "10.03.2021", "month") == [("15.01.2021", "31.01.2021"), ("01.02.2021", "28.02.2021"), ("01.03.2021", "10.03.2021")]
+    assert sudrfparser._split_date_range("01.02.2021", "10.02.2021", "week") == [("01.02.2021", "07.02.2021"), ("08.02.2021", "10.02.2021")]
+    assert sudrfparser._split_date_range("30.12.2020", "01.01.2021", "day") == [("30.12.2020", "30.12.2020"), ("31.12.2020", "31.12.2020"), ("01.01.2021", "01.01.2021")]
+
+def test_plan_date_partitions(fake_site):
+    fake_site(daily=_daily)
+    partitions = sudrfparser.plan_date_partitions(WEBSITE, "01.01.2021", "31.03.2021", max_cases=200, site_profiles_path="")
+
+    assert partitions[:6] == [("01.01.2021", "31.01.2021", 31),
+                              ("01.02.2021", "07.02.2021", 70), ("08.02.2021", "14.02.2021", 70), ("15.02.2021", "21.02.2021", 70), ("22.02.2021", "28.02.2021", 70),
+                              # a day with more cases is not split
+                              ("01.03.2021", "01.03.2021", 300)]
+    assert partitions[6:] == [(d, d, 1) for d in ["02.03.2021", "03.03.2021", "04.03.2021", "05.03.2021", "06.03.2021", "07.03.2021"]] + [
+                              ("08.03.2021", "14.03.2021", 7), ("15.03.2021", "21.03.2021", 7), ("22.03.2021", "28.03.2021", 7), ("29.03.2021", "31.03.2021", 3)]
+
+    # a small range is not split
+    assert sudrfparser.plan_date_partitions(WEBSITE, "01.01.2021", "31.01.2021", max_cases=200, site_profiles_path="") == [("01.01.2021", "31.01.2021", 31)]
+
+def test_plan_date_partitions_errors(fake_site):
+    # error pages are loaded again
+    fake_site(daily=_daily, bad_gateway=2)
+    assert sudrfparser.plan_date_partitions(WEBSITE, "01.01.2021", "31.03.2021", max_cases=200, site_profiles_path="")[0] == ("01.01.2021", "31.01.2021", 31)
+
+    # N cases is unknown, there is no plan (not a part with 0 cases)
+    fake_site(daily=_daily, bad_gateway=100)
+    assert sudrfparser.plan_date_partitions(WEBSITE, "01.01.2021", "31.03.2021", max_cases=200, site_profiles_path="") == []
+
+class SearchSession(sudrfparser.requests.Session):
+    '''
+    Search results pages given in order: a str is a page, an exception is raised
+    '''
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = list(pages)
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        page = self.pages.pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return FakeResponse(page, url)
+
+ERROR_PAGE = '<html><body>502 Bad Gateway</body></html>'
+EMPTY_RESULT = '<html><body><div id="content">Данных по запросу не найдено</div></body></html>'
+CAPTCHA_ERROR = '<html><body><div id="content"><div id="error">Неверно указан проверочный код</div></div></body></html>'
+LISTING = '<div id="content"><table><tr><td align="right">Всего по запросу найдено - 40.</td></tr></table><table id="tablcont"><tr><th>N</th></tr></table></div>'
+
+def _count(session, **kwargs):
+    return sudrfparser._count_cases(session, "form1", WEBSITE, "1", "01.01.2021", "31.01.2021", **kwargs)
+
+def test_count_cases(fake_site):
+    fake_site()
+
+    assert _count(SearchSession([LISTING])) == (40, "")
+    assert _count(SearchSession([EMPTY_RESULT])) == (0, "")
+    # loaded again after errors
+    assert _count(SearchSession([ERROR_PAGE, sudrfparser.requests.exceptions.ConnectionError(), LISTING])) == (40, "")
+    # unknown N cases
+    session = SearchSession([ERROR_PAGE] * 4)
+    assert _count(session) == (None, "")
+    assert len(session.calls) == 4
+    assert _count(SearchSession([sudrfparser.requests.exceptions.Timeout()] * 2), tries=1) == (None, "")
+
+def test_count_cases_new_captcha(fake_site, monkeypatch):
+    fake_site()
+    monkeypatch.setitem(sudrfparser._FORMS["form1"], "captcha", lambda browser, website, autocaptcha: "&captcha=new")
+
+    session = SearchSession([CAPTCHA_ERROR, LISTING])
+    assert _count(session, captcha_addition="&captcha=old", captcha=True) == (40, "&captcha=new")
+    assert session.calls[1].endswith("&captcha=new")
+
+def _case_numbers(path):
+    with open(path, 'r') as f:
+        cases = list(json.load(f).values())[0]["cases"]
+    return [int(case["case_id_uid"].split("&")[0].split("=")[1]) for case in cases]
+
+def _days_ids(start, end):
+    ids = []
+    while start <= end:
+        ids += [start.timetuple().tm_yday * 1000 + k for k in range(_daily(start))]
+        start += datetime.timedelta(days=1)
+    return ids
+
+def test_get_cases_partitioned(fake_site, tmp_path):
+    fake_site(daily=_daily)
+    result = sudrfparser.get_cases_partitioned(WEBSITE, "50", "01.01.2021", "31.03.2021", "", path_to_save=str(tmp_path) + os.sep,
+                                               engine="http", max_cases=200, n_workers=3, site_profiles_path="")
+
+    assert result[WEBSITE]["n_cases_by_server"] == {"1": 641}
+    assert len(result[WEBSITE]["partitions_by_server"]["1"]) == 16
+    # the parts are merged in the order of dates, the directory of parts is removed
+    assert _case_numbers(tmp_path / "50_test_1_2021.json") == _days_ids(datetime.date(2021, 1, 1), datetime.date(2021, 3, 31))
+    assert os.listdir(tmp_path) == ["50_test_1_2021.json"]
+
+def test_get_cases_partitioned_without_plan(fake_site, monkeypatch, tmp_path):
+    fake_site()
+    # the search results fail while the range is planned, then the website is back
+    sessions = [FakeSession(daily=_daily, bad_gateway=4)]
+    def set_session(pool_size=10):
+        sessions.append(FakeSession(daily=_daily))
+        return sessions[-2]
+    monkeypatch.setattr(sudrfparser, "_set_session", set_session)
+
+    result = sudrfparser.get_cases_partitioned(WEBSITE, "50", "01.01.2021", "31.01.2021", "", path_to_save=str(tmp_path) + os.sep,
+                                               engine="http", max_cases=10, site_profiles_path="")
+
+    # the whole range is parsed as one part
+    assert result[WEBSITE]["partitions_by_server"]["1"] == [["01.01.2021", "31.01.2021", None]]
+    assert result[WEBSITE]["n_cases_by_server"] == {"1": 31}
+    assert os.listdir(tmp_path) == ["50_test_1_2021.json"]
@@ -0,0 +1,102 @@
+import pytest
+
+import sudrfparser
+from fake_site import FakeResponse
+
+class Clock:
+    '''
+    time.monotonic and time.sleep without waiting: sleeping moves the clock forward
+    '''
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, sec):
+        self.sleeps.append(round(sec, 6))
+        self.now += sec
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sudrfparser.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(sudrfparser.time, "sleep", clock.sleep)
+    return clock
+
+def test_burst_then_rate(clock):
+    limiter = sudrfparser.RateLimiter(rate=2, burst=3)
+    for i in range(5):
+        limiter.acquire("http://a.sudrf.ru/page")
+
+    # the burst goes at once, the next requests wait for tokens
+    assert clock.sleeps == [0.5, 0.5]
+
+    # the tokens are restored after a pause, not above the burst
+    clock.now += 100
+    clock.sleeps = []
+    for i in range(4):
+        limiter.acquire("http://a.sudrf.ru/page")
+    assert clock.sleeps == [0.5]
+
+def test_hosts_are_limited_separately(clock):
+    limiter = sudrfparser.RateLimiter(rate=1, burst=1, per_host={"bsr.sudrf.ru": (0.5, 1)})
+    limiter.acquire("http://a.sudrf.ru/1")
+    limiter.acquire("http://b.sudrf.ru/1")
+    assert clock.sleeps == []
+
+    limiter.acquire("https://bsr.sudrf.ru/bigs/portal.html")
+    limiter.acquire("https://bsr.sudrf.ru/bigs/portal.html")
+    assert clock.sleeps == [2]
+
+def test_adaptive_rate(clock):
+    limiter = sudrfparser.RateLimiter(rate=2, burst=1, min_rate=0.5)
+    url = "http://a.sudrf.ru/1"
+
+    limiter.report_error(url)
+    assert limiter._buckets["a.sudrf.ru"]["rate"] == 1
+    for i in range(5):
+        limiter.report_error(url)
+    assert limiter._buckets["a.sudrf.ru"]["rate"] == 0.5
+
+    # restored gradually, up to the host's rate
+    limiter.report_success(url)
+    assert limiter._buckets["a.sudrf.ru"]["rate"] == pytest.approx(0.55)
+    for i in range(50):
+        limiter.report_success(url)
+    assert limiter._buckets["a.sudrf.ru"]["rate"] == 2
+
+    not_adaptive = sudrfparser.RateLimiter(rate=2, adaptive=False)
+    not_adaptive.report_error(url)
+    assert not_adaptive._buckets == {}
+
+def test_configure_rate_limits(monkeypatch):
+    monkeypatch.setattr(sudrfparser, "RATE_LIMITER", sudrfparser.RATE_LIMITER)
+    limiter = sudrfparser.configure_rate_limits(rate=5, per_host={"mos-gorsud.ru": (1, 2)})
+
+    assert sudrfparser.RATE_LIMITER is limiter
+    assert limiter.rate == 5
+    # bsr.sudrf.ru is always slowed down
+    assert limiter.per_host == {"bsr.sudrf.ru": (0.3, 1), "mos-gorsud.ru": (1, 2)}
+
+class Session(sudrfparser.requests.Session):
+    def __init__(self, status_code):
+        super().__init__()
+        self.status_code = status_code
+
+    def get(self, url, **kwargs):
+        if self.status_code == 503:
+            return FakeResponse('<html><body>503 Service Unavailable</body></html>', url, 503)
+        return FakeResponse('<div id="content">x</div>', url)
+
+def test_load_page_reports_overloaded_servers(monkeypatch):
+    limiter = sudrfparser.RateLimiter(rate=100000, burst=100000)
+    monkeypatch.setattr(sudrfparser, "RATE_LIMITER", limiter)
+    monkeypatch.setattr(sudrfparser, "PAGE_CACHE", None)
+
+    sudrfparser._load_page(Session(503), "http://a.sudrf.ru/1", "ID", "content")
+    assert limiter._buckets["a.sudrf.ru"]["rate"] == 50000
+    sudrfparser._load_page(Session(200), "http://a.sudrf.ru/1", "ID", "content")
+    assert limiter._buckets["a.sudrf.ru"]["rate"] == pytest.approx(55000)
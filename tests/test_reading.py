@@ -0,0 +1,82 @@
+import io
+import json
+import os
+
+import pytest
+
+import sudrfparser
+
+### _JsonStream ###
+
+DOCUMENT = {"http://a.sudrf.ru": {"num_cases": 12345, "cases": [{"case_text": "текст \"в кавычках\" {}[],:", "n": 1.5e3}, {}, {"x": [1, [2, 3]]}],
+                                  "logs": {"pagination_error": [], "cases_found": "True"}},
+            "http://b.sudrf.ru": {"num_cases": 0, "cases": [], "logs": {}}}
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_json_stream_reads_values_across_chunks(chunk_size):
+    stream = sudrfparser._JsonStream(io.StringIO(json.dumps(DOCUMENT, ensure_ascii=False, indent=1)), chunk_size)
+
+    read = {}
+    for website in stream.object_keys():
+        court = read[website] = {}
+        for key in stream.object_keys():
+            court[key] = list(stream.array_items()) if key == "cases" else stream.value()
+
+    assert read == DOCUMENT
+    assert stream.peek() == None
+
+def test_json_stream_number_at_the_end_of_a_chunk():
+    # 12345 is cut by the chunks, it must not be read as 12
+    stream = sudrfparser._JsonStream(io.StringIO('{"num_cases": 12345}'), 16)
+    assert [(key, stream.value()) for key in stream.object_keys()] == [("num_cases", 12345)]
+
+def test_json_stream_empty_containers_and_errors():
+    stream = sudrfparser._JsonStream(io.StringIO(' { } [ ] '), 2)
+    assert list(stream.object_keys()) == []
+    assert list(stream.array_items()) == []
+
+    with pytest.raises(ValueError):
+        sudrfparser._JsonStream(io.StringIO('[1, 2]')).expect("{")
+    with pytest.raises(ValueError):
+        list(sudrfparser._JsonStream(io.StringIO('[1, 2'), 3).array_items())
+
+### iter_cases ###
+
+ALL_IDS = {f"case_id={n}&case_uid=uid-{n}" for n in (101, 102, 103, 201, 202, 203, 301, 302)}
+
+def _ids(cases):
+    return [case["case_id_uid"] for case in cases]
+
+def test_iter_cases_directory(results_dir):
+    ids = _ids(sudrfparser.iter_cases(results_dir))
+    assert sorted(ids) == sorted(ALL_IDS)
+
+def test_iter_cases_filters(results_dir):
+    assert set(_ids(sudrfparser.iter_cases(results_dir, region="78"))) == {"case_id=301&case_uid=uid-301", "case_id=302&case_uid=uid-302"}
+    assert len(list(sudrfparser.iter_cases(results_dir, year="2021"))) == 6
+    assert list(sudrfparser.iter_cases(results_dir, region="50", year="2020")) == []
+
+def test_iter_cases_files(results_dir):
+    json_cases = list(sudrfparser.iter_cases(os.path.join(results_dir, "50_odin_1_2021.json")))
+    assert _ids(json_cases) == [f"case_id={n}&case_uid=uid-{n}" for n in (101, 102, 103)]
+
+    jsonl_cases = list(sudrfparser.iter_cases(os.path.join(results_dir, "50_dva_1_2021.jsonl"), with_court=True))
+    assert [(website, srv) for website, srv, case in jsonl_cases] == [("http://dva.mo.sudrf.ru", "1")] * 2
+
+    # the file does not match the filters
+    assert list(sudrfparser.iter_cases(os.path.join(results_dir, "50_odin_1_2021.json"), region="78")) == []
+
+def test_iter_cases_fields_and_court(results_dir):
+    cases = list(sudrfparser.iter_cases(results_dir, region="50", fields=["case_id_uid", "missing"], with_court=True))
+
+    assert all(set(case.keys()) == {"case_id_uid"} for website, srv, case in cases)
+    courts = {case["case_id_uid"]: (website, srv) for website, srv, case in cases}
+    assert courts["case_id=101&case_uid=uid-101"] == ("http://odin.mo.sudrf.ru", "1")
+    assert courts["case_id=203&case_uid=uid-203"] == ("http://dva.mo.sudrf.ru", "2")
+
+def test_iter_cases_cut_off_jsonl(results_dir):
+    # the last line of a crawl interrupted while writing
+    with open(os.path.join(results_dir, "50_dva_1_2021.jsonl"), 'a') as f:
+        f.write('{"case_text": "обрыв')
+
+    assert len(list(sudrfparser.iter_cases(os.path.join(results_dir, "50_dva_1_2021.jsonl")))) == 2
@@ -0,0 +1,92 @@
+import json
+import os
+import urllib.parse
+
+import bsr_parser
+import sudrfparser
+from fake_site import crawl
+
+### Re-parsing cached case pages ###
+
+def _crawl_cached(fake_site, monkeypatch, tmp_path, **kwargs):
+    fake_site(n_cases=30)
+    monkeypatch.setattr(sudrfparser, "PAGE_CACHE", sudrfparser.PageCache(str(tmp_path / "cache")))
+    os.makedirs(tmp_path / "results")
+    crawl(str(tmp_path / "results"), **kwargs)
+
+def _spoil(file_path):
+    # cases parsed by an old version of the parsers
+    with open(file_path, 'r') as f:
+        results = json.load(f)
+    for case in results["http://test.sudrf.ru"]["cases"]:
+        case["case_text"] = "old"
+    with open(file_path, 'w') as f:
+        json.dump(results, f, ensure_ascii=False)
+    return results
+
+def test_reparse(fake_site, monkeypatch, tmp_path):
+    _crawl_cached(fake_site, monkeypatch, tmp_path)
+    file_path = tmp_path / "results" / "50_test_1_2021.json"
+    spoiled = _spoil(file_path)
+    # a case without a cached page
+    os.remove(sudrfparser.PAGE_CACHE._file_path(sudrfparser._case_link("form1", "http://test.sudrf.ru", "1", "case_id=3&case_uid=uid-3")))
+
+    logs = sudrfparser.reparse(str(tmp_path / "results"), str(tmp_path / "cache"), path_to_save=str(tmp_path / "reparsed"), n_workers=1, chunk_size=7)
+    assert logs == ["29 of 30 cases were re-parsed in 50_test_1_2021.json"]
+
+    with open(tmp_path / "reparsed" / "50_test_1_2021.json", 'r') as f:
+        results = json.load(f)["http://test.sudrf.ru"]
+    # the cases in the same order, N cases and logs are kept
+    assert [case["case_id_uid"] for case in results["cases"]] == [f"case_id={i}&case_uid=uid-{i}" for i in range(30)]
+    assert [case["case_text"] for case in results["cases"]] == [f"Текст приговора{i}конец" if i != 3 else "old" for i in range(30)]
+    assert results["num_cases"] == 30 and results["logs"] == spoiled["http://test.sudrf.ru"]["logs"]
+    # the file in dir_path is not changed
+    with open(file_path, 'r') as f:
+        assert json.load(f) == spoiled
+
+def test_reparse_jsonl_in_place(fake_site, monkeypatch, tmp_path):
+    _crawl_cached(fake_site, monkeypatch, tmp_path, output_format="jsonl")
+
+    # only the files of the region and year
+    assert sudrfparser.reparse(str(tmp_path / "results"), str(tmp_path / "cache"), region_code="78", n_workers=1) == []
+    assert sudrfparser.reparse(str(tmp_path / "results"), str(tmp_path / "cache"), region_code="50", year="2021", n_workers=1) == ["30 of 30 cases were re-parsed in 50_test_1_2021.jsonl"]
+
+    with open(tmp_path / "results" / "50_test_1_2021.jsonl", 'r') as f:
+        assert [json.loads(line)["case_text"] for line in f] == [f"Текст приговора{i}конец" for i in range(30)]
+
+### Re-parsing cached bsr search results ###
+
+def _bsr_url(keyword, start=None):
+    request = {"multiqueryRequest": {"queryRequests": [
+        {"type": "Q", "request": json.dumps({"query": keyword, "type": "NEAR", "mode": "SIMPLE"})},
+        {"type": "Q", "request": json.dumps({"mode": "EXTENDED", "typeRequests": [{"fieldRequests": [{"name": "case_user_doc_entry_date", "query": "2021-01-01T00:00:00", "sQuery": "2021-01-31T00:00:00"}]}]})}]}}
+    if start != None:
+        request = dict({"start": start, "rows": 20}, **request)
+    return urllib.parse.quote("https://bsr.sudrf.ru/bigs/portal.html#" + json.dumps(request, ensure_ascii=False), safe='/:#,=&')
+
+def _bsr_page(ids, n_cases):
+    items = "".join(f'''<li><a class="resultHeader" href="https://bsr.sudrf.ru/bigs/showDocument.html#id={i}&shard=x">Дело</a>
+<div class="bgs-result"><a>Уголовное дело № 1-{i}/2021</a></div>
+<span class="resultHeaderAttributes"><span class="additional-field-value" data-comment="Наименование суда:"><span>Первый городской суд</span></span>
+<span class="additional-field-value" data-comment="Дата поступления:"><span>0{i % 9 + 1}.01.2021</span></span></span></li>''' for i in ids)
+    return f'<html><body><div id="resultCount" data-total="{n_cases}"></div><ul id="resultsList">{items}</ul></body></html>'
+
+def test_reparse_cases_links(tmp_path):
+    cache = sudrfparser.PageCache(str(tmp_path / "cache"))
+    cache.put(_bsr_url("кража", 20), _bsr_page(range(20, 25), 25))
+    cache.put(_bsr_url("кража"), _bsr_page(range(20), 25))
+    cache.put(_bsr_url("грабеж"), '<html><body><ul id="resultsList"><li>Ничего не найдено</li></ul></body></html>')
+    # not a bsr page
+    cache.put("http://test.sudrf.ru/modules.php?name_op=case", "<html></html>")
+    os.makedirs(tmp_path / "links")
+
+    status = bsr_parser.reparse_cases_links(str(tmp_path / "cache"), str(tmp_path / "links"), n_workers=1)
+    assert status.startswith("3 cached pages were re-parsed")
+
+    with open(tmp_path / "links" / "cases_links_reparsed_2021-01-01_2021-01-31.json", 'r') as f:
+        results = json.load(f)
+    # the pages in the order of the search results
+    assert results["кража"]["n_cases"] == 25
+    assert [case["case_id_bsr"] for case in results["кража"]["cases"]] == [str(i) for i in range(25)]
+    assert results["кража"]["cases"][0]["metadata"] == {"id_text": "№ 1-0/2021", "court_name": "Первый городской суд", "adm_date": "01.01.2021", "decision_result": ""}
+    assert results["грабеж"] == {"n_cases": 0, "cases": []}
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+import sudrfparser
+from fake_site import FakePool, FakeSession, crawl
+
+def test_parse_results_file_name():
+    assert sudrfparser._parse_results_file_name("50_chehov_mo_1_2019.json") == ("50", "chehov_mo", "1", "2019")
+    assert sudrfparser._parse_results_file_name("50_chehov_mo_12_2019.jsonl") == ("50", "chehov_mo", "12", "2019")
+    # files next to the results files
+    for name in ["50_chehov_mo_1_2019.logs.json", "50_chehov_mo_1_2019.checkpoint.json", "50_2019_gzip.json", "plan.json", "50_chehov_mo_1_2019.json.gz"]:
+        assert sudrfparser._parse_results_file_name(name) == None
+
+def test_index_results_files(results_dir):
+    # files of another server and not results files
+    for name in ["50_dva_10_2021.json", "50_dva_1_2021.checkpoint.json", "notes.txt"]:
+        open(os.path.join(results_dir, name), 'w').close()
+    os.makedirs(os.path.join(results_dir, "50_odin_2_2021.json"))
+
+    assert sudrfparser._index_results_files(results_dir) == {
+        ("50", "2021"): {"dva": {"1": "50_dva_1_2021.jsonl", "2": "50_dva_2_2021.json", "10": "50_dva_10_2021.json"},
+                         "odin": {"1": "50_odin_1_2021.json"}},
+        ("78", "2020"): {"tri": {"1": "78_tri_1_2020.json"}}}
+    # servers in the numeric order
+    assert list(sudrfparser._index_results_files(results_dir)[("50", "2021")]["dva"]) == ["1", "2", "10"]
+
+@pytest.mark.parametrize("name", ["50_odin_1_2021.json", "50_dva_1_2021.jsonl", "50_dva_2_2021.json", "78_tri_1_2020.json"])
+def test_read_results_logs(results_dir, name, monkeypatch):
+    file_path = os.path.join(results_dir, name)
+    expected = {website: {"num_cases": v["num_cases"], "logs": v["logs"]} for website, v in sudrfparser._read_results_file(file_path).items()}
+
+    # the cases are not read
+    monkeypatch.setattr(sudrfparser, "_read_results_file", None)
+    assert sudrfparser._read_results_logs(file_path) == expected
+    assert sudrfparser._read_results_website(file_path) == list(expected.keys())[0]
+
+def test_read_results_logs_written_in_another_way(results_dir):
+    file_path = os.path.join(results_dir, "50_odin_1_2021.json")
+    with open(file_path, 'r') as f:
+        results = json.load(f)["http://odin.mo.sudrf.ru"]
+    expected = {"http://odin.mo.sudrf.ru": {"num_cases": 3, "logs": results["logs"]}}
+
+    # indented, the logs are not the last
+    with open(file_path, 'w') as f:
+        json.dump({"http://odin.mo.sudrf.ru": {"logs": results["logs"], "num_cases": 3, "cases": results["cases"]}}, f, ensure_ascii=False, indent=2)
+    assert sudrfparser._read_results_logs(file_path) == expected
+
+    # a case with its own "logs" at the end of the file
+    cases = results["cases"] + [{"case_id_uid": "x", "logs": {"pagination_error": [5]}}]
+    with open(file_path, 'w') as f:
+        json.dump({"http://odin.mo.sudrf.ru": {"num_cases": 3, "logs": results["logs"], "cases": cases}}, f, ensure_ascii=False)
+    assert sudrfparser._read_results_logs(file_path) == expected
+
+def _set_pagination_error(file_path, pages):
+    with open(file_path, 'r') as f:
+        results = json.load(f)
+    for v in results.values():
+        v["logs"]["pagination_error"] = pages
+    with open(file_path, 'w') as f:
+        json.dump(results, f, ensure_ascii=False)
+
+def test_get_missing_pages(results_dir):
+    assert sudrfparser._get_missing_pages(results_dir, "50", "2021") == (0, [])
+
+    _set_pagination_error(os.path.join(results_dir, "50_dva_2_2021.json"), [2, 3])
+    _set_pagination_error(os.path.join(results_dir, "50_dva_1_2021.logs.json"), [4])
+    _set_pagination_error(os.path.join(results_dir, "78_tri_1_2020.json"), [1])
+
+    assert sudrfparser._get_missing_pages(results_dir, "50", "2021") == (3, ["50_dva_1_2021.jsonl", "50_dva_2_2021.json"])
+    index = sudrfparser._index_results_files(results_dir)
+    assert sudrfparser._get_missing_pages(results_dir, "78", "2020", index) == (1, ["78_tri_1_2020.json"])
+
+def test_request_missing_pages_keeps_key_order(fake_site, tmp_path, monkeypatch):
+    # the 2nd page of the search results is not loaded
+    fake_site(n_cases=60, fail_pages=(2,))
+    crawl(str(tmp_path))
+
+    pool = FakePool(lambda: FakeSession(n_cases=60))
+    assert sudrfparser.request_missing_pages(str(tmp_path), "50", "2021", "", browser_pool=pool) == ["25 cases were added to 50_test_1_2021.json"]
+
+    with open(tmp_path / "50_test_1_2021.json", 'r') as f:
+        results = json.load(f)["http://test.sudrf.ru"]
+    assert list(results.keys()) == ["num_cases", "cases", "logs"]
+    assert len(results["cases"]) == 60 and results["logs"]["pagination_error"] == []
+
+    # the logs of the rewritten file are still read without the cases
+    monkeypatch.setattr(sudrfparser, "_read_results_file", None)
+    assert sudrfparser._read_results_logs(str(tmp_path / "50_test_1_2021.json"))["http://test.sudrf.ru"]["num_cases"] == 60
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+import sudrfparser
+from fake_site import crawl
+
+@pytest.fixture
+def sink(tmp_path):
+    with sudrfparser.SqliteSink(str(tmp_path / "cases.db"), batch_size=2) as sink:
+        yield sink
+
+needs_fts = pytest.mark.skipif(sudrfparser.SqliteSink(":memory:").fts == False, reason="SQLite is built without FTS5")
+
+def test_load(sink, results_dir):
+    assert sink.load(results_dir) == 8
+    assert len(sink.case_keys()) == 8
+    assert sink.case_keys(website="http://dva.mo.sudrf.ru", srv="2") == {"case_id=203&case_uid=uid-203"}
+
+    # loaded again, the cases replace the stored ones
+    assert sink.load(results_dir, region="50") == 6
+    assert len(sink.case_keys()) == 8
+
+def test_get_and_has(sink, results_dir):
+    sink.load(os.path.join(results_dir, "50_odin_1_2021.json"))
+
+    assert sink.has("case_id=101&case_uid=uid-101") == True
+    assert sink.has("case_id=101&case_uid=uid-101", website="http://dva.mo.sudrf.ru") == False
+    assert sink.has("case_id=101&case_uid=uid-101", source="bsr") == False
+
+    [stored] = sink.get("case_id=101&case_uid=uid-101")
+    assert (stored["source"], stored["website"], stored["srv"], stored["region"], stored["year"]) == ("sudrf", "http://odin.mo.sudrf.ru", "1", "50", "2021")
+    # the case is the same as in the results file
+    assert stored["case"] == next(case for case in sudrfparser.iter_cases(results_dir) if case["case_id_uid"] == "case_id=101&case_uid=uid-101")
+    assert sink.get("case_id=0&case_uid=none") == []
+
+def test_text_stored_once(sink, results_dir):
+    sink.load(os.path.join(results_dir, "50_odin_1_2021.json"))
+    text, data = sink._connection.execute("SELECT case_text, data FROM cases WHERE case_key = 'case_id=101&case_uid=uid-101'").fetchone()
+    assert text == "Приговор по делу о краже велосипеда"
+    assert "case_text" not in data
+
+def test_accused_and_dates(sink, results_dir):
+    sink.load(os.path.join(results_dir, "50_odin_1_2021.json"))
+    articles = sink._connection.execute("SELECT cases.case_key, accused.article FROM accused JOIN cases ON cases.id = accused.case_id ORDER BY 1, 2").fetchall()
+    assert articles == [("case_id=101&case_uid=uid-101", "ст.158 ч.2"), ("case_id=102&case_uid=uid-102", "ст.158 ч.1"), ("case_id=102&case_uid=uid-102", "ст.159 ч.1")]
+    assert sink._connection.execute("SELECT adm_date FROM cases WHERE case_key = 'case_id=101&case_uid=uid-101'").fetchone() == ("2021-02-12",)
+
+def test_srv_normalised(sink, results_dir, tmp_path):
+    # a website with one server has no srv in json archives; loaded from the archive or from the results file, it is the same case
+    sudrfparser.compress_by_region_year(results_dir, "50", "2021", str(tmp_path))
+    sink.load(str(tmp_path / "50_2021_gzip.json"))
+    sink.load(os.path.join(results_dir, "50_odin_1_2021.json"))
+
+    assert len(sink.get("case_id=101&case_uid=uid-101")) == 1
+    assert sink.case_keys(website="http://odin.mo.sudrf.ru", srv="1") == sink.case_keys(website="http://odin.mo.sudrf.ru", srv=None)
+    assert len(sink.case_keys()) == 6
+
+@needs_fts
+def test_search(sink, results_dir):
+    sink.load(results_dir)
+
+    found = sink.search("краже")
+    assert sorted(result["case"]["case_id_uid"] for result in found) == ["case_id=101&case_uid=uid-101", "case_id=202&case_uid=uid-202", "case_id=301&case_uid=uid-301"]
+    assert [result["case"]["case_id_uid"] for result in sink.search("краже", region="78")] == ["case_id=301&case_uid=uid-301"]
+    assert sink.search("краже", year="2019") == []
+    assert len(sink.search("краже", limit=1)) == 1
+
+    # the index follows replaced cases
+    case = dict(sink.get("case_id=101&case_uid=uid-101")[0]["case"], case_text="Приговор по делу о грабеже")
+    sink.add(case, "http://odin.mo.sudrf.ru", "1", "50", "2021")
+    assert "case_id=101&case_uid=uid-101" not in [result["case"]["case_id_uid"] for result in sink.search("краже")]
+
+def test_sink_writer_attempts(sink, tmp_path):
+    writer = sudrfparser._SinkCasesWriter(sudrfparser._cases_writer(str(tmp_path / "50_test_1_2021"), "http://test.sudrf.ru"),
+                                         sink, "http://test.sudrf.ru", "1", "50", "2021")
+
+    # a failed attempt at the first page
+    writer.add({"case_id_uid": "case_id=1&case_uid=a", "case_text": "", "case_found": "True"})
+    writer.reset()
+    assert sink.case_keys() == set()
+
+    writer.add({"case_id_uid": "case_id=2&case_uid=b", "case_text": "", "case_found": "True"})
+    writer.keep_written()
+    writer.add({"case_id_uid": "case_id=3&case_uid=c", "case_text": "", "case_found": "True"})
+    writer.close(2, {})
+
+    assert sink.case_keys() == {"case_id=2&case_uid=b", "case_id=3&case_uid=c"}
+    assert [case["case_id_uid"] for case in sudrfparser.iter_cases(str(tmp_path / "50_test_1_2021.json"))] == ["case_id=2&case_uid=b", "case_id=3&case_uid=c"]
+
+def test_sink_writer_discard(sink, tmp_path):
+    writer = sudrfparser._SinkCasesWriter(sudrfparser._cases_writer(str(tmp_path / "50_test_1_2021"), "http://test.sudrf.ru", "jsonl"),
+                                         sink, "http://test.sudrf.ru", "1", "50", "2021")
+    writer.add({"case_id_uid": "case_id=1&case_uid=a", "case_text": "", "case_found": "True"})
+    writer.discard()
+    assert sink.case_keys() == set()
+
+def test_crawl_with_sink(fake_site, tmp_path, sink):
+    os.makedirs(tmp_path / "results")
+    fake_site(n_cases=60)
+    crawl(str(tmp_path / "results"), sink=sink)
+    assert len(sink.case_keys(website="http://test.sudrf.ru", srv="1")) == 60
+
+    # an incremental crawl into an empty directory: the cases in the database are not loaded again
+    os.makedirs(tmp_path / "other")
+    sessions = fake_site(n_cases=70)
+    crawl(str(tmp_path / "other"), sink=sink, incremental=True)
+
+    assert len([url for url in sessions[-1].calls if "name_op=case" in url]) == 10
+    assert len(sink.case_keys()) == 70
+    [stored] = sink.get("case_id=65&case_uid=uid-65")
+    assert (stored["website"], stored["srv"], stored["region"], stored["year"]) == ("http://test.sudrf.ru", "1", "50", "2021")